@@ -0,0 +1,79 @@
+"""
+콜드 스타트 import 시간 측정 및 예산 검사
+
+    $ python -m benchmarks.bench_import_time
+    $ python -m benchmarks.bench_import_time --budget-ms 150
+
+각 대상 모듈을 새 프로세스에서 `python -X importtime`으로 import하여
+누적 import 시간을 측정하고, 무거운 의존성이 import 시점에 로드되지 않는지 확인합니다.
+예산을 넘거나 무거운 의존성이 로드되면 종료 코드 1을 반환하므로 CI에서 그대로 사용할 수 있습니다.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# import만으로는 로드되면 안 되는 모듈
+HEAVY_MODULES = [
+    "torch", "torchaudio", "pyannote", "demucs", "numpy",
+    "openai", "elevenlabs", "yt_dlp", "pydub", "requests",
+]
+
+# 대상별 최대 누적 import 시간 (ms, tests/test_import_time.py도 같은 값 사용)
+DEFAULT_BUDGET_MS = 300.0
+
+DEFAULT_TARGETS = [
+    "video_processing.srt_utils",
+    "video_processing.transcription",
+    "video_processing.tts",
+    "main",
+]
+
+
+def measure_import(target):
+    """(누적 import 시간 ms, 로드된 무거운 모듈 목록) 반환"""
+    code = (
+        f"import sys, {target}\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    )
+
+    # 형식: "import time: self [us] | cumulative | imported package"
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # 들여쓰기가 없는 줄이 최상위 import
+        if not name.startswith("  "):
+            total_us += int(cumulative)
+
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return total_us / 1000, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="대상별 최대 누적 import 시간")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<34} {'import (ms)':>12}  heavy modules loaded")
+    for target in args.targets:
+        elapsed_ms, loaded = measure_import(target)
+        over_budget = elapsed_ms > args.budget_ms
+        failed = failed or over_budget or bool(loaded)
+        mark = "❌" if over_budget or loaded else "✅"
+        print(f"{target:<34} {elapsed_ms:>12.1f}  {', '.join(loaded) or '-'} {mark}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
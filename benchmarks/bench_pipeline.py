@@ -0,0 +1,262 @@
+"""
+전체 파이프라인 처리량 벤치마크 (API 비용/네트워크 없이 로컬 대체 서버 사용)
+
+    $ python -m benchmarks.bench_pipeline
+    $ python -m benchmarks.bench_pipeline --durations 30 300 --latency-ms whisper=1500 chat=2000 tts=400 --output results.jsonl
+    $ python -m benchmarks.bench_pipeline --durations 120 --warm --error-rate tts=0.05
+
+1. ffmpeg로 길이별 합성 영상(테스트 패턴 + 음성 대역 배음 톤)을 만들고 대체 서버의 /videos/ 경로로 제공
+2. 길이마다 새 프로세스에서 (빈 캐시로) `process_video` → 자막 일부 수정 → `regenerate_video_from_srt` 실행
+   (--warm이면 같은 캐시로 한 번 더 실행해서 캐시 적중 시 시간도 측정)
+3. 단계마다 실행 시간, 최대 RSS(현재 프로세스 / 자식 프로세스 중 최대), 대체 서버가 받은 호출 수, 단계별 시간(trace.jsonl)을 기록
+
+영상 다운로드는 yt-dlp가 대체 서버의 일반 URL을 받아 처리하고, Demucs/pyannote는 로컬 모델을 그대로 사용합니다.
+(pyannote 모델은 미리 받아 둔 HF 캐시가 있어야 네트워크 없이 실행됩니다)
+`--output`을 주면 결과를 JSON 한 줄씩 추가하므로 변경 전후 결과를 비교할 수 있습니다.
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.mock_services import MockServiceServer, add_mock_arguments, settings_from_args
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_DURATIONS = [30, 120, 600]
+VOICE_IDS = ["mockvoice00", "mockvoice01"]
+# 재생성 전에 번역을 바꾸는 자막 비율 (바뀐 자막만 TTS를 다시 요청하는지 확인)
+EDIT_EVERY = 10
+
+# 2~3초 발화 + 1초 쉼을 반복하는 음성 대역 배음 톤 (VAD가 음성 구간으로 인식하도록)
+SPEECH_EXPR = (
+    "0.25*(sin(2*PI*180*t)+0.6*sin(2*PI*360*t)+0.4*sin(2*PI*540*t)+0.3*sin(2*PI*900*t))"
+    "*(0.6+0.4*sin(2*PI*4*t))*lt(mod(t,3.5),2.5)"
+    "+0.002*(random(0)-0.5)"
+)
+
+
+def make_synthetic_video(path, duration):
+    """테스트 패턴 영상 + 합성 음성 트랙 mp4 생성 (이미 있으면 재사용)"""
+    if os.path.exists(path):
+        return path
+    temp_path = f"{path}.part.mp4"
+    subprocess.run([
+        "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size=640x360:rate=25:duration={duration}",
+        "-f", "lavfi", "-i", f"aevalsrc=exprs={SPEECH_EXPR}|{SPEECH_EXPR}:s=44100:d={duration}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-g", "50", "-c:a", "aac", "-b:a", "128k",
+        "-shortest", "-movflags", "+faststart", temp_path,
+    ], check=True)
+    os.replace(temp_path, path)
+    return path
+
+
+def seconds_to_timestamp(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:02}:{seconds % 3600 // 60:02}:{seconds % 60:02}"
+
+
+# ---------- 자식 프로세스 (측정 대상) ----------
+
+def peak_rss_mb():
+    """(현재 프로세스 최대 RSS, 종료된 자식 프로세스 중 최대 RSS) MB (ru_maxrss 단위: Linux KB, macOS 바이트)"""
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor)
+
+
+def mock_stats(mock_url):
+    with urllib.request.urlopen(f"{mock_url}/_stats") as response:
+        return json.load(response)
+
+
+def stats_delta(before, after):
+    return {
+        service: {key: after[service][key] - before[service][key] for key in after[service]}
+        for service in after
+        if after[service]["calls"] - before[service]["calls"] or after[service]["errors"] - before[service]["errors"]
+    }
+
+
+def stage_times(job, pipeline_name):
+    """trace.jsonl에서 가장 최근 `pipeline_name` 실행의 단계별 실행 시간 {단계: 초}"""
+    from video_processing.tracing import read_trace
+
+    records = read_trace(job)
+    runs = [record for record in records if record["kind"] == "pipeline" and record["name"] == pipeline_name]
+    if not runs:
+        return {}
+    run_id = runs[-1]["span_id"]
+    return {record["name"]: round(record["wall"], 3) for record in records if record["kind"] == "stage" and record["root_id"] == run_id}
+
+
+def measure_phase(name, mock_url, func):
+    before = mock_stats(mock_url)
+    started = time.perf_counter()
+    result = func()
+    wall = time.perf_counter() - started
+    rss_self, rss_children = peak_rss_mb()
+    print(f"   ⏱️ {name}: {wall:.1f}s")
+    return result, {
+        "phase": name,
+        "wall_seconds": round(wall, 3),
+        "peak_rss_mb": round(rss_self, 1),
+        "peak_child_rss_mb": round(rss_children, 1),
+        "calls": stats_delta(before, mock_stats(mock_url)),
+    }
+
+
+def edit_subtitles(job, every=EDIT_EVERY):
+    """UI에서 자막을 고친 것처럼 `every`개마다 하나씩 번역을 바꿈"""
+    from video_processing.subtitles import SubtitleDocument
+
+    document = SubtitleDocument.open(job)
+    edited = 0
+    for cue in list(document.cues)[::every]:
+        document.upsert(cue.start_ms, cue.end_ms, cue.speaker, cue.original, f"{cue.translation} (edited)")
+        edited += 1
+    return edited
+
+
+def run_child(args):
+    """환경 변수가 대체 서버를 가리키도록 설정된 프로세스에서 실행 (config가 import 시점에 환경 변수를 읽음)"""
+    from main import process_video, regenerate_video_from_srt
+    from video_processing.job import Job
+
+    end_time = seconds_to_timestamp(args.duration)
+    phases = []
+    runs = 2 if args.warm else 1
+    for run in range(runs):
+        label = "cold" if run == 0 else "warm"
+        job = Job()
+
+        _, phase = measure_phase(f"process_video ({label})", args.mock_url, lambda: process_video(
+            args.video_url, "KO", "EN", len(VOICE_IDS), VOICE_IDS, "00:00:00", end_time, job))
+        phase["stages"] = stage_times(job, "process_video")
+        phases.append(phase)
+
+        edited = edit_subtitles(job)
+        _, phase = measure_phase(f"regenerate ({label}, {edited} edited)", args.mock_url,
+                                 lambda: regenerate_video_from_srt(VOICE_IDS, job))
+        phase["stages"] = stage_times(job, "regenerate_video")
+        phases.append(phase)
+
+    with open(args.result_file, "w", encoding="utf-8") as f:
+        json.dump({"duration": args.duration, "phases": phases}, f, ensure_ascii=False)
+
+
+# ---------- 부모 프로세스 (대체 서버 + 결과 정리) ----------
+
+def run_scenario(duration, video_name, mock, args, work_dir):
+    """빈 캐시/작업 디렉토리로 자식 프로세스를 실행하고 결과(dict) 반환"""
+    scenario_dir = os.path.join(work_dir, f"run-{duration}s")
+    shutil.rmtree(scenario_dir, ignore_errors=True)
+    os.makedirs(scenario_dir)
+
+    env = {
+        **os.environ,
+        **mock.environment(),
+        "DOWNLOAD_DIR": scenario_dir,
+        "CACHE_DIR": os.path.join(scenario_dir, "cache"),
+        "JOBS_DIR": os.path.join(scenario_dir, "jobs"),
+        "TRACE_LOG_FILE": os.path.join(scenario_dir, "trace.jsonl"),
+        "PYTHONUNBUFFERED": "1",
+    }
+    result_file = os.path.join(scenario_dir, "result.json")
+    command = [
+        sys.executable, "-m", "benchmarks.bench_pipeline", "--child", "--result-file", result_file,
+        "--duration", str(duration), "--video-url", f"{mock.url}/videos/{video_name}", "--mock-url", mock.url,
+    ]
+    if args.warm:
+        command.append("--warm")
+
+    started = time.perf_counter()
+    process = subprocess.run(command, cwd=PROJECT_ROOT, env=env, stdout=None if args.verbose else subprocess.PIPE, text=True)
+    wall = time.perf_counter() - started
+
+    if process.returncode != 0 or not os.path.exists(result_file):
+        # 실패하면 파이프라인 진행 메시지의 마지막 부분을 보여 줌
+        print("\n".join((process.stdout or "").splitlines()[-20:]))
+        return {"duration": duration, "ok": False, "returncode": process.returncode, "process_seconds": round(wall, 3)}
+
+    with open(result_file, "r", encoding="utf-8") as f:
+        result = json.load(f)
+    result.update({"ok": True, "process_seconds": round(wall, 3)})
+    return result
+
+
+def print_summary(results):
+    print(f"\n{'duration':>8}  {'phase':<34} {'wall (s)':>9} {'rss (MB)':>9} {'child (MB)':>10}  calls")
+    for result in results:
+        if not result["ok"]:
+            print(f"{result['duration']:>7}s  ❌ 실패 (exit {result['returncode']})")
+            continue
+        for phase in result["phases"]:
+            calls = ", ".join(f"{service} {stats['calls']}" + (f" ({stats['errors']} err)" if stats["errors"] else "")
+                              for service, stats in phase["calls"].items())
+            print(f"{result['duration']:>7}s  {phase['phase']:<34} {phase['wall_seconds']:>9.1f} "
+                  f"{phase['peak_rss_mb']:>9.0f} {phase['peak_child_rss_mb']:>10.0f}  {calls or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=int, nargs="+", default=DEFAULT_DURATIONS, help="합성 영상 길이 (초)")
+    parser.add_argument("--warm", action="store_true", help="같은 캐시로 한 번 더 실행")
+    parser.add_argument("--work-dir", default=None, help="합성 영상/작업 공간 디렉토리 (기본: 임시 디렉토리, 실행 후 삭제)")
+    parser.add_argument("--output", default=None, help="결과를 JSON 한 줄씩 추가할 파일")
+    parser.add_argument("--label", default="", help="결과에 함께 기록할 이름 (예: 브랜치, 커밋)")
+    parser.add_argument("--verbose", action="store_true", help="파이프라인 진행 메시지 출력")
+    add_mock_arguments(parser)
+    # 자식 프로세스용 인자
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--duration", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--video-url", help=argparse.SUPPRESS)
+    parser.add_argument("--mock-url", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="voice-builder-bench-")
+    video_dir = os.path.join(work_dir, "videos")
+    os.makedirs(video_dir, exist_ok=True)
+
+    mock = MockServiceServer(settings_from_args(args), video_dir=video_dir).start()
+    print(f"🧪 대체 서버: {mock.url}  작업 디렉토리: {work_dir}")
+
+    results = []
+    try:
+        for duration in args.durations:
+            video_name = f"synthetic_{duration}s.mp4"
+            print(f"🎞️ 합성 영상 {duration}s 준비 중...")
+            make_synthetic_video(os.path.join(video_dir, video_name), duration)
+
+            print(f"🚀 {duration}s 영상 처리 중...")
+            result = run_scenario(duration, video_name, mock, args, work_dir)
+            result.update({"label": args.label, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "argv": sys.argv[1:]})
+            results.append(result)
+
+            if args.output:
+                with open(args.output, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        mock.shutdown()
+        mock.server_close()
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_summary(results)
+    sys.exit(0 if all(result["ok"] for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+match_speakers_with_transcription 확장성 벤치마크
+
+    $ python -m benchmarks.bench_speaker_matching
+    $ python -m benchmarks.bench_speaker_matching --sizes 10000 40000 --reference-max 10000
+
+합성 데이터(단어 N개, 화자 구간 N/8개, segment N/12개)로 실행 시간을 측정하고,
+`--reference-max` 이하 크기에서는 기존 O(S·D + S·W·D) 구현과 결과가 같은지도 확인합니다.
+"""
+import argparse
+import random
+import time
+
+from video_processing.transcription import match_speakers_with_transcription
+
+
+def make_synthetic_inputs(num_words, num_speakers=4, seed=0):
+    rng = random.Random(seed)
+
+    # 🔹 화자 구간: 평균 8단어 길이, 가끔 겹치거나 비어 있는 구간 포함
+    diarization = []
+    t = 0.0
+    while len(diarization) < max(1, num_words // 8):
+        duration = rng.uniform(0.5, 4.0)
+        diarization.append({
+            "speaker": f"SPEAKER_{rng.randrange(num_speakers):02}",
+            "start": round(t, 3),
+            "end": round(t + duration, 3),
+        })
+        t += duration + rng.uniform(-0.3, 0.6)
+
+    # 🔹 단어: 0.1 ~ 0.5초 길이로 이어지고, 12단어마다 segment 하나
+    words = []
+    t = 0.05
+    for i in range(num_words):
+        duration = rng.uniform(0.1, 0.5)
+        words.append({"word": f"w{i}", "start": round(t, 3), "end": round(t + duration, 3)})
+        t += duration + rng.uniform(0.0, 0.2)
+
+    segments = []
+    for i in range(0, num_words, 12):
+        chunk = words[i:i + 12]
+        segments.append({"start": chunk[0]["start"], "end": chunk[-1]["end"], "text": " ".join(w["word"] for w in chunk)})
+
+    return diarization, {"segments": segments, "words": words}
+
+
+def reference_match(diarization_result, whisper_response, fill_nearest=False):
+    """최적화 이전의 전수 비교 구현 (결과 비교용)"""
+    segments = []
+    for seg in whisper_response.get("segments", []):
+        start_time, end_time = seg["start"], seg["end"]
+        intersections = [
+            {"speaker": d["speaker"], "intersection": max(0, min(d["end"], end_time) - max(d["start"], start_time))}
+            for d in diarization_result
+        ]
+        if intersections:
+            best = max(intersections, key=lambda x: x["intersection"])
+            speaker = best["speaker"] if best["intersection"] > 0 else "Unknown"
+        else:
+            speaker = "Unknown"
+        if speaker == "Unknown" and fill_nearest:
+            closest = min(diarization_result, key=lambda x: abs(x["start"] - start_time), default=None)
+            if closest:
+                speaker = closest["speaker"]
+
+        words = []
+        for word in whisper_response.get("words", []):
+            word_start, word_end = word.get("start"), word.get("end")
+            if word_start and word_end and start_time <= word_start <= end_time:
+                intersections = [
+                    {"speaker": d["speaker"], "intersection": max(0, min(d["end"], word_end) - max(d["start"], word_start))}
+                    for d in diarization_result
+                ]
+                if intersections:
+                    best = max(intersections, key=lambda x: x["intersection"])
+                    word_speaker = best["speaker"] if best["intersection"] > 0 else speaker
+                else:
+                    word_speaker = speaker
+                words.append({"word": word["word"], "start": word_start, "end": word_end, "speaker": word_speaker})
+
+        segments.append({"speaker": speaker, "start": start_time, "end": end_time, "text": seg["text"], "words": words})
+    return {"segments": segments}
+
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 20000, 40000, 80000])
+    parser.add_argument("--reference-max", type=int, default=2000, help="기존 구현과 비교할 최대 단어 수")
+    args = parser.parse_args()
+
+    print(f"{'words':>8} {'turns':>7} {'segments':>9} {'indexed (s)':>12} {'reference (s)':>14}")
+    for size in args.sizes:
+        diarization, whisper_response = make_synthetic_inputs(size)
+        for fill_nearest in (False, True):
+            result, elapsed = timed(match_speakers_with_transcription, diarization, whisper_response, fill_nearest=fill_nearest)
+            reference_elapsed = "-"
+            if size <= args.reference_max:
+                expected, reference_seconds = timed(reference_match, diarization, whisper_response, fill_nearest=fill_nearest)
+                assert result == expected, f"결과 불일치 (words={size}, fill_nearest={fill_nearest})"
+                reference_elapsed = f"{reference_seconds:.3f}"
+            if not fill_nearest:
+                print(f"{size:>8} {len(diarization):>7} {len(whisper_response['segments']):>9} {elapsed:>12.3f} {reference_elapsed:>14}")
+
+
+if __name__ == "__main__":
+    main()
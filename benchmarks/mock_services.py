@@ -0,0 +1,374 @@
+"""
+OpenAI(Whisper 전사, Chat Completions), DeepL, ElevenLabs API를 흉내 내는 로컬 서버 (벤치마크/테스트용)
+
+    $ python -m benchmarks.mock_services --port 8765 --latency-ms whisper=800 tts=300 --error-rate tts=0.05
+
+서버 하나가 모든 API 경로를 처리하므로 다음 환경 변수로 연결합니다.
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+    API_URL=http://127.0.0.1:8765/v2/translate          (DeepL)
+    ELEVENLABS_API_URL=http://127.0.0.1:8765
+
+- 서비스별 응답 지연(평균 ± jitter), 오류율(429/500 응답), 응답 크기(단어 밀도, 음성 길이)를 설정할 수 있음
+- GET /videos/<파일명>: `video_dir`의 파일을 Range 요청까지 지원해서 제공 (yt-dlp가 일반 URL로 다운로드)
+- GET /_stats: 서비스별 호출 수 / 오류 응답 수 / 주고받은 바이트 (JSON), POST /_reset: 통계 초기화
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import struct
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SERVICES = ("whisper", "chat", "deepl", "tts", "voices", "video")
+
+
+class ServiceBehavior:
+    """서비스 하나의 응답 지연(ms)과 오류율 (0~1)"""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+
+
+class MockSettings:
+    """
+    - whisper_words_per_second: 전사 결과에 넣는 단어 밀도 (응답 JSON 크기 결정)
+    - tts_seconds_per_char: 글자당 생성하는 음성 길이 (응답 오디오 크기 결정)
+    - chat_mode: "echo"(원본 자막 그대로 반환) | "broken"(블록 하나를 빼서 검증 실패/재시도 유도)
+    """
+
+    def __init__(self, behaviors=None, whisper_words_per_second=2.5, tts_seconds_per_char=0.06, chat_mode="echo", seed=0):
+        self.behaviors = {service: ServiceBehavior() for service in SERVICES}
+        self.behaviors.update(behaviors or {})
+        self.whisper_words_per_second = whisper_words_per_second
+        self.tts_seconds_per_char = tts_seconds_per_char
+        self.chat_mode = chat_mode
+        self.random = random.Random(seed)
+
+
+class MockServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/_stats":
+            return self._send_json(200, self.server.stats_snapshot(), record=None)
+        if path == "/v1/voices":
+            return self._handle("voices", self._voices)
+        if path.startswith("/videos/"):
+            return self._handle("video", lambda body: self._video(os.path.basename(path)))
+        self._send_json(404, {"error": "not found"}, record=None)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        if path == "/_reset":
+            self._read_body()
+            self.server.reset_stats()
+            return self._send_json(200, {"ok": True}, record=None)
+        routes = {
+            "/v1/audio/transcriptions": ("whisper", self._whisper),
+            "/v1/chat/completions": ("chat", self._chat),
+            "/v2/translate": ("deepl", self._deepl),
+        }
+        if path in routes:
+            return self._handle(*routes[path])
+        if path.startswith("/v1/text-to-speech/"):
+            return self._handle("tts", self._tts)
+        self._read_body()
+        self._send_json(404, {"error": "not found"}, record=None)
+
+    def log_message(self, format, *args):
+        pass
+
+    # ---------- 공통 처리 ----------
+
+    def _handle(self, service, handler):
+        body = self._read_body()
+        settings = self.server.settings
+        behavior = settings.behaviors[service]
+        self.server.record(service, bytes_in=len(body))
+
+        delay = max(0.0, behavior.latency_ms + settings.random.uniform(-behavior.jitter_ms, behavior.jitter_ms))
+        time.sleep(delay / 1000)
+
+        if settings.random.random() < behavior.error_rate:
+            status = settings.random.choice((429, 500))
+            return self._send_json(status, {"error": {"message": f"mock {service} error", "type": "server_error"}}, record=service, error=True)
+        handler(body)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status, data, content_type, record, error=False, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+        if record:
+            self.server.record(record, bytes_out=len(data), errors=int(error), calls=0)
+
+    def _send_json(self, status, payload, record, error=False):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json", record, error)
+
+    # ---------- 서비스별 응답 ----------
+
+    def _whisper(self, body):
+        """업로드한 Ogg(Opus) 길이만큼 일정 간격의 단어/segment가 있는 verbose_json 응답"""
+        duration = ogg_duration(body)
+        words_per_second = self.server.settings.whisper_words_per_second
+        words = []
+        word_count = int(duration * words_per_second)
+        for i in range(word_count):
+            start = i / words_per_second
+            words.append({"word": f"word{i}", "start": round(start, 3), "end": round(min(duration, start + 0.8 / words_per_second), 3)})
+
+        segments = []
+        for i in range(0, len(words), 12):
+            chunk = words[i:i + 12]
+            segments.append({
+                "id": len(segments), "seek": 0, "start": chunk[0]["start"], "end": chunk[-1]["end"],
+                "text": " " + " ".join(word["word"] for word in chunk), "tokens": [], "temperature": 0.0,
+                "avg_logprob": -0.2, "compression_ratio": 1.2, "no_speech_prob": 0.01,
+            })
+        text = " ".join(word["word"] for word in words)
+        self._send_json(200, {"task": "transcribe", "language": "korean", "duration": duration,
+                              "text": text, "segments": segments, "words": words}, record="whisper")
+
+    def _chat(self, body):
+        """프롬프트의 '원본 자막' 부분을 그대로 돌려줌 (chat_mode="broken"이면 첫 블록을 빼서 검증 실패 유도)"""
+        request = json.loads(body or b"{}")
+        prompt = request.get("messages", [{}])[-1].get("content", "")
+        match = re.search(r"-- 원본 자막 --\s*(.*?)\s*-- 변환된 자막 --", prompt, re.S)
+        content = match.group(1).strip() if match else prompt
+        if self.server.settings.chat_mode == "broken":
+            content = content.split("\n\n", 1)[-1]
+
+        prompt_tokens = max(1, len(prompt) // 4)
+        completion_tokens = max(1, len(content) // 4)
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion", "created": int(time.time()),
+            "model": request.get("model", "gpt-4o"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+        }, record="chat")
+
+    def _deepl(self, body):
+        form = parse_qs(body.decode("utf-8"))
+        target_lang = form.get("target_lang", ["EN"])[0]
+        source_lang = form.get("source_lang", ["KO"])[0]
+        translations = [{"detected_source_language": source_lang, "text": f"[{target_lang}] {text}"} for text in form.get("text", [])]
+        self._send_json(200, {"translations": translations}, record="deepl")
+
+    def _tts(self, body):
+        """요청 텍스트 길이에 비례하는 길이의 PCM(16bit mono) 음성 반환 (pcm_* 포맷만 지원)"""
+        query = parse_qs(urlparse(self.path).query)
+        output_format = query.get("output_format", ["mp3_44100_128"])[0]
+        if not output_format.startswith("pcm_"):
+            return self._send_json(422, {"detail": {"message": f"mock supports pcm output format only: {output_format}"}}, record="tts", error=True)
+
+        sample_rate = int(output_format.split("_")[1])
+        text = json.loads(body or b"{}").get("text", "")
+        samples = max(1, int(len(text) * self.server.settings.tts_seconds_per_char * sample_rate))
+        self._send(200, synthetic_speech(samples, sample_rate), "audio/pcm", record="tts",
+                   headers={"request-id": uuid.uuid4().hex})
+
+    def _voices(self, body):
+        voices = [{"voice_id": f"mockvoice{i:02}", "name": f"Mock Voice {i}"} for i in range(8)]
+        self._send_json(200, {"voices": voices}, record="voices")
+
+    def _video(self, name):
+        path = os.path.join(self.server.video_dir or "", name)
+        if not self.server.video_dir or not os.path.isfile(path):
+            return self._send_json(404, {"error": "not found"}, record="video", error=True)
+
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+        ranged = bool(match and (match.group(1) or match.group(2)))
+        if ranged:
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(0, size - int(match.group(2)))
+
+        content_type = "video/mp4" if name.endswith(".mp4") else "application/octet-stream"
+        self.send_response(206 if ranged else 200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        if ranged:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            try:
+                while remaining > 0:
+                    chunk = f.read(min(1 << 20, remaining))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+            except (BrokenPipeError, ConnectionResetError):
+                # ffmpeg가 필요한 구간만 읽고 연결을 끊는 경우
+                pass
+        self.server.record("video", bytes_out=end - start + 1 - remaining, calls=0)
+
+    def do_HEAD(self):
+        path = urlparse(self.path).path
+        if path.startswith("/videos/"):
+            return self._video(os.path.basename(path))
+        self.send_response(404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class MockServiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, settings=None, host="127.0.0.1", port=0, video_dir=None):
+        super().__init__((host, port), MockServiceHandler)
+        self.settings = settings or MockSettings()
+        self.video_dir = video_dir
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def environment(self):
+        """앱이 이 서버를 사용하도록 하는 환경 변수"""
+        return {
+            "OPENAI_BASE_URL": f"{self.url}/v1",
+            "OPEN_AI_TOKEN": "mock-openai-key",
+            "API_URL": f"{self.url}/v2/translate",
+            "DEEPL_API_KEY": "mock-deepl-key",
+            "ELEVENLABS_API_URL": self.url,
+            "ELEVENLABS_API_KEY": "mock-elevenlabs-key",
+        }
+
+    def record(self, service, calls=1, errors=0, bytes_in=0, bytes_out=0):
+        with self._stats_lock:
+            stats = self._stats[service]
+            stats["calls"] += calls
+            stats["errors"] += errors
+            stats["bytes_in"] += bytes_in
+            stats["bytes_out"] += bytes_out
+
+    def stats_snapshot(self):
+        with self._stats_lock:
+            return {service: dict(stats) for service, stats in self._stats.items()}
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {service: {"calls": 0, "errors": 0, "bytes_in": 0, "bytes_out": 0} for service in SERVICES}
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="mock-services", daemon=True).start()
+        return self
+
+
+def ogg_duration(data, sample_rate=48000):
+    """Ogg 스트림 마지막 페이지의 granule position으로 길이(초) 계산 (Opus는 48kHz 기준, pre-skip 차감)"""
+    last = data.rfind(b"OggS")
+    if last < 0 or last + 14 > len(data):
+        return 0.0
+    granule = struct.unpack_from("<q", data, last + 6)[0]
+    head = data.find(b"OpusHead")
+    pre_skip = struct.unpack_from("<H", data, head + 10)[0] if head >= 0 and head + 12 <= len(data) else 0
+    return max(0.0, (granule - pre_skip) / sample_rate)
+
+
+# sample_rate -> 1초 분량 PCM (모든 주파수가 정수 Hz라 1초 주기로 반복됨)
+_speech_periods = {}
+
+
+def synthetic_speech(samples, sample_rate):
+    """음성 대역 배음이 있는 int16 little-endian PCM (무음으로 잘리지 않도록 진폭 변조한 톤)"""
+    period = _speech_periods.get(sample_rate)
+    if period is None:
+        frequencies = (180, 360, 540, 900)
+        values = []
+        for n in range(sample_rate):
+            t = n / sample_rate
+            envelope = 0.6 + 0.4 * math.sin(2 * math.pi * 4 * t)
+            values.append(int(envelope * sum(math.sin(2 * math.pi * f * t) for f in frequencies) / len(frequencies) * 12000))
+        period = _speech_periods[sample_rate] = struct.pack(f"<{sample_rate}h", *values)
+    repeats = -(-samples * 2 // len(period))
+    return (period * repeats)[:samples * 2]
+
+
+def parse_service_values(items, cast=float):
+    """["whisper=800", "tts=300", "all=50"] → {서비스: 값}"""
+    values = {}
+    for item in items or []:
+        service, _, value = item.partition("=")
+        targets = SERVICES if service == "all" else (service,)
+        for target in targets:
+            if target not in SERVICES:
+                raise ValueError(f"알 수 없는 서비스: {service} (사용 가능: {', '.join(SERVICES)}, all)")
+            values[target] = cast(value)
+    return values
+
+
+def settings_from_args(args):
+    latency = parse_service_values(args.latency_ms)
+    jitter = parse_service_values(args.jitter_ms)
+    error_rate = parse_service_values(args.error_rate)
+    behaviors = {
+        service: ServiceBehavior(latency.get(service, 0.0), jitter.get(service, 0.0), error_rate.get(service, 0.0))
+        for service in SERVICES
+    }
+    return MockSettings(behaviors, args.whisper_words_per_second, args.tts_seconds_per_char, args.chat_mode, args.seed)
+
+
+def add_mock_arguments(parser):
+    group = parser.add_argument_group("mock services")
+    group.add_argument("--latency-ms", nargs="*", default=[], metavar="SERVICE=MS", help=f"서비스별 평균 응답 지연 ({', '.join(SERVICES)}, all)")
+    group.add_argument("--jitter-ms", nargs="*", default=[], metavar="SERVICE=MS", help="응답 지연 ± 범위")
+    group.add_argument("--error-rate", nargs="*", default=[], metavar="SERVICE=RATE", help="429/500 응답 비율 (0~1)")
+    group.add_argument("--whisper-words-per-second", type=float, default=2.5)
+    group.add_argument("--tts-seconds-per-char", type=float, default=0.06)
+    group.add_argument("--chat-mode", choices=("echo", "broken"), default="echo")
+    group.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--video-dir", default=None, help="/videos/ 경로로 제공할 디렉토리")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockServiceServer(settings_from_args(args), args.host, args.port, args.video_dir)
+    for key, value in server.environment().items():
+        print(f"{key}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
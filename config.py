@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,4 +8,50 @@ ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 DEEPL_API_KEY = os.getenv("DEEPL_API_KEY")
 DEEPL_API_URL = os.getenv("API_URL")
 HF_TOKEN = os.getenv("HUGGING_FACE_TOKEN")
-OPEN_AI_TOKEN = os.getenv("OPEN_AI_TOKEN")
\ No newline at end of file
+OPEN_AI_TOKEN = os.getenv("OPEN_AI_TOKEN")
+
+# ElevenLabs API 주소 (로컬 테스트 서버로 교체 가능)
+ELEVENLABS_API_URL = os.getenv("ELEVENLABS_API_URL", "https://api.elevenlabs.io")
+# 동시에 진행할 TTS 요청 수 (1이면 순차 처리)
+TTS_CONCURRENCY = int(os.getenv("TTS_CONCURRENCY", "4"))
+# TTS 오디오 캐시 최대 크기 (MB)
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "1024"))
+# TTS 출력 포맷 (PCM이면 디코딩 없이 바로 사용, 계정에서 지원하지 않으면 MP3로 대체)
+TTS_OUTPUT_FORMAT = os.getenv("TTS_OUTPUT_FORMAT", "pcm_44100")
+# 상주 모델 서버(pyannote, Demucs) 소켓 경로
+MODEL_SERVER_SOCKET = os.getenv("MODEL_SERVER_SOCKET", os.path.join(tempfile.gettempdir(), "voice-builder-models.sock"))
+# 작업(job)별 작업 공간 디스크 한도 (MB)
+JOB_QUOTA_MB = int(os.getenv("JOB_QUOTA_MB", "4096"))
+# 마지막 사용 후 이 시간이 지난 작업 공간은 정리 (시간)
+JOB_MAX_AGE_HOURS = float(os.getenv("JOB_MAX_AGE_HOURS", "24"))
+# Gradio에서 동시에 실행할 수 있는 작업 수
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "4"))
+# 단계별 산출물 캐시 보관 기간 (마지막 사용 기준, 시간)
+STAGE_CACHE_MAX_AGE_HOURS = float(os.getenv("STAGE_CACHE_MAX_AGE_HOURS", "168"))
+# 오디오 스트림을 먼저 받아 분석을 시작하고, 영상 스트림은 백그라운드로 다운로드 (0이면 합쳐진 mp4 하나를 받음)
+SPLIT_DOWNLOAD = os.getenv("SPLIT_DOWNLOAD", "1") == "1"
+# 보컬 분리 작업 프로세스 수 (CPU 전용 환경, 1이면 현재 프로세스에서 실행)
+SEPARATION_WORKERS = int(os.getenv("SEPARATION_WORKERS", "2"))
+# 보컬 분리 시 한 번에 처리하는 청크 길이 (초, 메모리 사용량 결정)
+SEPARATION_CHUNK_SECONDS = float(os.getenv("SEPARATION_CHUNK_SECONDS", "60"))
+# OpenAI API 주소 (비우면 기본 주소, 로컬 대체 서버로 테스트할 때 지정)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+# Whisper 업로드 청크 최대 길이 (초, 이 근처의 무음 구간에서 나눔)
+WHISPER_CHUNK_SECONDS = float(os.getenv("WHISPER_CHUNK_SECONDS", "600"))
+# Whisper 청크 동시 요청 수
+WHISPER_CONCURRENCY = int(os.getenv("WHISPER_CONCURRENCY", "4"))
+# GPT 자막 다듬기: 요청당 자막 블록 수 / 동시 요청 수
+REFINE_WINDOW_BLOCKS = int(os.getenv("REFINE_WINDOW_BLOCKS", "40"))
+REFINE_CONCURRENCY = int(os.getenv("REFINE_CONCURRENCY", "4"))
+# TTS 길이 조정 방식: "wsola"(프로세스 안에서 NumPy로 처리) | "rubberband"(FFmpeg 필터)
+TIME_STRETCH_ENGINE = os.getenv("TIME_STRETCH_ENGINE", "wsola")
+# WSOLA 작업 프로세스 수 (1이면 현재 프로세스에서 처리, 0이면 CPU 코어 수)
+TIME_STRETCH_WORKERS = int(os.getenv("TIME_STRETCH_WORKERS", "1"))
+# 보이스 목록 캐시 갱신 주기 (시간, 지나면 UI 시작 시 백그라운드에서 다시 받음)
+VOICE_CATALOG_TTL_HOURS = float(os.getenv("VOICE_CATALOG_TTL_HOURS", "24"))
+# 보이스 목록 파일 직접 지정 (테스트용, 지정하면 API를 호출하지 않음)
+VOICE_CATALOG_FILE = os.getenv("VOICE_CATALOG_FILE") or None
+# 모든 작업의 실행 기록(span)을 한 줄씩 추가할 JSONL 파일 (비우면 작업 공간의 trace.jsonl에만 기록)
+TRACE_LOG_FILE = os.getenv("TRACE_LOG_FILE") or None
+# Prometheus 메트릭 서버 포트 (/metrics, 0이면 실행하지 않음)
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
\ No newline at end of file
@@ -1,83 +1,141 @@
-from video_processing.downloader import download_youtube_video, extract_whisper_prompt_from_youtube
-from video_processing.trimmer import trim_video
-from video_processing.audio_extractor import extract_audio_from_video, audio_preprocessing
+from video_processing.downloader import fetch_video_metadata, download_video_section, extract_whisper_prompt_from_youtube, prune_video_cache, AUDIO_ONLY_FORMAT, VIDEO_ONLY_FORMAT
+from video_processing.trimmer import trim_video, time_to_seconds
+from video_processing.media import prepare_media
 from video_processing.vocal_separation import separate_background_audio
 from video_processing.transcription import transcribe_audio_whisper, refine_srt_with_gpt
 from video_processing.srt_utils import create_srt
+from video_processing.vad import detect_speech_regions
+from video_processing.subtitles import SubtitleDocument
 from video_processing.translation import translate_srt
-from video_processing.tts import generate_tts_with_timestamps, extract_speech_with_elevenlabs
-from video_processing.merging import merge_audio_with_video, merge_background_with_tts
+from video_processing.tts import render_tts_timeline, extract_speech_with_elevenlabs
+from video_processing.merging import mux_dub_with_video
 from video_processing.file_manager import get_file_path
+from video_processing.job import Job, collect_garbage
+from video_processing.pipeline import Pipeline, Stage, prune_stage_store
+from config import SPLIT_DOWNLOAD
 
-def process_video(video_url, source_lang, target_lang, num_speakers, speaker_voice_map, start_time="00:00:00", end_time="00:00:30"):
-    # 1. 영상 다운로드
-    print("📥 1. 유튜브 영상 다운로드 중...")
-    video_file = download_youtube_video(video_url)
-    whisper_prompt = extract_whisper_prompt_from_youtube(video_url)
-
-    # 2. 영상 자르기
-    print("2. FFmpeg로 영상 자르기...")
-    trimmed_video = trim_video(video_file, start_time, end_time)
-    
-    # 3. 오디오 추출
-    print("🎙️ 3. 오디오 추출 중...")
-    audio_file = extract_audio_from_video(trimmed_video)
-    
-    # 4. 보컬(배경음) 분리
-    print("🎚️ 4. Demucs로 보컬 분리 중...")
-    separate_background_audio(audio_file)
-    
-    # 5. 16kHz, Mono 변환
-    print("🎚️ 5. 16kHz, Mono 변환 중...")
-    preprocessed_audio_file = audio_preprocessing(audio_file)
-
-    # 6. 음성 → 텍스트 변환 (Whisper)
-    print("📝 6. 음성 → 텍스트 변환 중...")
-    transcription = transcribe_audio_whisper(preprocessed_audio_file, whisper_prompt, num_speakers)
-
-    # 7. Whisper json -> .srt 파일 변환
-    print("📝 7. Whisper json -> .srt 파일 변환...")
-    srt_path = create_srt(transcription)
-    
-    # 8. GPT로 자막 다듬기
-    print("🤖 8. GPT로 자막 다듬기...")
-    refine_srt_with_gpt(srt_path, get_file_path("transcription_refined.srt"))
-
-    # 9. SRT 번역 (예: source_lang → target_lang)
-    print(f"🌍 9. 번역 중... (언어: {target_lang})")
-    translated_srt = translate_srt(get_file_path("transcription_refined.srt"), get_file_path("translated.srt"), source_lang, target_lang)
-    
-    # 10. 타임스탬프 기반 TTS 생성
-    print("🔊 10. 타임스탬프 기반 TTS 생성 중...")
-    tts_audio = generate_tts_with_timestamps(translated_srt, speaker_voice_map)
-    
-    # 11. 배경음과 TTS 합성
-    print("🎵 11. background audio 합치는 중...")
-    merge_background_with_tts(tts_audio)
-    
-    # 12. 최종 영상과 음성 병합
-    print("🎬 12. 새로운 음성을 원본 영상에 합치기...")
-    final_video = merge_audio_with_video(trimmed_video, tts_audio)
-    
-    print("✅ 최종 파일 생성:", final_video)
-    return final_video
+def process_video(video_url, source_lang, target_lang, num_speakers, speaker_voice_map, start_time="00:00:00", end_time="00:00:30", job=None, split_download=SPLIT_DOWNLOAD):
+    # 작업별로 독립된 작업 공간 사용 (동시에 여러 작업을 실행해도 파일이 겹치지 않음)
+    job = job or Job()
+    collect_garbage(keep=[job])
+    prune_stage_store()
+    prune_video_cache()
+    print(f"🗂️ 작업 공간: {job.workspace}")
+
+    # 입력/설정이 바뀌지 않은 단계는 이전 결과를 재사용 (예: target_lang만 바꾸면 9번 단계부터 실행)
+    stages = build_dubbing_stages(video_url, source_lang, target_lang, num_speakers, start_time, end_time, split_download)
+    stages += build_redub_stages(speaker_voice_map, first_step=10)
+    final_video = Pipeline(stages, name="process_video").run(job)["final_video"]
 
-def regenerate_video_from_srt(speaker_voice_map):
-    # 7. 타임스탬프 기반 TTS 생성
-    print("🔊 7. 타임스탬프 기반 TTS 생성 중...")
-    tts_audio = generate_tts_with_timestamps(get_file_path("translated.srt"), speaker_voice_map)
+    # 원본/번역 자막을 하나의 자막 문서로 저장 (UI 편집은 이 문서에 기록)
+    SubtitleDocument.from_srt_files(get_file_path("transcription_refined.srt", job), get_file_path("translated.srt", job), job).save()
 
-    # 8. 배경음과 TTS 합성
-    print("🎵 8. background audio 합치는 중...")
-    merge_background_with_tts(tts_audio)
+    print("✅ 최종 파일 생성:", final_video)
+    return final_video
 
-    # 9. 최종 영상과 음성 병합
-    print("🎬 9. 새로운 음성을 원본 영상에 합치기...")
-    final_video = merge_audio_with_video(get_file_path("trimmed_video.mp4"), tts_audio)
+def regenerate_video_from_srt(speaker_voice_map, job):
+    # process_video에서 사용한 작업 공간의 수정된 자막으로 다시 생성 (자막 문서 → SRT 내보내기)
+    SubtitleDocument.open(job).export_job_srt_files()
+    artifacts = {
+        "translated_srt": get_file_path("translated.srt", job),
+        "trimmed_video": get_file_path("trimmed_video.mp4", job),
+        "background_audio": get_file_path("background_audio.wav", job),
+    }
+    final_video = Pipeline(build_redub_stages(speaker_voice_map, first_step=7), name="regenerate_video").run(job, artifacts)["final_video"]
 
     print("✅ 최종 파일 생성:", final_video)
     return final_video
 
+def build_dubbing_stages(video_url, source_lang, target_lang, num_speakers, start_time, end_time, split_download=SPLIT_DOWNLOAD):
+    """
+    영상 다운로드 ~ 번역까지의 단계 (1 ~ 9)
+    - split_download: 오디오 스트림만 먼저 받아 분석 단계를 시작하고, 영상 스트림은 백그라운드로 받아 마지막 병합 단계에서 사용
+    """
+    section = {"video_url": video_url, "start_time": start_time, "end_time": end_time}
+    stages = [
+        Stage("video_info", _video_info_stage, params={"video_url": video_url},
+              outputs={"video_info": "value"}, description="📥 1. 유튜브 메타데이터 가져오는 중..."),
+        Stage("whisper_prompt", _whisper_prompt_stage, inputs={"video_info": "video_info"}, params={"video_url": video_url},
+              outputs={"whisper_prompt": "value"}, description="📥 1. 유튜브 메타데이터로 Whisper 프롬프트 생성 중..."),
+    ]
+
+    if split_download:
+        stages += [
+            Stage("download_video", download_video_section, inputs={"video_info": "video_info"},
+                  params={**section, "video_format": VIDEO_ONLY_FORMAT}, outputs={"video_file": "file", "section_start": "value"},
+                  description="📥 1. 유튜브 영상 스트림 다운로드 중..."),
+            Stage("trim", trim_video, inputs={"input_file": "video_file", "offset": "section_start"}, params={"start_time": start_time, "end_time": end_time},
+                  outputs={"trimmed_video": "file"}, version=2, description="2. FFmpeg로 영상 자르기..."),
+            # 오디오 스트림은 재인코딩 없이 복사하고, 어떤 코덱이든 담을 수 있도록 .mka로 저장
+            # (정확한 구간은 media 단계에서 audio_section_start 기준으로 잘라서 WAV로 변환)
+            Stage("download_audio", download_video_section, inputs={"video_info": "video_info"},
+                  params={**section, "video_format": AUDIO_ONLY_FORMAT, "filename": "downloaded_audio.mka"},
+                  outputs={"audio_source": "file", "audio_section_start": "value"}, description="📥 1. 유튜브 오디오 스트림 다운로드 중..."),
+            Stage("media", _media_stage, inputs={"input_file": "audio_source", "offset": "audio_section_start"},
+                  params={"start_time": start_time, "end_time": end_time, "include_video": False},
+                  outputs={"audio_file": "file", "preprocessed_audio": "file"}, description="🎙️ 2~5. 오디오 구간 추출 및 16kHz, Mono 변환 중..."),
+        ]
+    else:
+        stages += [
+            Stage("download", download_video_section, inputs={"video_info": "video_info"}, params=section,
+                  outputs={"video_file": "file", "section_start": "value"}, version=2, description="📥 1. 유튜브 영상 구간 다운로드 중..."),
+            # 영상 자르기, 보컬 분리용 WAV, 16kHz Mono WAV를 ffmpeg 한 번으로 생성
+            Stage("media", _media_stage, inputs={"input_file": "video_file", "offset": "section_start"},
+                  params={"start_time": start_time, "end_time": end_time, "include_video": True},
+                  outputs={"trimmed_video": "file", "audio_file": "file", "preprocessed_audio": "file"},
+                  description="✂️ 2~5. 영상 자르기, 오디오 추출, 16kHz Mono 변환 중..."),
+        ]
+
+    return stages + [
+        # 보컬 분리는 스레드 단계로 두고 병렬 처리는 separate_background_audio의 청크 작업 프로세스(SEPARATION_WORKERS)가 맡음
+        # (process 단계로 두면 작업 프로세스 안에서 청크 풀을 또 만들어 모델이 중복 로드되고 CPU를 과하게 나눠 씀)
+        Stage("separate", separate_background_audio, inputs={"input_file": "audio_file"},
+              outputs={"background_audio": "file"}, description="🎚️ 4. Demucs로 보컬 분리 중..."),
+        Stage("vad", _vad_stage, inputs={"audio_file": "preprocessed_audio"},
+              outputs={"speech_regions": "value"}, description="🔇 5. 음성 구간 검출 중..."),
+        Stage("transcribe", transcribe_audio_whisper,
+              inputs={"audio_file": "preprocessed_audio", "whisper_prompt": "whisper_prompt", "speech_regions": "speech_regions"},
+              params={"num_speakers": num_speakers}, outputs={"transcription": "value"}, description="📝 6. 음성 → 텍스트 변환 중..."),
+        Stage("create_srt", create_srt, inputs={"transcription": "transcription"},
+              outputs={"srt": "file"}, description="📝 7. Whisper json -> .srt 파일 변환..."),
+        Stage("refine", _refine_stage, inputs={"srt_file_path": "srt"},
+              outputs={"refined_srt": "file"}, description="🤖 8. GPT로 자막 다듬기..."),
+        Stage("translate", _translate_stage, inputs={"input_srt": "refined_srt"}, params={"source_lang": source_lang, "target_lang": target_lang},
+              outputs={"translated_srt": "file"}, description=f"🌍 9. 번역 중... (언어: {target_lang})"),
+    ]
+
+def build_redub_stages(speaker_voice_map, first_step):
+    """번역된 자막 → TTS 타임라인(PCM) → 배경음과 혼합하며 영상 병합 단계"""
+    return [
+        Stage("tts", render_tts_timeline, inputs={"srt_file": "translated_srt"}, params={"speaker_voice_id_list": speaker_voice_map},
+              outputs={"tts_timeline": "file", "tts_sample_rate": "value", "tts_frames": "value"}, version=3,
+              description=f"🔊 {first_step}. 타임스탬프 기반 TTS 생성 중..."),
+        Stage("mux", mux_dub_with_video,
+              inputs={"original_video": "trimmed_video", "tts_timeline": "tts_timeline", "background_audio": "background_audio",
+                      "tts_sample_rate": "tts_sample_rate", "tts_frames": "tts_frames"},
+              outputs={"final_video": "file"}, version=3,
+              description=f"🎬 {first_step + 1}. TTS와 background audio를 합쳐 원본 영상에 병합..."),
+    ]
+
+def _video_info_stage(video_url, job):
+    return fetch_video_metadata(video_url)
+
+def _media_stage(input_file, offset, start_time, end_time, include_video, job):
+    return prepare_media(input_file, time_to_seconds(start_time), time_to_seconds(end_time), offset, job, include_video)
+
+def _vad_stage(audio_file, job):
+    return detect_speech_regions(audio_file)
+
+def _whisper_prompt_stage(video_url, video_info, job):
+    # 다운로드 단계와 같은 메타데이터를 사용 (YoutubeDL 세션을 다시 열지 않음)
+    return extract_whisper_prompt_from_youtube(video_url, video_info)
+
+def _refine_stage(srt_file_path, job):
+    return refine_srt_with_gpt(srt_file_path, get_file_path("transcription_refined.srt", job))
+
+def _translate_stage(input_srt, source_lang, target_lang, job):
+    return translate_srt(input_srt, get_file_path("translated.srt", job), source_lang, target_lang)
+
 
 if __name__ == "__main__":
     video_url = "https://www.youtube.com/watch?v=A-ObLLp6GYc"  # 로컬 파일 경로 또는 다운로드 URL
@@ -92,6 +150,7 @@ if __name__ == "__main__":
     start_time = "00:00:00"
     end_time = "00:00:30"
     num_speakers = 3; # 화자 몇명인지
+    job = Job()  # 재생성 시에는 Job("<이전 job_id>")로 기존 작업 공간 지정
 
-    # regenerate_video_from_srt(speaker_voice_map)
-    process_video(video_url, source_lang, target_lang, num_speakers, speaker_voice_map, start_time, end_time)
\ No newline at end of file
+    # regenerate_video_from_srt(speaker_voice_map, job)
+    process_video(video_url, source_lang, target_lang, num_speakers, speaker_voice_map, start_time, end_time, job)
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""
+테스트 공통 설정
+- 다운로드/작업 공간은 임시 디렉토리를 사용 (config, file_manager import 전에 지정), 공유 캐시는 테스트마다 새로 만듦
+- 외부 API는 benchmarks/mock_services.py의 로컬 서버로 대체
+"""
+import os
+import tempfile
+
+os.environ["DOWNLOAD_DIR"] = tempfile.mkdtemp(prefix="voice-builder-test-")
+
+import pytest
+from benchmarks.mock_services import MockServiceServer, MockSettings
+from video_processing import file_manager
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """작업 간 공유 캐시(영상 구간, 단계 산출물 등)를 테스트마다 비움"""
+    monkeypatch.setattr(file_manager, "CACHE_DIR", str(tmp_path / "cache"))
+
+@pytest.fixture
+def mock_services(tmp_path):
+    """OpenAI/DeepL/ElevenLabs/영상 파일을 흉내 내는 로컬 서버 (/videos/는 tmp_path/videos 제공)"""
+    video_dir = tmp_path / "videos"
+    video_dir.mkdir()
+    server = MockServiceServer(MockSettings(), video_dir=str(video_dir)).start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,59 @@
+import os
+import shutil
+import subprocess
+import pytest
+
+pytest.importorskip("yt_dlp")
+if not (shutil.which("ffmpeg") and shutil.which("ffprobe")):
+    pytest.skip("ffmpeg/ffprobe가 필요합니다", allow_module_level=True)
+
+from video_processing import downloader
+from video_processing.job import Job
+
+FPS = 10
+# 2초마다 키프레임
+GOP_SECONDS = 2
+FRAME_SIZE = 64 * 64
+
+@pytest.fixture
+def sample_video(mock_services):
+    """프레임 밝기에 프레임 번호를 기록한 12초 영상을 대체 서버의 /videos/로 제공하고 URL 반환"""
+    path = os.path.join(mock_services.video_dir, "sample.mp4")
+    subprocess.run([
+        "ffmpeg", "-v", "error", "-y",
+        "-f", "lavfi", "-i", f"color=black:s=64x64:r={FPS}:d=12,geq=lum='16+N*1.6':cb=128:cr=128",
+        "-f", "lavfi", "-i", "sine=f=440:d=12",
+        "-c:v", "libx264", "-g", str(FPS * GOP_SECONDS), "-keyint_min", str(FPS * GOP_SECONDS), "-sc_threshold", "0",
+        "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", path,
+    ], check=True)
+    return f"{mock_services.url}/videos/sample.mp4"
+
+def frame_number_at(path, seconds):
+    """path의 seconds초 지점 프레임에 기록된 원본 프레임 번호"""
+    result = subprocess.run(
+        ["ffmpeg", "-v", "error", "-ss", str(seconds), "-i", path, "-frames:v", "1", "-f", "rawvideo", "-pix_fmt", "gray", "-"],
+        stdout=subprocess.PIPE, check=True,
+    )
+    frame = result.stdout[:FRAME_SIZE]
+    # 제한 범위(16~235) → 전체 범위 변환 후 1.6 간격
+    return round(sum(frame) / len(frame) / (1.6 * 255 / 219))
+
+@pytest.mark.parametrize("filename", ["section.mp4", "section.mka"])
+@pytest.mark.parametrize("start_time, keyframe", [("00:00:05", 2.0), ("00:00:06", 4.0)])
+def test_section_start_matches_copied_stream(sample_video, tmp_path, filename, start_time, keyframe):
+    # 구간 시작(요청 - 2초 여유)이 키프레임 사이(3초)일 때와 키프레임 위(4초)일 때
+    info = downloader.get_video_info(sample_video)
+
+    result = downloader.download_video_section(sample_video, info, start_time, "00:00:09", filename=filename,
+                                               job=Job(root=str(tmp_path / "jobs")), video_format="best")
+
+    # 스트림 복사이므로 직전 키프레임(오디오 priming 만큼 더 앞)부터 시작
+    assert keyframe - 0.3 <= result["section_start"] <= keyframe
+    source_seconds = downloader.time_to_seconds(start_time)
+    assert frame_number_at(result["video_file"], source_seconds - result["section_start"]) == source_seconds * FPS
+
+def test_video_info_is_not_shared_between_downloads(sample_video):
+    first = downloader.get_video_info(sample_video)
+    first["formats"] = "processed"
+
+    assert downloader.get_video_info(sample_video).get("formats") != "processed"
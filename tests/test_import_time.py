@@ -0,0 +1,37 @@
+import sys
+import types
+import pytest
+from benchmarks.bench_import_time import DEFAULT_BUDGET_MS, DEFAULT_TARGETS, measure_import
+from video_processing.lazy import LazyModule
+
+@pytest.mark.parametrize("target", DEFAULT_TARGETS)
+def test_cold_import_stays_within_budget(target):
+    # 새 프로세스에서 `python -X importtime`으로 측정 (첫 측정은 .pyc 생성 비용이 섞이므로 두 번째 값 사용)
+    measure_import(target)
+    elapsed_ms, loaded = measure_import(target)
+
+    assert loaded == [], f"{target} import 시 무거운 의존성 로드: {loaded}"
+    assert elapsed_ms <= DEFAULT_BUDGET_MS, f"{target} import {elapsed_ms:.1f}ms > {DEFAULT_BUDGET_MS}ms"
+
+@pytest.fixture
+def fake_module(monkeypatch):
+    module = types.ModuleType("lazy_test_module")
+    module.value = 1
+    module.__getattr__ = lambda name: f"dynamic:{name}"
+    monkeypatch.setitem(sys.modules, "lazy_test_module", module)
+    return module
+
+def test_lazy_module_imports_on_first_access(fake_module):
+    proxy = LazyModule("lazy_test_module")
+    assert proxy._module is None
+    assert proxy.value == 1
+    assert proxy._module is fake_module
+
+def test_lazy_module_delegates_after_load(fake_module):
+    proxy = LazyModule("lazy_test_module")
+    assert proxy.value == 1
+
+    # 불러온 뒤에 바뀐 속성과 모듈 수준 __getattr__도 실제 모듈에서 조회
+    fake_module.value = 2
+    assert proxy.value == 2
+    assert proxy.submodule == "dynamic:submodule"
@@ -0,0 +1,46 @@
+import shutil
+import subprocess
+import wave
+import numpy as np
+import pytest
+from video_processing import merging
+
+SAMPLE_RATE = 16000
+
+pytestmark = pytest.mark.skipif(not shutil.which("ffmpeg"), reason="ffmpeg가 필요합니다")
+
+@pytest.fixture
+def dub_inputs(tmp_path):
+    """5초 영상, 1초 음성 뒤 0.5초 여유가 있는 TTS 타임라인, 3초 배경음"""
+    video = tmp_path / "video.mp4"
+    subprocess.run(["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "color=black:s=64x64:r=10:d=5",
+                    "-c:v", "libx264", "-pix_fmt", "yuv420p", str(video)], check=True)
+    timeline = np.zeros((int(1.5 * SAMPLE_RATE), 1), dtype=np.int16)
+    timeline[:SAMPLE_RATE] = 3000
+    np.save(tmp_path / "tts_timeline.npy", timeline)
+    background = tmp_path / "background.wav"
+    with wave.open(str(background), "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(np.full((3 * SAMPLE_RATE, 2), 1000, dtype=np.int16).tobytes())
+    return str(video), str(tmp_path / "tts_timeline.npy"), str(background)
+
+def audio_seconds(path):
+    result = subprocess.run(["ffmpeg", "-v", "error", "-i", path, "-map", "0:a:0", "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"],
+                            stdout=subprocess.PIPE, check=True)
+    return len(result.stdout) / 2 / SAMPLE_RATE
+
+def test_background_is_cut_to_tts_length(dub_inputs, tmp_path):
+    video, timeline, background = dub_inputs
+
+    output = merging.mux_dub_with_video(video, timeline, background, SAMPLE_RATE, tts_frames=SAMPLE_RATE, filename=str(tmp_path / "dub.mp4"))
+
+    assert audio_seconds(output) == pytest.approx(1.0, abs=0.05)
+
+def test_longest_keeps_the_background(dub_inputs, tmp_path):
+    video, timeline, background = dub_inputs
+
+    output = merging.mux_dub_with_video(video, timeline, background, SAMPLE_RATE, tts_frames=SAMPLE_RATE, filename=str(tmp_path / "dub.mp4"), length="longest")
+
+    assert audio_seconds(output) == pytest.approx(3.0, abs=0.05)
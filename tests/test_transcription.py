@@ -0,0 +1,81 @@
+import shutil
+import wave
+import numpy as np
+import pytest
+from video_processing import transcription
+
+SAMPLE_RATE = 16000
+
+def write_wav(path, duration, silences=()):
+    """440Hz 톤에 [(시작 초, 끝 초)] 구간만 무음인 16kHz Mono WAV"""
+    t = np.arange(int(duration * SAMPLE_RATE)) / SAMPLE_RATE
+    samples = (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16)
+    for start, end in silences:
+        samples[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)] = 0
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(samples.tobytes())
+    return str(path)
+
+def test_short_audio_is_one_chunk(tmp_path):
+    audio_file = write_wav(tmp_path / "short.wav", 4.0)
+
+    assert transcription.plan_audio_chunks(audio_file, chunk_seconds=10) == [(0.0, 4.0)]
+
+def test_chunks_are_cut_in_silence_and_cover_the_audio(tmp_path):
+    silences = [(8.2, 8.8), (16.0, 16.6)]
+    audio_file = write_wav(tmp_path / "long.wav", 25.0, silences)
+
+    chunks = transcription.plan_audio_chunks(audio_file, chunk_seconds=10, search_seconds=3)
+
+    assert len(chunks) == 3
+    # 청크는 빈틈 없이 이어지고 전체 길이를 덮음
+    assert chunks[0][0] == 0
+    for (start, length), (next_start, _) in zip(chunks, chunks[1:]):
+        assert start + length == pytest.approx(next_start)
+    assert chunks[-1][0] + chunks[-1][1] == pytest.approx(25.0)
+    # 경계는 탐색 범위 안의 무음 구간에 있고, 청크 길이는 chunk_seconds 이하
+    for (start, _), (silence_start, silence_end) in zip(chunks[1:], silences):
+        assert silence_start <= start <= silence_end
+    assert all(length <= 10 for _, length in chunks)
+
+def test_stitch_shifts_timestamps_and_renumbers_segments():
+    first = {"language": "korean", "text": " 안녕 ", "duration": 9.0,
+             "segments": [{"id": 0, "start": 0.5, "end": 2.0, "text": "안녕"}],
+             "words": [{"word": "안녕", "start": 0.5, "end": 2.0}]}
+    second = {"language": "korean", "text": "반가워", "duration": 5.0,
+              "segments": [{"id": 0, "start": 0.0, "end": 1.5, "text": "반가"}, {"id": 1, "start": 1.5, "end": 3.0, "text": "워"}],
+              "words": [{"word": "반가워", "start": 0.0, "end": 3.0}]}
+
+    stitched = transcription.stitch_transcriptions([(0.0, first), (8.6, second)])
+
+    assert stitched["text"] == "안녕 반가워"
+    assert stitched["language"] == "korean"
+    assert stitched["duration"] == pytest.approx(13.6)
+    assert [segment["id"] for segment in stitched["segments"]] == [0, 1, 2]
+    assert [(segment["start"], segment["end"]) for segment in stitched["segments"]] == [
+        (0.5, 2.0), pytest.approx((8.6, 10.1)), pytest.approx((10.1, 11.6))]
+    assert [word["start"] for word in stitched["words"]] == [0.5, pytest.approx(8.6)]
+
+def test_single_chunk_response_is_returned_unchanged():
+    response = {"text": "하나", "segments": [], "words": []}
+
+    assert transcription.stitch_transcriptions([(0, response)]) is response
+
+@pytest.mark.skipif(not shutil.which("ffmpeg"), reason="ffmpeg가 필요합니다")
+def test_chunked_transcription_against_local_whisper(mock_services, monkeypatch, tmp_path):
+    pytest.importorskip("openai")
+    monkeypatch.setattr(transcription, "OPENAI_BASE_URL", f"{mock_services.url}/v1")
+    monkeypatch.setattr(transcription, "OPEN_AI_TOKEN", "mock-openai-key")
+    audio_file = write_wav(tmp_path / "speech.wav", 25.0, [(8.2, 8.8), (16.0, 16.6)])
+
+    result = transcription.transcribe_in_chunks(audio_file, "", chunk_seconds=10, concurrency=3)
+
+    assert mock_services.stats_snapshot()["whisper"]["calls"] == 3
+    assert result["duration"] == pytest.approx(25.0, abs=0.1)
+    starts = [word["start"] for word in result["words"]]
+    assert starts == sorted(starts)
+    assert starts[-1] > 16.0
+    assert [segment["id"] for segment in result["segments"]] == list(range(len(result["segments"])))
@@ -0,0 +1,84 @@
+import os
+import pytest
+from benchmarks.mock_services import ServiceBehavior
+from video_processing import tts
+from video_processing.cache import BlobCache
+from video_processing.job import Job
+
+SAMPLE_RATE = 16000
+
+@pytest.fixture
+def elevenlabs(mock_services, monkeypatch, tmp_path):
+    """ElevenLabs 요청을 로컬 서버로 보내고, 테스트마다 빈 TTS 캐시 사용"""
+    monkeypatch.setattr(tts, "ELEVENLABS_API_URL", mock_services.url)
+    monkeypatch.setattr(tts, "TTS_OUTPUT_FORMAT", f"pcm_{SAMPLE_RATE}")
+    monkeypatch.setattr(tts, "_pcm_rejected", False)
+    cache = BlobCache(str(tmp_path / "tts"), 64 * 1024 * 1024)
+    monkeypatch.setattr(tts, "_tts_cache", cache)
+    return mock_services, cache
+
+def make_subtitles(count):
+    # 텍스트 길이가 모두 달라서 음성 길이로 어느 자막의 결과인지 구분 가능
+    return [{"speaker": f"SPEAKER_0{i % 3}", "text": "가" * (i + 1)} for i in range(count)]
+
+def expected_samples(server, text):
+    return int(len(text) * server.settings.tts_seconds_per_char * SAMPLE_RATE)
+
+def test_concurrent_synthesis_keeps_subtitle_order(elevenlabs):
+    server, cache = elevenlabs
+    # 응답 지연을 들쭉날쭉하게 해서 완료 순서가 요청 순서와 달라지게 함
+    server.settings.behaviors["tts"] = ServiceBehavior(latency_ms=20, jitter_ms=20)
+    subtitles = make_subtitles(12)
+
+    clips = tts.synthesize_subtitles(subtitles, ["voice"] * len(subtitles), concurrency=4, cache=cache, sample_rate=SAMPLE_RATE)
+
+    assert [len(clip) for clip in clips] == [expected_samples(server, subtitle["text"]) for subtitle in subtitles]
+    assert server.stats_snapshot()["tts"]["calls"] == len(subtitles)
+
+def test_duplicate_lines_are_requested_once(elevenlabs):
+    server, cache = elevenlabs
+    subtitles = [{"speaker": "SPEAKER_00", "text": "안녕하세요"}, {"speaker": "SPEAKER_01", "text": "안녕하세요"}]
+
+    clips = tts.synthesize_subtitles(subtitles, ["voice", "voice"], concurrency=4, cache=cache, sample_rate=SAMPLE_RATE)
+
+    assert clips[0] is clips[1]
+    assert server.stats_snapshot()["tts"]["calls"] == 1
+
+def test_failed_requests_are_reported_per_line(elevenlabs):
+    server, cache = elevenlabs
+    server.settings.behaviors["tts"] = ServiceBehavior(error_rate=1.0)
+    subtitles = make_subtitles(6)
+
+    clips = tts.synthesize_subtitles(subtitles, ["voice"] * len(subtitles), concurrency=3, cache=cache, sample_rate=SAMPLE_RATE)
+
+    assert clips == [None] * len(subtitles)
+    assert server.stats_snapshot()["tts"]["errors"] == len(subtitles)
+    # 실패한 응답은 캐시에 저장하지 않음
+    assert cache.stats()["entries"] == 0
+
+def write_srt(path, texts):
+    with open(path, "w", encoding="utf-8") as f:
+        for i, text in enumerate(texts):
+            f.write(f"{i + 1}\n00:00:0{i},000 --> 00:00:0{i},900\nSPEAKER_0{i % 2}\n{text}\n\n")
+    return str(path)
+
+def test_render_writes_timeline_and_state(elevenlabs, tmp_path):
+    job = Job(root=str(tmp_path / "jobs"))
+    srt_file = write_srt(tmp_path / "dub.srt", ["하나", "둘", "셋"])
+
+    rendered = tts.render_tts_timeline(srt_file, ["voice"], job=job)
+
+    assert rendered["tts_sample_rate"] == SAMPLE_RATE
+    assert os.path.exists(rendered["tts_timeline"])
+    assert os.path.exists(job.path(tts.RENDER_STATE_FILENAME))
+
+def test_render_fails_when_a_line_cannot_be_synthesized(elevenlabs, tmp_path):
+    server, _ = elevenlabs
+    server.settings.behaviors["tts"] = ServiceBehavior(error_rate=1.0)
+    job = Job(root=str(tmp_path / "jobs"))
+    srt_file = write_srt(tmp_path / "dub.srt", ["하나", "둘", "셋"])
+
+    with pytest.raises(RuntimeError, match="TTS 음성 생성 실패"):
+        tts.render_tts_timeline(srt_file, ["voice"], job=job)
+    # 빠진 자막이 있는 렌더 상태는 저장하지 않음
+    assert not os.path.exists(job.path(tts.RENDER_STATE_FILENAME))
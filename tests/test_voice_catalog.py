@@ -0,0 +1,54 @@
+import json
+import time
+import pytest
+from benchmarks.mock_services import ServiceBehavior
+from video_processing import voice_catalog
+
+@pytest.fixture
+def elevenlabs(mock_services, monkeypatch):
+    monkeypatch.setattr(voice_catalog, "ELEVENLABS_API_URL", mock_services.url)
+    monkeypatch.setattr(voice_catalog, "_refresh_thread", None)
+    monkeypatch.setattr(voice_catalog, "_last_failure", 0)
+    return mock_services
+
+def write_catalog(path, voices, age_hours):
+    path.write_text(json.dumps({"fetched_at": time.time() - age_hours * 3600, "voices": voices}), encoding="utf-8")
+    return str(path)
+
+def test_injected_catalog_is_used_even_when_expired(elevenlabs, monkeypatch, tmp_path):
+    catalog_file = write_catalog(tmp_path / "voices.json", {"voice1": "Injected"}, age_hours=24 * 365)
+    monkeypatch.setattr(voice_catalog, "VOICE_CATALOG_FILE", catalog_file)
+
+    assert voice_catalog.load_voice_catalog() == {"voice1": "Injected"}
+    assert not voice_catalog.is_catalog_stale(ttl_hours=1)
+    # 주입한 파일은 갱신하지 않으므로 API를 호출하지 않음
+    assert voice_catalog.refresh_voice_catalog_in_background() is None
+    assert elevenlabs.stats_snapshot()["voices"]["calls"] == 0
+
+def test_expired_cache_is_served_then_refreshed_in_background(elevenlabs, monkeypatch):
+    monkeypatch.setattr(voice_catalog, "VOICE_CATALOG_FILE", None)
+    with open(voice_catalog.get_catalog_path(), "w", encoding="utf-8") as f:
+        json.dump({"fetched_at": time.time() - 48 * 3600, "voices": {"old": "Old Voice"}}, f)
+
+    # 오래된 목록이라도 바로 반환하고, 갱신은 백그라운드에서
+    assert voice_catalog.load_voice_catalog() == {"old": "Old Voice"}
+    assert voice_catalog.is_catalog_stale(ttl_hours=24)
+    thread = voice_catalog.refresh_voice_catalog_in_background()
+    thread.join(timeout=10)
+
+    voices = voice_catalog.load_voice_catalog()
+    assert voices["mockvoice00"] == "Mock Voice 0"
+    assert "old" not in voices
+    assert not voice_catalog.is_catalog_stale(ttl_hours=24)
+
+def test_failed_refresh_keeps_the_saved_catalog(elevenlabs, monkeypatch):
+    monkeypatch.setattr(voice_catalog, "VOICE_CATALOG_FILE", None)
+    with open(voice_catalog.get_catalog_path(), "w", encoding="utf-8") as f:
+        json.dump({"fetched_at": 0, "voices": {"old": "Old Voice"}}, f)
+    elevenlabs.settings.behaviors["voices"] = ServiceBehavior(error_rate=1.0)
+
+    voice_catalog.refresh_voice_catalog_in_background().join(timeout=10)
+
+    assert voice_catalog.load_voice_catalog() == {"old": "Old Voice"}
+    # 실패 직후에는 다시 요청하지 않음
+    assert voice_catalog.refresh_voice_catalog_in_background() is None
@@ -0,0 +1,6 @@
+# 웹 UI 진입점: python -m ui
+# spawn 작업 프로세스는 `__main__.py`로 실행한 메인 모듈을 다시 import하지 않으므로 작업 프로세스마다 UI를 새로 만들지 않음
+from ui.gradio_app import main
+
+if __name__ == "__main__":
+    main()
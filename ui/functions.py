@@ -1,9 +1,12 @@
 import os
-import re
 import gradio as gr
 
 from dotenv import load_dotenv
-from elevenlabs.client import ElevenLabs
+
+from video_processing.job import Job
+from video_processing.subtitles import SubtitleDocument
+from video_processing.srt_utils import srt_time_to_ms, ms_to_srt_time
+from video_processing.voice_catalog import load_voice_catalog, read_voice_catalog, refresh_voice_catalog_in_background, is_refreshing
 
 load_dotenv()
 
@@ -11,11 +14,28 @@ ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
 OPEN_AI_TOKEN = os.getenv("OPEN_AI_TOKEN")
 
 def get_voice_list():
-    client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
-    response = client.voices.get_all()
-    voices = response.voices
+    """저장된 보이스 목록 {voice_id: 이름} (API를 기다리지 않음, 오래됐으면 백그라운드에서 갱신 시작)"""
+    refresh_voice_catalog_in_background()
+    return load_voice_catalog()
+
+def voice_choices(voices):
+    """{voice_id: 이름} → Dropdown 선택지 ["이름 (voice_id)", ...]"""
+    return [f"{name} ({voice_id})" for voice_id, name in voices.items()]
+
+def refresh_voice_dropdowns(loaded_at, dropdown_count):
+    """
+    보이스 목록 갱신이 끝났으면 모든 Dropdown의 선택지를 새 목록으로 바꿈 (페이지 로드 시와 Timer에서 호출)
+    - 목록이 오래됐으면 백그라운드 갱신을 시작하고, 갱신이 진행 중인 동안만 Timer를 켜 둠
+    - 반환: (Dropdown 업데이트들..., 세션이 반영한 목록 저장 시각, Timer 업데이트)
+    """
+    refresh_voice_catalog_in_background()
+    catalog = read_voice_catalog()
+    refreshing = is_refreshing()
+    if catalog["fetched_at"] == loaded_at:
+        return (*[gr.update()] * dropdown_count, loaded_at, gr.update(active=refreshing))
 
-    return {voice.voice_id: voice.name for voice in voices}
+    choices = voice_choices(catalog["voices"])
+    return (*[gr.update(choices=choices)] * dropdown_count, catalog["fetched_at"], gr.update(active=refreshing))
 
 # Example usage:
 # parse_srt_files('downloads/transcription.srt', 'downloads/translation.srt')()
@@ -27,43 +47,20 @@ def selected_upload_method(tab_id):
     return tab_id
 
 def parse_srt_files(transcription_path, translation_path):
-    # 각 블록에서 인덱스, 시간 범위, 스피커, 그리고 대화 텍스트를 추출하는 정규표현식
-    pattern = re.compile(
-        r'\d+\s*\n'                                                     # 블록 인덱스 (무시)
-        r'(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})\s*\n'  # 시작 시간과 종료 시간
-        r'(.+?)\s*\n'                                                   # 스피커 라인
-        r'(.+?)(?=\n\s*\n|\Z)',                                           # 대화 텍스트 (여러 줄일 수 있으므로 비탐욕적)
-        re.DOTALL
-    )
-
-    def parse(path):
-        with open(path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        return [
-            (
-                m.group(1),                # 시작 시간
-                m.group(2),                # 종료 시간
-                m.group(3).strip(),        # 스피커
-                m.group(4).strip().replace('\n', ' ')  # 대화 텍스트 (줄바꿈은 공백으로)
-            )
-            for m in re.finditer(pattern, content)
-        ]
-
-    transcription_entries = parse(transcription_path)
-    translation_entries = parse(translation_path)
-
-    combined_entries = [
-        [t_start, t_end, t_speaker, t_text, tr_text]
-        for (t_start, t_end, t_speaker, t_text), (_, _, _, tr_text) in zip(transcription_entries, translation_entries)
+    """원본/번역 자막 파일을 같은 순서의 블록끼리 묶어서 Dataset 샘플로 반환"""
+    return document_samples(SubtitleDocument.from_srt_files(transcription_path, translation_path))
+
+def document_samples(document):
+    """SubtitleDocument → [[start, end, speaker, original, translation], ...] (시각은 SRT 형식 문자열)"""
+    return [
+        [ms_to_srt_time(cue.start_ms), ms_to_srt_time(cue.end_ms), cue.speaker, cue.original, cue.translation]
+        for cue in document.cues
     ]
-    return combined_entries
 
 # srt 파일 업데이트
-def time_to_seconds(time_str):
+def time_to_ms(time_str):
     try:
-        h, m, s_ms = time_str.split(":")
-        s, ms = s_ms.split(",")
-        return int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000.0
+        return srt_time_to_ms(time_str.strip())
     except Exception:
         return 0
 
@@ -103,22 +100,29 @@ def remove_duplicate_start_times(samples):
             seen_starts.add(sample[0])
     return unique_samples
 
-def update_srt_dataset(start, end, speaker, original, translation):
-    samples = parse_srt_files('downloads/transcription_refined.srt', 'downloads/translated.srt')
+def get_job(job_id):
+    """
+    UI의 job_state로 작업 공간을 열기
+    - 아직 실행한 작업이 없으면(job_id가 None) Job()이 빈 작업 공간을 새로 만들지 않도록 UI 오류로 알림
+    """
+    if not job_id:
+        raise gr.Error("먼저 '전체 시작'으로 영상을 처리해 주세요.")
+    return Job(job_id)
 
-    if start or end or speaker or original or translation:
-        new_sample = [start, end, speaker, original, translation]
-        samples = [sample for sample in samples if sample[0] != start]
-        samples.append(new_sample)
+def parse_job_srt_files(job_id):
+    """작업 공간의 자막 문서(원본 + 번역)를 Dataset 샘플로 반환 (작업이 없으면 빈 목록)"""
+    if not job_id:
+        return []
+    return document_samples(SubtitleDocument.open(Job(job_id)))
 
-    # 시작 시간 기준으로 정렬.
-    samples.sort(key=lambda sample: time_to_seconds(sample[0]))
+def update_srt_dataset(start, end, speaker, original, translation, job_id):
+    # 자막 문서에 편집 기록 한 줄만 추가 (SRT 파일은 영상 재생성 시에 내보냄)
+    document = SubtitleDocument.open(get_job(job_id))
 
-    # transcription 파일에는 원본 텍스트(인덱스 3), translated 파일에는 번역 텍스트(인덱스 4) 사용
-    write_srt_file('downloads/transcription_refined.srt', samples, text_index=3)
-    write_srt_file('downloads/translated.srt', samples, text_index=4)
+    if start or end or speaker or original or translation:
+        document.upsert(time_to_ms(start), time_to_ms(end), speaker, original, translation)
 
-    new_dataset = gr.Dataset(samples=samples)
+    new_dataset = gr.Dataset(samples=document_samples(document))
 
     # 텍스트박스 초기화와 함께 새 Dataset 반환.
-    return new_dataset, "", "", "", "", ""
\ No newline at end of file
+    return new_dataset, "", "", "", ""
@@ -4,11 +4,15 @@ import sys
 import time
 
 from ui.functions import get_voice_list
+from ui.functions import voice_choices
+from ui.functions import refresh_voice_dropdowns
 from ui.functions import selected_upload_method
 from ui.functions import parse_srt_files
 from ui.functions import write_srt_file
 from ui.functions import remove_duplicate_start_times
 from ui.functions import update_srt_dataset
+from ui.functions import parse_job_srt_files
+from ui.functions import get_job
 
 from video_processing.downloader import download_youtube_video
 from video_processing.trimmer import trim_video
@@ -20,16 +24,21 @@ from video_processing.translation import translate_srt
 from video_processing.tts import generate_tts_with_timestamps
 from video_processing.merging import merge_audio_with_video, merge_background_with_tts
 from video_processing.file_manager import get_file_path
+from video_processing.job import Job
+from video_processing.tracing import progress_text, start_metrics_server
 
 from main import process_video
 from main import regenerate_video_from_srt
 
+from config import MAX_CONCURRENT_JOBS, METRICS_PORT
+
 
 CSS_PATH = "ui/style.css"
 
 available_languages = ["KO", "EN", "JA", "DE", "ZH", "ES", "FI", "FR", "IT", "PT", "RU"]
 target_languages = ["EN", "JA", "DE", "ZH-HANT", "ZH-HANS", "ES", "FI", "FR", "IT", "PT-PT", "PT-BR", "RU", "KO"]
 speaker_indices = [f"Speaker_0{i}" for i in range(5)]
+# 저장된 보이스 목록으로 바로 시작 (오래됐으면 백그라운드에서 갱신되고, 끝나면 Dropdown 선택지가 바뀜)
 voice_models = get_voice_list()
 
 # Config 파일 로드를 위한 경로 추가
@@ -113,9 +122,14 @@ with gr.Blocks(
         '''
     )
     usr_msg = gr.State()
+    # 세션별 작업 ID (작업마다 독립된 작업 공간 사용)
+    job_state = gr.State(value=None)
 
     # 미리 Dropdown에 들어갈 voice_choices 생성
-    voice_choices = {f"{name} ({id})": id for id, name in voice_models.items()}
+    initial_voice_choices = voice_choices(voice_models)
+    # 세션이 반영한 보이스 목록의 저장 시각 (None이면 페이지 로드 시 현재 목록으로 한 번 맞춤) / 갱신 완료 확인용 Timer
+    voice_catalog_state = gr.State(value=None)
+    voice_catalog_timer = gr.Timer(2, active=False)
 
     with gr.Row():
         with gr.Column(scale=1):
@@ -141,7 +155,7 @@ with gr.Blocks(
                     for i in range(5):
                         dd = gr.Dropdown(
                             label=f"Speaker_0{i}",
-                            choices=list(voice_choices.keys()),
+                            choices=initial_voice_choices,
                             interactive=True,
                             visible=True if i < 1 else False
                         )
@@ -149,6 +163,13 @@ with gr.Blocks(
                     # 각 Dropdown의 change 이벤트에 모든 Dropdown 값을 인자로 전달하도록 등록합니다.
                     for dd in dd_list:
                         dd.change(fn=create_change_func, inputs=dd_list)
+                # 보이스 목록 갱신이 끝나면 Dropdown 선택지 교체
+                gr.on(
+                    triggers=[demo.load, voice_catalog_timer.tick],
+                    fn=lambda loaded_at: refresh_voice_dropdowns(loaded_at, len(dd_list)),
+                    inputs=[voice_catalog_state],
+                    outputs=[*dd_list, voice_catalog_state, voice_catalog_timer]
+                )
                 # 슬라이더 값 변경 시, 각 Dropdown의 표시 여부 업데이트
                 speaker_slider.change(
                     fn=update_dropdown_visibility,
@@ -220,38 +241,45 @@ with gr.Blocks(
                 gr.Label("⚙️ 제어판", show_label=False, elem_classes="header")
                 # retranslate_btn = gr.Button("📝 번역 재시도", interactive=False)
 
-                progress_label = gr.Textbox(label="진행 상황", interactive=False)
+                progress_label = gr.Textbox(label="진행 상황", interactive=False, lines=4)
+                # 작업이 실행되는 동안 실행 기록(span)으로 진행 상황 갱신
+                progress_timer = gr.Timer(1, active=False)
+                progress_timer.tick(fn=progress_text, inputs=[job_state], outputs=progress_label)
 
-            d = gr.DownloadButton("변환된 영상 다운로드", visible=True, variant="primary", value="downloads/final_video.mp4")
+            d = gr.DownloadButton("변환된 영상 다운로드", visible=True, variant="primary")
 
     # <---------- 전체 시작 버튼 ---------->
-    start_btn.click(
-        lambda: gr.Button(interactive=False, value="🔳 전체 시작"),
+    start_event = start_btn.click(
+        lambda: [gr.Button(interactive=False, value="🔳 전체 시작"), Job().job_id, gr.Timer(active=True)],  # 새 작업 공간 생성
         inputs=[],
-        outputs=[start_btn]
+        outputs=[start_btn, job_state, progress_timer]
     ).success(
         fn=lambda *args: process_video(
             args[0],  # input_url
             args[1],  # original_language
             args[2],  # target_language
             args[3],  # speaker_slider_state
-            [x.split("(")[-1].rstrip(")").strip() for x in args[4:-2] if x],  # 드롭다운 값들 처리
-            args[-2],  # timestamp_start
-            args[-1]   # timestamp_end
+            [x.split("(")[-1].rstrip(")").strip() for x in args[4:-3] if x],  # 드롭다운 값들 처리
+            args[-3],  # timestamp_start
+            args[-2],  # timestamp_end
+            Job(args[-1])  # job_state
         ),
-        inputs=[input_url, original_language, target_language, speaker_slider_state, *dd_list, timestamp_start, timestamp_end],
-        outputs=progress_label
-    ).success(
-        fn=lambda video_path: video_path,
-        inputs=[progress_label],
+        inputs=[input_url, original_language, target_language, speaker_slider_state, *dd_list, timestamp_start, timestamp_end, job_state],
         outputs=[output_video]
-    ).success(
-        fn=lambda: gr.update(value="downloads/final_video.mp4"), # Update download button value
-        inputs=[],
+    )
+    # 성공/실패와 상관없이 마지막 진행 상황을 표시하고 Timer 정지
+    start_event.then(
+        fn=lambda job_id: [progress_text(job_id), gr.Timer(active=False)],
+        inputs=[job_state],
+        outputs=[progress_label, progress_timer]
+    )
+    start_event.success(
+        fn=lambda job_id: gr.update(value=Job(job_id).path("final_video.mp4")), # Update download button value
+        inputs=[job_state],
         outputs=[d]
     ).success(
-        fn=lambda: gr.Dataset(samples=parse_srt_files('downloads/transcription_refined.srt', 'downloads/translated.srt')),
-        inputs=[],
+        fn=lambda job_id: gr.Dataset(samples=parse_job_srt_files(job_id)),
+        inputs=[job_state],
         outputs=[srt_examples.dataset]
     ).success(
         fn=lambda: [gr.Button(interactive=True, value="🔲 전체 재시작"), gr.Button(interactive=True)],
@@ -261,20 +289,31 @@ with gr.Blocks(
     # <---------- 자막 수정하기 버튼 ---------->
     update_srt_btn.click(
         fn=update_srt_dataset,
-        inputs=[textbox_start, textbox_end, speaker_list, textbox_original, textbox_translation],
+        inputs=[textbox_start, textbox_end, speaker_list, textbox_original, textbox_translation, job_state],
         outputs=[srt_examples.dataset, textbox_start, textbox_end, textbox_original, textbox_translation]
     )
 
     # <---------- 영상 재생성 버튼 ---------->
-    regenerate_video_btn.click(
+    regenerate_event = regenerate_video_btn.click(
+        fn=lambda: gr.Timer(active=True),
+        inputs=[],
+        outputs=[progress_timer]
+    ).success(
         fn=lambda *args: regenerate_video_from_srt(
-            [x.split("(")[-1].rstrip(")").strip() for x in args if x]
+            [x.split("(")[-1].rstrip(")").strip() for x in args[:-1] if x],
+            get_job(args[-1])  # job_state
         ),
-        inputs=[*dd_list],
+        inputs=[*dd_list, job_state],
         outputs=[output_video]
-    ).success(
-        fn=lambda: gr.update(value="downloads/final_video.mp4"), # Update download button value
-        inputs=[],
+    )
+    regenerate_event.then(
+        fn=lambda job_id: [progress_text(job_id), gr.Timer(active=False)],
+        inputs=[job_state],
+        outputs=[progress_label, progress_timer]
+    )
+    regenerate_event.success(
+        fn=lambda job_id: gr.update(value=Job(job_id).path("final_video.mp4")), # Update download button value
+        inputs=[job_state],
         outputs=[d]
     )
 
@@ -284,5 +323,11 @@ with gr.Blocks(
         outputs=speaker_slider_state
     )
 
+def main():
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    demo.queue(default_concurrency_limit=MAX_CONCURRENT_JOBS)
+    demo.launch()
+
 if __name__ == "__main__":
-    demo.launch()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -1,15 +1,20 @@
 # __init__.py
+# 무거운 의존성(torch, pyannote, openai 등)은 각 단계에서 처음 사용할 때 import됨
 import os
 import re
 import json
-import yt_dlp
-import openai
 import subprocess
-import requests
-import torch
-import torchaudio
-from pydub import AudioSegment
-from elevenlabs.client import ElevenLabs
-from pyannote.audio.pipelines import SpeakerDiarization
+from .lazy import LazyModule, LazyAttribute
+
+np = LazyModule("numpy")
+yt_dlp = LazyModule("yt_dlp")
+openai = LazyModule("openai")
+requests = LazyModule("requests")
+torch = LazyModule("torch")
+torchaudio = LazyModule("torchaudio")
+AudioSegment = LazyAttribute("pydub", "AudioSegment")
+ElevenLabs = LazyAttribute("elevenlabs.client", "ElevenLabs")
+SpeakerDiarization = LazyAttribute("pyannote.audio.pipelines", "SpeakerDiarization")
+
 from .file_manager import get_file_path
 from .srt_utils import parse_srt
\ No newline at end of file
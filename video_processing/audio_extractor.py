@@ -1,16 +1,16 @@
-from video_processing import subprocess, get_file_path
+from video_processing import get_file_path
+from video_processing.media import run_ffmpeg
 
-def extract_audio_from_video(video_file, filename="trimmed_audio.mp3"):
-    output_path = get_file_path(filename)
-    command = f"ffmpeg -i {video_file} -q:a 0 -map a {output_path} -loglevel error -y"
-    subprocess.run(command, shell=True, check=True)
+def extract_audio_from_video(video_file, filename="trimmed_audio.wav", job=None):
+    # 보컬 분리 입력으로 쓰이므로 손실 압축 없이 WAV로 추출
+    output_path = get_file_path(filename, job)
+    run_ffmpeg(["-i", video_file, "-map", "0:a:0", "-vn", "-c:a", "pcm_s16le", output_path])
     return output_path
 
-def audio_preprocessing(audio_file, filename="preprocessed_audio.wav"):
-    output_path = get_file_path(filename)
+def audio_preprocessing(audio_file, filename="preprocessed_audio.wav", job=None):
+    output_path = get_file_path(filename, job)
 
     # 1️⃣ 16kHz, Mono 변환 (FFmpeg)
-    command = f"ffmpeg -i {audio_file} -acodec pcm_s16le -ac 1 -ar 16000 {output_path} -loglevel error -y"
-    subprocess.run(command, shell=True, check=True)
+    run_ffmpeg(["-i", audio_file, "-acodec", "pcm_s16le", "-ac", "1", "-ar", "16000", output_path])
 
     return output_path
\ No newline at end of file
@@ -1,8 +1,32 @@
 from video_processing import os, yt_dlp, get_file_path
+import copy
 import re
+import shutil
+import threading
+import time
+import uuid
+from video_processing.cache import hash_key
+from video_processing.file_manager import get_cache_dir
+from video_processing.media import probe_media
+from video_processing.tracing import span, current_span
+from video_processing.trimmer import time_to_seconds
+from config import STAGE_CACHE_MAX_AGE_HOURS
 
-def download_youtube_video(video_url, filename="downloaded_video.mp4"):
-    output_path = get_file_path(filename)
+VIDEO_FORMAT = 'bestvideo+bestaudio/best'
+# 분리 다운로드(오디오 먼저) 모드에서 사용하는 포맷
+AUDIO_ONLY_FORMAT = 'bestaudio/best'
+VIDEO_ONLY_FORMAT = 'bestvideo[ext=mp4]/bestvideo/best'
+# 구간 다운로드 시 앞뒤로 더 받는 시간 (키프레임 위치와 상관없이 요청 구간 전체가 들어오도록)
+SECTION_PADDING_SECONDS = 2
+# 추출한 메타데이터를 같은 프로세스에서 재사용하는 시간 (스트림 URL 만료 전)
+VIDEO_INFO_TTL_SECONDS = 30 * 60
+
+# url -> (추출 시각, yt-dlp 원본 info)
+_video_info_cache = {}
+_video_info_lock = threading.Lock()
+
+def download_youtube_video(video_url, filename="downloaded_video.mp4", job=None):
+    output_path = get_file_path(filename, job)
 
     # 기존 파일이 존재하면 삭제
     if os.path.exists(output_path):
@@ -10,44 +34,145 @@ def download_youtube_video(video_url, filename="downloaded_video.mp4"):
         print(f"🗑 기존 파일 삭제: {output_path}")
 
     ydl_opts = {
-        'format': 'bestvideo+bestaudio/best',
+        'format': VIDEO_FORMAT,
         'outtmpl': output_path,
         'merge_output_format': 'mp4',
     }
 
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-
-
-        ydl.download([video_url])
+        # process_ie_result가 info를 직접 수정하므로 get_video_info는 복사본을 반환
+        ydl.process_ie_result(get_video_info(video_url), download=True)
 
     print(f"✅ 다운로드 완료: {output_path}")
     return output_path
 
-def extract_whisper_prompt_from_youtube(video_url):
-    ydl_opts = {
-        'format': 'bestvideo+bestaudio/best',
-        'merge_output_format': 'mp4',
-        'skip_download': True,
-    }
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info_dict = ydl.extract_info(video_url, download=False)
-
-        extract_key_from_info_dict = ['tags', 'description', 'title']
-        values = []
-        for key in extract_key_from_info_dict:
-            value = info_dict.get(key, '')
-            if isinstance(value, list):
-                # 리스트인 경우, 내부 요소들을 join해서 하나의 문자열로 만듦
-                value = ' '.join(value)
-            values.append(value)
-        dumped_text = ' '.join(values)
-
-        # 2. 모든 특수문자, 이모지 등 제거
-        text = dumped_text.replace('\n', ' ')
-        clean_text = re.sub(r'[^\w\s]', '', text)
-        words = clean_text.split()
-        unique_words = list(dict.fromkeys(words))
-
-        result = ', '.join(unique_words)
-        print(result)
-        return result
\ No newline at end of file
+def download_video_section(video_url, video_info, start_time, end_time, filename="downloaded_video.mp4", job=None, video_format=VIDEO_FORMAT):
+    """
+    start_time ~ end_time 구간(앞뒤 여유 포함)만 다운로드
+    - (영상 ID, 포맷, 구간) 단위로 캐시하므로 같은 구간은 다시 받지 않음
+    - 이미 받아 둔 구간이 요청 구간을 포함하면 그 파일을 재사용
+    - video_format에 오디오/영상 전용 포맷을 주면 해당 스트림만 다운로드 (컨테이너는 filename의 확장자)
+    - 스트림은 재인코딩 없이 복사하므로 파일이 구간 시작 직전 키프레임부터 시작할 수 있음 → 실제 시작 시각을 계산해서 반환
+    - {"video_file": 경로, "section_start": 파일이 시작하는 원본 영상 기준 시각(초)} 반환
+    """
+    output_path = get_file_path(filename, job)
+    ext = os.path.splitext(filename)[1].lstrip('.') or 'mp4'
+    section_start = max(0, time_to_seconds(start_time) - SECTION_PADDING_SECONDS)
+    section_end = time_to_seconds(end_time) + SECTION_PADDING_SECONDS
+    if video_info.get("duration"):
+        section_end = min(section_end, video_info["duration"])
+
+    cached = find_cached_section(video_info["id"], video_format, time_to_seconds(start_time), time_to_seconds(end_time), ext)
+    if cached:
+        cached_path, section_start = cached
+        current_span().add(cache_hits=1)
+        print(f"♻️ 캐시된 영상 구간 사용: {cached_path}")
+    else:
+        temp_path = os.path.join(get_cache_dir("videos"), f"{uuid.uuid4().hex}.part.{ext}")
+
+        # force_keyframes_at_cuts를 쓰면 yt-dlp가 구간 전체를 다시 인코딩하므로 쓰지 않고 스트림 복사
+        # -copyts: 원본 타임스탬프를 그대로 기록해서 파일의 start_time이 원본 영상 기준 실제 시작 시각이 되도록 함
+        ydl_opts = {
+            'format': video_format,
+            'outtmpl': temp_path,
+            'merge_output_format': ext,
+            'download_ranges': yt_dlp.utils.download_range_func(None, [(section_start, section_end)]),
+            'external_downloader_args': {'ffmpeg_o': ['-copyts']},
+        }
+        info = get_video_info(video_url)
+        with span("yt_dlp.download", format=video_format) as call, yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            ydl.process_ie_result(info, download=True)
+            call.add(bytes_in=os.path.getsize(temp_path))
+
+        section_start = copied_section_start(temp_path)
+        cached_path = os.path.join(get_cache_dir("videos"), section_filename(video_info["id"], video_format, section_start, section_end, ext))
+        os.replace(temp_path, cached_path)
+        print(f"✅ 구간 다운로드 완료: {section_start}s ~ {section_end}s")
+
+    os.utime(cached_path)  # 마지막 사용 시각 갱신
+    shutil.copyfile(cached_path, output_path)
+    return {"video_file": output_path, "section_start": section_start}
+
+def copied_section_start(path):
+    """
+    스트림 복사로 받은 구간 파일이 실제로 시작하는 원본 영상 기준 시각(초)
+    - ffmpeg는 요청 시각 직전 키프레임부터 복사하고, 스트림마다 시작 위치가 다를 수 있음
+    - -copyts로 받은 파일은 원본 타임스탬프를 유지하므로 ffprobe의 start_time(가장 먼저 시작하는 스트림)이 곧 시작 시각
+      (이후 단계의 입력 쪽 -ss도 start_time 기준이라 그대로 offset으로 사용 가능)
+    - 원본 스트림이 0초에서 시작한다고 가정 (YouTube 스트림)
+    """
+    return round(max(0.0, probe_media(path)["start_time"]), 3)
+
+def section_filename(video_id, video_format, section_start, section_end, ext="mp4"):
+    safe_id = re.sub(r'[^\w-]', '_', video_id)
+    return f"{safe_id}_{hash_key(video_format)[:8]}_{section_start:.3f}-{section_end:.3f}.{ext}"
+
+def find_cached_section(video_id, video_format, start_seconds, end_seconds, ext="mp4"):
+    """캐시된 구간 중 [start_seconds, end_seconds]를 포함하는 가장 짧은 구간의 (경로, 시작 시각)"""
+    cache_dir = get_cache_dir("videos")
+    prefix = section_filename(video_id, video_format, 0, 0).rsplit("_", 1)[0] + "_"
+    best = None
+    for name in os.listdir(cache_dir):
+        match = re.fullmatch(re.escape(prefix) + r'([\d.]+)-([\d.]+)\.' + re.escape(ext), name)
+        if not match:
+            continue
+        cached_start, cached_end = float(match.group(1)), float(match.group(2))
+        if cached_start <= start_seconds and end_seconds <= cached_end:
+            if best is None or cached_end - cached_start < best[2]:
+                best = (os.path.join(cache_dir, name), cached_start, cached_end - cached_start)
+    return best[:2] if best else None
+
+def prune_video_cache(max_age_hours=STAGE_CACHE_MAX_AGE_HOURS):
+    """마지막 사용 후 `max_age_hours`가 지난 영상 구간 캐시 삭제"""
+    cache_dir = get_cache_dir("videos")
+    deadline = time.time() - max_age_hours * 3600
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if os.path.getmtime(path) < deadline:
+            os.remove(path)
+
+def get_video_info(video_url):
+    """
+    yt-dlp 메타데이터 추출 (같은 프로세스에서는 VIDEO_INFO_TTL_SECONDS 동안 재사용)
+    - 포맷 선택 전 원본 info를 반환하므로 다운로드 옵션이 다른 YoutubeDL에서도 그대로 사용 가능
+    - process_ie_result가 받은 info를 직접 수정(포맷 선택 결과, requested_downloads 등)하므로 매번 깊은 복사본을 반환
+      (동시에 실행되는 오디오/영상 다운로드나 나중 작업이 캐시된 info를 공유하지 않음)
+    """
+    with _video_info_lock:
+        cached = _video_info_cache.get(video_url)
+        if cached and time.time() - cached[0] < VIDEO_INFO_TTL_SECONDS:
+            current_span().add(cache_hits=1)
+            return copy.deepcopy(cached[1])
+
+        with span("yt_dlp.extract_info"), yt_dlp.YoutubeDL({'skip_download': True}) as ydl:
+            info = ydl.extract_info(video_url, download=False, process=False)
+        _video_info_cache[video_url] = (time.time(), info)
+        return copy.deepcopy(info)
+
+def fetch_video_metadata(video_url):
+    """Whisper 프롬프트와 다운로드 캐시에 필요한 메타데이터만 추려서 반환 (JSON 직렬화 가능)"""
+    info = get_video_info(video_url)
+    return {key: info.get(key) for key in ('id', 'title', 'description', 'tags', 'duration')}
+
+def extract_whisper_prompt_from_youtube(video_url, video_info=None):
+    info_dict = video_info or fetch_video_metadata(video_url)
+
+    extract_key_from_info_dict = ['tags', 'description', 'title']
+    values = []
+    for key in extract_key_from_info_dict:
+        value = info_dict.get(key) or ''
+        if isinstance(value, list):
+            # 리스트인 경우, 내부 요소들을 join해서 하나의 문자열로 만듦
+            value = ' '.join(value)
+        values.append(value)
+    dumped_text = ' '.join(values)
+
+    # 2. 모든 특수문자, 이모지 등 제거
+    text = dumped_text.replace('\n', ' ')
+    clean_text = re.sub(r'[^\w\s]', '', text)
+    words = clean_text.split()
+    unique_words = list(dict.fromkeys(words))
+
+    result = ', '.join(unique_words)
+    print(result)
+    return result
@@ -2,9 +2,22 @@ import os
 
 # 기본 파일 저장 디렉토리 (환경 변수나 기본값 설정)
 DOWNLOAD_DIR = os.getenv("DOWNLOAD_DIR", "downloads")
+# 작업 간에 공유하는 캐시 디렉토리
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(DOWNLOAD_DIR, "cache"))
+# 작업(job)별 작업 공간이 만들어지는 디렉토리
+JOBS_DIR = os.getenv("JOBS_DIR", os.path.join(DOWNLOAD_DIR, "jobs"))
+
+def get_file_path(filename: str, job=None) -> str:
+    # 작업이 주어지면 해당 작업 공간 안의 경로 사용
+    if job is not None:
+        return job.path(filename)
 
-def get_file_path(filename: str) -> str:
     if not os.path.exists(DOWNLOAD_DIR):
         os.makedirs(DOWNLOAD_DIR)
 
-    return os.path.join(DOWNLOAD_DIR, filename)
\ No newline at end of file
+    return os.path.join(DOWNLOAD_DIR, filename)
+
+def get_cache_dir(namespace: str) -> str:
+    cache_dir = os.path.join(CACHE_DIR, namespace)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
\ No newline at end of file
@@ -0,0 +1,88 @@
+from video_processing import os
+import shutil
+import time
+import uuid
+from video_processing.file_manager import DOWNLOAD_DIR, JOBS_DIR
+from config import JOB_QUOTA_MB, JOB_MAX_AGE_HOURS
+
+class JobQuotaExceeded(RuntimeError):
+    pass
+
+class Job:
+    """
+    작업 하나가 사용하는 독립된 작업 공간 (JOBS_DIR/<job_id>/)
+    - 모든 단계의 중간/최종 파일은 `job.path(filename)` 아래에 저장
+    - 같은 job_id로 다시 만들면 기존 작업 공간을 그대로 사용 (예: 자막 수정 후 재생성)
+    """
+
+    def __init__(self, job_id=None, root=JOBS_DIR, quota_bytes=JOB_QUOTA_MB * 1024 * 1024):
+        self.job_id = job_id or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        if os.path.basename(self.job_id) != self.job_id or self.job_id in ("", ".", ".."):
+            raise ValueError(f"잘못된 job_id: {self.job_id}")
+        self.workspace = os.path.join(root, self.job_id)
+        self.quota_bytes = quota_bytes
+        os.makedirs(self.workspace, exist_ok=True)
+        self.touch()
+
+    def __repr__(self):
+        return f"Job({self.job_id!r})"
+
+    def path(self, filename):
+        return os.path.join(self.workspace, filename)
+
+    def touch(self):
+        """마지막 사용 시각 갱신 (오래된 작업 공간 정리 기준)"""
+        os.utime(self.workspace)
+
+    def disk_usage(self):
+        return directory_size(self.workspace)
+
+    def check_quota(self):
+        """작업 공간 크기가 한도를 넘으면 JobQuotaExceeded 발생"""
+        self.touch()
+        usage = self.disk_usage()
+        if usage > self.quota_bytes:
+            raise JobQuotaExceeded(
+                f"작업 공간 용량 초과: {usage / 1024 / 1024:.1f}MB > {self.quota_bytes / 1024 / 1024:.1f}MB ({self.workspace})"
+            )
+        return usage
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def collect_garbage(max_age_hours=JOB_MAX_AGE_HOURS, root=JOBS_DIR, keep=()):
+    """
+    마지막 사용 후 `max_age_hours`가 지난 작업 공간과, 남아 있는 Demucs 출력 폴더(htdemucs/)를 삭제
+    - `keep`에 있는 작업(Job 또는 job_id)은 삭제하지 않음
+    - 삭제한 경로 리스트 반환
+    """
+    keep_ids = {job.job_id if isinstance(job, Job) else job for job in keep}
+    deadline = time.time() - max_age_hours * 3600
+    removed = []
+
+    leftover_demucs = os.path.join(DOWNLOAD_DIR, "htdemucs")
+    if os.path.isdir(leftover_demucs):
+        shutil.rmtree(leftover_demucs, ignore_errors=True)
+        removed.append(leftover_demucs)
+
+    if not os.path.isdir(root):
+        return removed
+
+    for job_id in os.listdir(root):
+        workspace = os.path.join(root, job_id)
+        if job_id in keep_ids or not os.path.isdir(workspace):
+            continue
+        if os.path.getmtime(workspace) < deadline:
+            shutil.rmtree(workspace, ignore_errors=True)
+            removed.append(workspace)
+
+    if removed:
+        print(f"🧹 오래된 작업 공간 {len(removed)}개 정리")
+    return removed
@@ -0,0 +1,54 @@
+import importlib
+import threading
+import types
+
+class LazyModule(types.ModuleType):
+    """
+    처음 속성에 접근할 때 실제 모듈을 import하는 대리 모듈
+    - import 이후에는 모든 속성 조회를 실제 모듈에 위임 (나중에 바뀐 속성, 모듈 수준 __getattr__도 그대로 동작)
+    예: np = LazyModule("numpy") -> np.zeros(...) 호출 시점에 numpy import
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._lock = threading.Lock()
+        self._module = None
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                self._module = importlib.import_module(self.__name__)
+            return self._module
+
+    def __getattr__(self, attribute):
+        module = self._module
+        if module is None:
+            # copy/pickle 등이 확인하는 특수 속성 때문에 import하지 않도록 함
+            if attribute.startswith("__"):
+                raise AttributeError(attribute)
+            module = self._load()
+        return getattr(module, attribute)
+
+class LazyAttribute:
+    """
+    처음 사용할 때 `module_name`에서 `attribute`(주로 클래스)를 가져오는 대리 객체
+    예: AudioSegment = LazyAttribute("pydub", "AudioSegment") -> AudioSegment.from_file(...)
+    """
+
+    def __init__(self, module_name, attribute):
+        self._module_name = module_name
+        self._attribute = attribute
+        self._target = None
+
+    def _resolve(self):
+        if self._target is None:
+            self._target = getattr(importlib.import_module(self._module_name), self._attribute)
+        return self._target
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self._resolve(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
\ No newline at end of file
@@ -0,0 +1,106 @@
+from video_processing import os, json, np, subprocess, get_file_path
+import threading
+import uuid
+import wave
+from video_processing.tracing import span
+
+# (경로, 수정 시각, 크기) -> ffprobe 결과
+_probe_cache = {}
+_probe_lock = threading.Lock()
+
+def run_ffmpeg(args):
+    """ffmpeg를 인자 리스트로 실행 (공백/특수문자가 있는 경로도 그대로 전달됨)"""
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", *[str(arg) for arg in args]]
+    with span("ffmpeg"):
+        subprocess.run(command, check=True)
+
+def probe_media(path):
+    """
+    ffprobe로 포맷/스트림 정보를 한 번만 읽어서 반환 (파일이 바뀌지 않았으면 재사용)
+    - {"duration": 초, "start_time": 첫 패킷의 타임스탬프(초), "has_video": bool, "has_audio": bool, "audio_sample_rate": int | None, "audio_channels": int | None}
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _probe_lock:
+        if key in _probe_cache:
+            return _probe_cache[key]
+
+    command = ["ffprobe", "-v", "error", "-print_format", "json", "-show_format", "-show_streams", str(path)]
+    result = subprocess.run(command, stdout=subprocess.PIPE, check=True)
+    data = json.loads(result.stdout)
+
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    info = {
+        "duration": float(data.get("format", {}).get("duration") or 0),
+        "start_time": float(data.get("format", {}).get("start_time") or 0),
+        "has_video": video is not None,
+        "has_audio": audio is not None,
+        "audio_sample_rate": int(audio["sample_rate"]) if audio and audio.get("sample_rate") else None,
+        "audio_channels": audio.get("channels") if audio else None,
+    }
+    with _probe_lock:
+        _probe_cache[key] = info
+    return info
+
+def prepare_media(input_file, start_seconds, end_seconds, offset=0, job=None, include_video=True,
+                  video_filename="trimmed_video.mp4", audio_filename="source_audio.wav", analysis_filename="preprocessed_audio.wav"):
+    """
+    input_file의 start_seconds ~ end_seconds 구간에서 필요한 파일을 ffmpeg 한 번으로 모두 생성
+    - 입력 쪽 -ss로 구간 시작까지 디코딩 없이 바로 이동
+    - trimmed_video: 원본 스트림 그대로 복사 (include_video=False이거나 영상 스트림이 없으면 생략)
+    - audio_file: 보컬 분리 입력용 무손실 WAV (원본 샘플레이트/채널 유지)
+    - preprocessed_audio: 음성 인식/화자 분리용 16kHz Mono WAV
+    - offset: input_file이 원본 영상의 offset초 지점부터 시작하는 구간 파일일 때 그 시작 위치
+    """
+    info = probe_media(input_file)
+    outputs = {}
+    args = ["-ss", f"{max(0, start_seconds - offset):.3f}", "-t", f"{end_seconds - start_seconds:.3f}", "-i", input_file]
+
+    if include_video and info["has_video"]:
+        outputs["trimmed_video"] = get_file_path(video_filename, job)
+        args += ["-map", "0:v:0", "-map", "0:a:0?", "-c", "copy", outputs["trimmed_video"]]
+
+    if info["has_audio"]:
+        outputs["audio_file"] = get_file_path(audio_filename, job)
+        outputs["preprocessed_audio"] = get_file_path(analysis_filename, job)
+        args += ["-map", "0:a:0", "-vn", "-c:a", "pcm_s16le", outputs["audio_file"]]
+        args += ["-map", "0:a:0", "-vn", "-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le", outputs["preprocessed_audio"]]
+
+    if not outputs:
+        raise ValueError(f"사용할 수 있는 스트림이 없습니다: {input_file}")
+
+    run_ffmpeg(args)
+    return outputs
+
+def encode_audio_clip(input_file, start_seconds, duration_seconds, container="ogg", codec_args=("-c:a", "libopus", "-b:a", "24k")):
+    """input_file의 구간을 압축 코덱으로 인코딩해서 파일을 만들지 않고 bytes로 반환 (업로드용)"""
+    command = [
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-ss", f"{start_seconds:.3f}", "-t", f"{duration_seconds:.3f}", "-i", str(input_file),
+        "-vn", *codec_args, "-f", container, "pipe:1",
+    ]
+    with span("ffmpeg.encode") as call:
+        result = subprocess.run(command, stdout=subprocess.PIPE, check=True)
+        call.add(bytes_in=len(result.stdout))
+    return result.stdout
+
+def as_pcm_wav(input_file, sample_rate, channels):
+    """입력이 이미 16bit PCM WAV(sample_rate, channels)면 그대로, 아니면 ffmpeg로 변환한 임시 파일 경로 반환"""
+    try:
+        with wave.open(input_file, "rb") as source:
+            if (source.getframerate(), source.getnchannels(), source.getsampwidth()) == (sample_rate, channels, 2):
+                return input_file
+    except (wave.Error, EOFError):
+        pass
+
+    converted = f"{input_file}.{uuid.uuid4().hex[:8]}.pcm.wav"
+    run_ffmpeg(["-i", input_file, "-vn", "-c:a", "pcm_s16le", "-ar", sample_rate, "-ac", channels, converted])
+    return converted
+
+def read_wav_frames(source, start, length):
+    """열려 있는 wave 파일에서 start부터 length 프레임을 float32 (프레임, 채널) 배열로 읽음"""
+    source.setpos(start)
+    data = np.frombuffer(source.readframes(length), dtype="<i2")
+    return data.reshape(-1, source.getnchannels()).astype(np.float32) / 32768
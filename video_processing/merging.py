@@ -1,17 +1,26 @@
-from video_processing import subprocess, AudioSegment, get_file_path
+from video_processing import os, np, subprocess, AudioSegment, get_file_path
+from video_processing.media import run_ffmpeg, as_pcm_wav, read_wav_frames
+from video_processing.tracing import span
+import wave
 
-def merge_audio_with_video(original_video, new_audio, filename="final_video.mp4"):
-    output_path = get_file_path(filename)
-    command = f"ffmpeg -i {original_video} -i {new_audio} -c:v copy -map 0:v:0 -map 1:a:0 -shortest {output_path} -loglevel error -y"
-    subprocess.run(command, shell=True, check=True)
+# 혼합 시 한 번에 처리하는 길이 (초)
+MIX_BLOCK_SECONDS = 10
+# 최종 영상 오디오 코덱 (여기서 한 번만 인코딩)
+FINAL_AUDIO_CODEC_ARGS = ("-c:a", "aac", "-b:a", "192k")
+
+def merge_audio_with_video(original_video, new_audio, filename="final_video.mp4", job=None):
+    output_path = get_file_path(filename, job)
+    run_ffmpeg(["-i", original_video, "-i", new_audio, "-c:v", "copy", "-map", "0:v:0", "-map", "1:a:0", "-shortest", output_path])
     return output_path
 
-def merge_background_with_tts(tts_audio_path, background_filename="background_audio.mp3", output_format="mp3"):
-    
+def merge_background_with_tts(tts_audio_path, background_filename="background_audio.wav", output_format="mp3", job=None, filename=None):
+    # filename이 없으면 tts_audio_path에 덮어씀
+    output_path = get_file_path(filename, job) if filename else tts_audio_path
+
     try:
         # TTS 및 배경음 오디오 로드
         tts_audio_segment = AudioSegment.from_file(tts_audio_path)
-        background_audio_segment = AudioSegment.from_file(get_file_path(background_filename))
+        background_audio_segment = AudioSegment.from_file(get_file_path(background_filename, job))
         
         # 배경음 길이가 TTS보다 길면 TTS 길이에 맞춤
         if len(background_audio_segment) > len(tts_audio_segment):
@@ -20,10 +29,77 @@ def merge_background_with_tts(tts_audio_path, background_filename="background_au
         # 두 오디오 오버레이 (합성)
         final_audio = tts_audio_segment.overlay(background_audio_segment)
         
-        # 최종 오디오를 tts_audio_path에 덮어쓰기
-        final_audio.export(tts_audio_path, format=output_format)
-        return tts_audio_path
+        # 최종 오디오 저장
+        final_audio.export(output_path, format=output_format)
+        return output_path
         
     except Exception as e:
         print("❌ 배경음 합성 실패:", e)
-        raise
\ No newline at end of file
+        raise
+
+def mux_dub_with_video(original_video, tts_timeline, background_audio, tts_sample_rate, tts_frames=None, filename="final_video.mp4", job=None,
+                       block_seconds=MIX_BLOCK_SECONDS, length="tts"):
+    """
+    TTS 타임라인(.npy, int16)과 배경음(WAV)을 float PCM으로 블록 단위로 더해서 ffmpeg 파이프로 바로 영상과 병합
+    - 중간 MP3를 만들지 않고 최종 오디오 코덱으로 한 번만 인코딩
+    - 타임라인은 메모리 맵으로 열고 배경음은 블록 단위로 읽으므로 입력 길이와 상관없이 메모리 사용량 일정
+    - tts_frames: 타임라인에서 실제 TTS가 끝나는 샘플 위치 (없으면 타임라인 전체)
+    - length="tts": 배경음을 TTS 길이에 맞춰 자름 (merge_background_with_tts와 같음)
+      length="longest": TTS와 배경음 중 긴 쪽까지 (어느 쪽이든 영상보다 길면 -shortest로 잘림)
+    """
+    if length not in ("tts", "longest"):
+        raise ValueError(f"length must be 'tts' or 'longest': {length}")
+    output_path = get_file_path(filename, job)
+    timeline = np.load(tts_timeline, mmap_mode="r")
+    if tts_frames is not None:
+        timeline = timeline[:tts_frames]
+    background_path = as_pcm_wav(background_audio, tts_sample_rate, 2)
+
+    try:
+        with wave.open(background_path, "rb") as background:
+            total_frames = len(timeline) if length == "tts" else max(len(timeline), background.getnframes())
+            command = [
+                "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+                "-i", str(original_video),
+                "-f", "f32le", "-ar", str(tts_sample_rate), "-ac", "2", "-i", "pipe:0",
+                "-map", "0:v:0", "-map", "1:a:0", "-c:v", "copy", *FINAL_AUDIO_CODEC_ARGS, "-shortest", output_path,
+            ]
+            with span("ffmpeg.mux") as call:
+                process = subprocess.Popen(command, stdin=subprocess.PIPE)
+                try:
+                    for block in mix_blocks(timeline, background, total_frames, int(block_seconds * tts_sample_rate)):
+                        process.stdin.write(block.tobytes())
+                        call.add(bytes_out=block.nbytes)
+                except BrokenPipeError:
+                    # -shortest로 영상이 먼저 끝나면 ffmpeg가 입력을 닫음
+                    pass
+                finally:
+                    try:
+                        process.stdin.close()
+                    except BrokenPipeError:
+                        pass
+                if process.wait() != 0:
+                    raise subprocess.CalledProcessError(process.returncode, command)
+    finally:
+        if background_path != background_audio and os.path.exists(background_path):
+            os.remove(background_path)
+
+    return output_path
+
+def mix_blocks(timeline, background, total_frames, block_frames):
+    """(TTS + 배경음)을 float32 스테레오 (프레임, 2) 블록으로 순서대로 생성 (pydub overlay와 같이 합한 뒤 -1~1로 자름)"""
+    for start in range(0, total_frames, block_frames):
+        length = min(block_frames, total_frames - start)
+        block = np.zeros((length, 2), dtype=np.float32)
+
+        speech = timeline[start:start + length]
+        if len(speech):
+            # mono 타임라인은 양쪽 채널에 똑같이 더함
+            block[:len(speech)] += speech.astype(np.float32) / 32768
+
+        if start < background.getnframes():
+            music = read_wav_frames(background, start, length)
+            block[:len(music)] += music
+
+        yield np.clip(block, -1, 1).astype("<f4")
+
@@ -0,0 +1,129 @@
+"""
+pyannote 화자 분리, Demucs 보컬 분리 모델을 메모리에 올려 두는 상주 모델 서버
+
+    $ python -m video_processing.model_server
+
+서버가 실행 중이면 `diarize_audio`, `separate_background_audio`가 자동으로 이 서버를 사용하므로
+CLI 실행과 Gradio 앱이 같은 모델을 공유하고, 작업마다 모델을 다시 로드하지 않습니다.
+프로토콜: Unix 소켓 연결 하나당 JSON 요청 한 줄 → JSON 응답 한 줄
+    {"op": "diarize", "audio_file": "/abs/path.wav", "num_speakers": 2}
+    {"op": "separate", "input_file": "/abs/in.wav", "output_file": "/abs/out.wav"}
+    {"op": "ping"}
+"""
+from video_processing import os, json
+import argparse
+import signal
+import socket
+import sys
+import socketserver
+import threading
+from config import MODEL_SERVER_SOCKET
+
+def is_model_server_running(socket_path=MODEL_SERVER_SOCKET):
+    if not os.path.exists(socket_path):
+        return False
+    try:
+        return request_model_server("ping", socket_path=socket_path, timeout=2).get("status") == "ok"
+    except (OSError, RuntimeError, ValueError):
+        return False
+
+def request_model_server(op, socket_path=MODEL_SERVER_SOCKET, timeout=None, **params):
+    """
+    모델 서버에 요청을 보내고 결과를 반환
+    - 연결 실패 시 OSError, 서버에서 처리 중 오류가 나면 RuntimeError
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path)
+        client.sendall(json.dumps({"op": op, **params}).encode("utf-8") + b"\n")
+        client.shutdown(socket.SHUT_WR)
+
+        chunks = []
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+
+    response = json.loads(b"".join(chunks).decode("utf-8"))
+    if not response.get("ok"):
+        raise RuntimeError(f"모델 서버 오류: {response.get('error')}")
+    return response["result"]
+
+class ModelRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+            response = {"ok": True, "result": self.server.dispatch(request)}
+        except Exception as e:
+            response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+class ModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path=MODEL_SERVER_SOCKET, preload=True):
+        if os.path.exists(socket_path):
+            if is_model_server_running(socket_path):
+                raise RuntimeError(f"이미 모델 서버가 실행 중입니다: {socket_path}")
+            # 비정상 종료로 남은 소켓 파일
+            os.remove(socket_path)
+        super().__init__(socket_path, ModelRequestHandler)
+        self.socket_path = socket_path
+        # 모델별로 한 번에 하나의 요청만 처리 (서로 다른 모델은 동시에 처리)
+        self._diarization_lock = threading.Lock()
+        self._separation_lock = threading.Lock()
+        if preload:
+            self.load_models()
+
+    def load_models(self):
+        from video_processing.transcription import get_diarization_pipeline
+        from video_processing.vocal_separation import get_demucs_model
+
+        print("🧠 pyannote 화자 분리 모델 로드 중...")
+        get_diarization_pipeline()
+        print("🧠 Demucs 모델 로드 중...")
+        get_demucs_model()
+
+    def dispatch(self, request):
+        op = request.get("op")
+        if op == "ping":
+            return {"status": "ok", "pid": os.getpid()}
+
+        if op == "diarize":
+            from video_processing.transcription import diarize_audio_locally
+
+            with self._diarization_lock:
+                return diarize_audio_locally(request["audio_file"], num_speakers=request.get("num_speakers"))
+
+        if op == "separate":
+            from video_processing.vocal_separation import separate_with_demucs_model
+
+            with self._separation_lock:
+                return separate_with_demucs_model(request["input_file"], request["output_file"])
+
+        raise ValueError(f"알 수 없는 요청: {op}")
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+def main():
+    parser = argparse.ArgumentParser(description="pyannote / Demucs 상주 모델 서버")
+    parser.add_argument("--socket", default=MODEL_SERVER_SOCKET, help="Unix 소켓 경로")
+    parser.add_argument("--no-preload", action="store_true", help="첫 요청 때 모델 로드")
+    args = parser.parse_args()
+
+    # SIGTERM으로 종료해도 소켓 파일이 정리되도록 처리
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    with ModelServer(args.socket, preload=not args.no_preload) as server:
+        print(f"✅ 모델 서버 실행 중: {args.socket}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("👋 모델 서버 종료")
+
+if __name__ == "__main__":
+    main()
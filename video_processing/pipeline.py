@@ -0,0 +1,260 @@
+from video_processing import os, json
+import hashlib
+import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from concurrent.futures.process import BrokenProcessPool
+import threading
+from video_processing.cache import hash_key
+from video_processing.file_manager import get_cache_dir
+from video_processing.process_pool import get_process_pool, discard_process_pool
+from video_processing.tracing import span, propagate
+from config import STAGE_CACHE_MAX_AGE_HOURS
+
+class Stage:
+    """
+    파이프라인의 한 단계
+    - inputs: {함수 인자 이름: 앞 단계 산출물 이름}
+    - params: 함수에 그대로 넘기는 설정값 (fingerprint에 포함되므로 JSON 직렬화 가능해야 함)
+    - outputs: {산출물 이름: "file" | "value"}, 산출물이 하나면 함수 반환값, 여러 개면 dict 반환
+    - version: 단계 구현이 바뀌어 기존 캐시를 무효화해야 할 때 올림
+    - description: 실행 시 출력할 진행 메시지
+    - executor: "thread"(네트워크/외부 프로세스 대기 위주) | "process"(CPU 위주, 함수와 인자가 pickle 가능해야 함)
+      "process" 단계는 프로세스 전체가 공유하는 spawn 풀에서 실행되므로 진입점은 `__main__` 가드 안에서 실행해야 함
+    함수는 `func(**inputs, **params, job=job)` 형태로 호출됨
+    """
+
+    def __init__(self, name, func, inputs=None, params=None, outputs=None, version=1, description=None, executor="thread"):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"알 수 없는 executor: {executor}")
+        self.name = name
+        self.description = description or name
+        self.func = func
+        self.inputs = inputs or {}
+        self.params = params or {}
+        self.outputs = outputs or {}
+        self.version = version
+        self.executor = executor
+
+    def fingerprint(self, input_fingerprints):
+        return hash_key(
+            self.name,
+            self.version,
+            json.dumps(self.params, sort_keys=True, ensure_ascii=False),
+            json.dumps({arg: input_fingerprints[artifact] for arg, artifact in sorted(self.inputs.items())}, sort_keys=True),
+        )
+
+class Pipeline:
+    """
+    단계별 산출물을 입력/설정의 fingerprint 아래에 저장하는 재시작 가능한 파이프라인
+    - fingerprint = hash(단계 이름, 버전, params, 입력 산출물들의 fingerprint)
+    - 같은 fingerprint의 산출물이 있으면 단계를 건너뛰고 작업 공간으로 복사만 함
+    - 중간에 실패해도 다시 실행하면 첫 번째로 바뀐(또는 실패한) 단계부터 이어서 실행
+    - 저장소는 작업 간에 공유 (CACHE_DIR/stages/)
+    - 단계 간 의존성(inputs)으로 그래프를 만들어 입력이 준비된 단계부터 동시에 실행
+    """
+
+    def __init__(self, stages, store_dir=None, name="pipeline"):
+        self.stages = stages
+        self.name = name
+        self.store_dir = store_dir or get_cache_dir("stages")
+        self.timings = {}  # {단계 이름: 실행 시간(초)}, 이전 결과를 재사용한 단계는 0
+        self._timings_lock = threading.Lock()
+
+    def run(self, job, artifacts=None):
+        """
+        모든 단계를 실행하고 {산출물 이름: 값} 반환
+        - artifacts: 파이프라인 밖에서 주어지는 산출물 {이름: 파일 경로} (내용 해시가 fingerprint)
+        - 각 단계는 입력 산출물을 만드는 단계가 모두 끝나면 바로 시작 (나머지 단계와 동시에 실행)
+        - 한 단계가 실패하면 아직 시작하지 않은 단계는 취소하고 예외를 그대로 발생
+        - 실행 전체와 단계별 실행 기록(span)은 작업 공간의 trace.jsonl에 남음
+        """
+        with span(self.name, kind="pipeline", job=job):
+            return self._run(job, artifacts)
+
+    def _run(self, job, artifacts):
+        values = {}
+        fingerprints = {}
+        for name, path in (artifacts or {}).items():
+            values[name] = path
+            fingerprints[name] = file_fingerprint(path)
+
+        producers = {}  # 산출물 이름 -> 만드는 단계의 Future
+        futures = []
+        self.timings = {}
+        started = time.perf_counter()
+
+        # 모든 단계를 한꺼번에 제출하고 각 단계는 입력 Future를 기다림 (단계 수만큼 스레드를 두므로 교착 없음)
+        threads = ThreadPoolExecutor(max_workers=max(1, len(self.stages)))
+        # 작업 프로세스 풀은 실행마다 만들지 않고 공유 풀을 재사용 (이번 실행에서 제출한 작업만 따로 기록)
+        processes = None
+        process_futures = []
+        if any(stage.executor == "process" for stage in self.stages):
+            processes = get_process_pool()
+
+        try:
+            for stage in self.stages:
+                missing = [artifact for artifact in stage.inputs.values() if artifact not in fingerprints]
+                if missing:
+                    raise ValueError(f"[{stage.name}] 앞 단계에서 만들지 않은 입력: {missing}")
+
+                # fingerprint는 입력의 fingerprint만으로 정해지므로 앞 단계가 끝나기 전에도 계산 가능
+                fingerprint = stage.fingerprint(fingerprints)
+                dependencies = {artifact: producers.get(artifact) for artifact in stage.inputs.values()}
+                future = threads.submit(propagate(self._execute), stage, fingerprint, values, dependencies, job, processes, process_futures)
+                futures.append(future)
+                for name in stage.outputs:
+                    fingerprints[name] = hash_key(fingerprint, name)
+                    producers[name] = future
+
+            done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in futures:
+                if future in done and future.exception() is not None:
+                    raise future.exception()
+
+            for future in futures:
+                values.update(future.result())
+        except BaseException:
+            # 실행 중인 단계는 끝날 때까지 기다리지 않고 바로 예외 전달
+            threads.shutdown(wait=False, cancel_futures=True)
+            # 공유 풀은 닫지 않고 이번 실행에서 제출한 작업 중 아직 시작하지 않은 것만 취소
+            for future in process_futures:
+                future.cancel()
+            raise
+
+        threads.shutdown()
+        self.print_timings(time.perf_counter() - started)
+        return values
+
+    def _execute(self, stage, fingerprint, values, dependencies, job, processes, process_futures):
+        """입력이 준비되면 단계 하나를 실행(또는 저장소에서 복원)하고 {산출물 이름: 값} 반환"""
+        kwargs = {}
+        for arg, artifact in stage.inputs.items():
+            producer = dependencies[artifact]
+            kwargs[arg] = producer.result()[artifact] if producer is not None else values[artifact]
+
+        print(stage.description)
+        with span(stage.name, kind="stage", description=stage.description, executor=stage.executor, fingerprint=fingerprint[:12]) as stage_span:
+            outputs = self._restore(stage, fingerprint, job)
+            if outputs is None:
+                started = time.perf_counter()
+                if stage.executor == "process":
+                    # 작업 프로세스의 CPU 시간은 그 프로세스에서 잰 값을 사용
+                    future = processes.submit(_call_stage_measured, stage.func, kwargs, stage.params, job)
+                    process_futures.append(future)
+                    try:
+                        result, stage_span.cpu = future.result()
+                    except BrokenProcessPool:
+                        # 작업 프로세스가 죽은 풀은 다음 실행에서 새로 만들도록 버림
+                        discard_process_pool(processes)
+                        raise
+                else:
+                    result = _call_stage(stage.func, kwargs, stage.params, job)
+                outputs = result if len(stage.outputs) > 1 else {next(iter(stage.outputs)): result}
+                self._store(stage, fingerprint, outputs)
+                elapsed = time.perf_counter() - started
+                print(f"   ⏱️ [{stage.name}] {elapsed:.1f}s")
+            else:
+                elapsed = 0.0
+                stage_span.add(restored=True, cache_hits=1)
+                print(f"   ⏭️ [{stage.name}] 이전 결과 재사용 ({fingerprint[:12]})")
+
+        with self._timings_lock:
+            self.timings[stage.name] = elapsed
+        job.check_quota()
+        return {name: outputs[name] for name in stage.outputs}
+
+    def print_timings(self, total):
+        """단계별 실행 시간과 전체 소요 시간 출력 (동시에 실행된 만큼 합계보다 전체 시간이 짧음)"""
+        print("⏱️ 단계별 실행 시간")
+        for stage in self.stages:
+            if stage.name in self.timings:
+                print(f"   {stage.name:<16} {self.timings[stage.name]:8.1f}s")
+        print(f"   {'(합계)':<16} {sum(self.timings.values()):8.1f}s")
+        print(f"   {'(전체)':<16} {total:8.1f}s")
+
+    def _entry_dir(self, stage, fingerprint):
+        return os.path.join(self.store_dir, stage.name, fingerprint)
+
+    def _restore(self, stage, fingerprint, job):
+        entry_dir = self._entry_dir(stage, fingerprint)
+        manifest_path = os.path.join(entry_dir, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return None
+
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        outputs = {}
+        for name, kind in stage.outputs.items():
+            if name not in manifest:
+                return None
+            if kind == "file":
+                # 작업 공간의 파일을 나중에 수정해도 저장소가 바뀌지 않도록 복사
+                target = job.path(manifest[name])
+                shutil.copyfile(os.path.join(entry_dir, manifest[name]), target)
+                outputs[name] = target
+            else:
+                outputs[name] = manifest[name]
+
+        os.utime(entry_dir)  # 마지막 사용 시각 갱신
+        return outputs
+
+    def _store(self, stage, fingerprint, outputs):
+        entry_dir = self._entry_dir(stage, fingerprint)
+        temp_dir = f"{entry_dir}.{uuid.uuid4().hex[:8]}.tmp"
+        os.makedirs(temp_dir)
+
+        manifest = {}
+        for name, kind in stage.outputs.items():
+            value = outputs[name]
+            if kind == "file":
+                if value is None or not os.path.exists(value):
+                    # 산출물이 없으면 저장하지 않음 (다음 실행에서 다시 시도)
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+                    return
+                manifest[name] = os.path.basename(value)
+                shutil.copyfile(value, os.path.join(temp_dir, manifest[name]))
+            else:
+                manifest[name] = value
+
+        with open(os.path.join(temp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(temp_dir, entry_dir)
+
+def _call_stage(func, kwargs, params, job):
+    # 작업 프로세스에서도 호출되므로 모듈 최상위 함수로 둠
+    return func(**kwargs, **params, job=job)
+
+def _call_stage_measured(func, kwargs, params, job):
+    """작업 프로세스에서 실행하고 (결과, 이 프로세스에서 사용한 CPU 시간) 반환"""
+    started = time.process_time()
+    result = _call_stage(func, kwargs, params, job)
+    return result, time.process_time() - started
+
+def file_fingerprint(path):
+    """파일 내용의 sha256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def prune_stage_store(max_age_hours=STAGE_CACHE_MAX_AGE_HOURS, store_dir=None):
+    """마지막 사용 후 `max_age_hours`가 지난 단계 산출물 삭제"""
+    store_dir = store_dir or get_cache_dir("stages")
+    deadline = time.time() - max_age_hours * 3600
+    removed = []
+    for stage_name in os.listdir(store_dir):
+        stage_dir = os.path.join(store_dir, stage_name)
+        if not os.path.isdir(stage_dir):
+            continue
+        for fingerprint in os.listdir(stage_dir):
+            entry_dir = os.path.join(stage_dir, fingerprint)
+            if os.path.getmtime(entry_dir) < deadline:
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                removed.append(entry_dir)
+    return removed
@@ -0,0 +1,40 @@
+"""
+프로세스 안에서 계속 재사용하는 spawn 작업 프로세스 풀
+- 풀을 실행마다 새로 만들면 작업 프로세스 시작(인터프리터 + import) 비용을 매번 다시 냄 → 크기별로 하나만 만들어서 공유
+- spawn 작업 프로세스는 시작할 때 실행 중인 메인 모듈을 다시 import하므로,
+  진입점은 `if __name__ == "__main__":` 안에서만 실행하거나 `python -m ui`처럼 `__main__.py`로 실행해야 함
+"""
+from concurrent.futures import ProcessPoolExecutor
+import atexit
+import multiprocessing
+import os
+import threading
+
+# 작업 프로세스 수 -> 공유 풀
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_process_pool(max_workers=None):
+    """max_workers(기본 CPU 코어 수)개 작업 프로세스의 공유 풀 (처음 호출할 때 생성, 작업 프로세스는 필요할 때 시작)"""
+    max_workers = max_workers or os.cpu_count() or 1
+    with _pools_lock:
+        pool = _pools.get(max_workers)
+        if pool is None:
+            pool = _pools[max_workers] = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return pool
+
+def discard_process_pool(pool):
+    """작업 프로세스가 죽어서 깨진(BrokenProcessPool) 풀을 버림 (다음 get_process_pool에서 새로 생성)"""
+    with _pools_lock:
+        for key, value in list(_pools.items()):
+            if value is pool:
+                del _pools[key]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+@atexit.register
+def shutdown_process_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -1,11 +1,14 @@
 from video_processing import re, get_file_path
 
-def create_srt(transcription):
+# 화자 정보 줄 (예: SPEAKER_00, Unknown)
+SPEAKER_LINE_PATTERN = re.compile(r"^(SPEAKER_\d+|Unknown)$")
+
+def create_srt(transcription, job=None):
     if "segments" not in transcription:
         print("⚠️ 변환된 자막 데이터가 없습니다.")
         return
     
-    output_path = get_file_path("transcription.srt")
+    output_path = get_file_path("transcription.srt", job)
 
     with open(output_path, "w", encoding="utf-8") as f:
         for idx, segment in enumerate(transcription["segments"]):
@@ -27,30 +30,75 @@ def seconds_to_srt_time(seconds):
     return f"{hours:02}:{minutes:02}:{seconds:02},{millisec:03}"
 
 def parse_srt(srt_file):
-    srt_pattern = re.compile(
-        r"(\d+)\s*\n"  # 인덱스 번호
-        r"(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\s*\n"  # 타임스탬프
-        r"([^\n]+)\n"  # Speaker 정보 (한 줄)
-        r"([\s\S]+?)(?=\n\d+\s*\n|\Z)"  # 자막 내용
-    )
-
     with open(srt_file, "r", encoding="utf-8") as file:
         content = file.read()
 
-    matches = srt_pattern.findall(content)
-    subtitles = []
+    return [
+        {"start": start_ms / 1000, "end": end_ms / 1000, "speaker": speaker, "text": text}
+        for start_ms, end_ms, speaker, text in parse_srt_cues(content)
+    ]
 
-    for _, start, end, speaker, text in matches:
-        start_seconds = srt_time_to_seconds(start)
-        end_seconds = srt_time_to_seconds(end)
-        text = text.strip().replace("\n", " ")
-        speaker = speaker if speaker else "Unknown"
+def parse_srt_cues(content):
+    """
+    SRT 내용 → [(시작 ms, 종료 ms, 화자, 텍스트)]
+    - 블록 구분은 split_srt_blocks와 같음 (자막 파서는 이것 하나만 사용)
+    - 여러 줄 텍스트는 공백으로 이어 붙이고, 화자 줄이 없으면 "Unknown"
+    """
+    cues = []
+    for block in split_srt_blocks(content):
+        if block["timestamp"] is None:
+            continue
+        start, end = (part.strip() for part in block["timestamp"].split("-->"))
+        text = " ".join(line.strip() for line in block["lines"] if line.strip())
+        cues.append((srt_time_to_ms(start), srt_time_to_ms(end), block["speaker"] or "Unknown", text))
+    return cues
 
-        subtitles.append({"start": start_seconds, "end": end_seconds, "speaker": speaker, "text": text})
+def srt_time_to_ms(time_str):
+    hours, minutes, rest = time_str.split(":")
+    seconds, millis = rest.split(",")
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis)
 
-    return subtitles
+def ms_to_srt_time(ms):
+    seconds, millis = divmod(int(ms), 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02}:{minutes:02}:{seconds:02},{millis:03}"
 
 def srt_time_to_seconds(time_str):
     hours, minutes, sec_millis = time_str.split(":")
     seconds, millis = map(int, sec_millis.split(","))
-    return int(hours) * 3600 + int(minutes) * 60 + seconds + millis / 1000
\ No newline at end of file
+    return int(hours) * 3600 + int(minutes) * 60 + seconds + millis / 1000
+
+def split_srt_blocks(content):
+    """
+    SRT 내용을 빈 줄 기준 블록으로 나눔
+    -> [{"index": "1", "timestamp": "00:00:00,000 --> 00:00:01,000", "speaker": "SPEAKER_00", "lines": ["텍스트", ...]}, ...]
+    - 타임스탬프 다음 줄은 화자 정보로 취급 (텍스트가 한 줄뿐이고 화자 형식이 아니면 텍스트로 취급)
+    - 형식에 맞지 않는 블록은 "lines"만 채워서 그대로 보존
+    """
+    blocks = []
+    for raw_block in re.split(r"\n\s*\n", content.strip()):
+        lines = [line.rstrip() for line in raw_block.strip().split("\n")]
+        if not lines or lines == [""]:
+            continue
+
+        block = {"index": None, "timestamp": None, "speaker": None, "lines": lines}
+        if len(lines) >= 2 and lines[0].strip().isdigit() and "-->" in lines[1]:
+            rest = lines[2:]
+            block["index"] = lines[0].strip()
+            block["timestamp"] = lines[1].strip()
+            if len(rest) >= 2 or (rest and SPEAKER_LINE_PATTERN.match(rest[0].strip())):
+                block["speaker"] = rest[0].strip()
+                rest = rest[1:]
+            block["lines"] = rest
+        blocks.append(block)
+
+    return blocks
+
+def join_srt_blocks(blocks):
+    """split_srt_blocks 결과를 다시 SRT 문자열로 변환"""
+    srt_blocks = []
+    for block in blocks:
+        header = [value for value in (block["index"], block["timestamp"], block["speaker"]) if value is not None]
+        srt_blocks.append("\n".join(header + block["lines"]) + "\n")
+    return "\n".join(srt_blocks)
\ No newline at end of file
@@ -0,0 +1,166 @@
+from video_processing import os, json, get_file_path
+from video_processing.srt_utils import parse_srt_cues, ms_to_srt_time
+import bisect
+import threading
+
+PROJECT_FILENAME = "subtitles.json"
+JOURNAL_FILENAME = "subtitles.journal"
+# 편집 기록이 이만큼 쌓이면 스냅샷으로 합치고 기록을 비움
+JOURNAL_COMPACT_THRESHOLD = 500
+
+# job_id -> 열려 있는 SubtitleDocument (UI 편집마다 다시 읽지 않도록)
+_open_documents = {}
+_open_documents_lock = threading.RLock()
+
+class Cue:
+    """자막 한 줄 (시각은 정수 ms)"""
+
+    __slots__ = ("start_ms", "end_ms", "speaker", "original", "translation")
+
+    def __init__(self, start_ms, end_ms, speaker="Unknown", original="", translation=""):
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.speaker = speaker
+        self.original = original
+        self.translation = translation
+
+    def __repr__(self):
+        return f"Cue({self.start_ms}, {self.end_ms}, {self.speaker!r}, {self.original!r}, {self.translation!r})"
+
+    def to_list(self):
+        return [self.start_ms, self.end_ms, self.speaker, self.original, self.translation]
+
+class SubtitleDocument:
+    """
+    원본/번역 자막을 함께 담는 자막 표 (시작 시각 순서 유지, 시작 시각이 같은 자막은 하나)
+    - 작업 공간에 스냅샷(subtitles.json) + 편집 기록(subtitles.journal, 한 줄에 하나씩 추가만 함)으로 저장
+    - 편집은 기록 파일에 한 줄 추가하고 메모리의 표만 고치므로 파일 전체를 다시 읽거나 쓰지 않음
+    - SRT 파일은 export_srt로 필요할 때만 만듦
+    """
+
+    def __init__(self, cues=None, job=None):
+        self.cues = sorted(cues or [], key=lambda cue: cue.start_ms)
+        self._starts = [cue.start_ms for cue in self.cues]
+        self.job = job
+        self._journal_entries = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.cues)
+
+    @classmethod
+    def from_srt_files(cls, original_path, translation_path=None, job=None):
+        """원본 자막과 번역 자막을 같은 순서의 블록끼리 묶어서 생성"""
+        originals = read_srt_cues(original_path)
+        translations = read_srt_cues(translation_path) if translation_path and os.path.exists(translation_path) else []
+        cues = []
+        for i, (start_ms, end_ms, speaker, text) in enumerate(originals):
+            translation = translations[i][3] if i < len(translations) else ""
+            cues.append(Cue(start_ms, end_ms, speaker, text, translation))
+        return cls(cues, job)
+
+    @classmethod
+    def load(cls, job):
+        """작업 공간의 스냅샷을 읽고 편집 기록을 순서대로 적용"""
+        with open(get_file_path(PROJECT_FILENAME, job), "r", encoding="utf-8") as f:
+            document = cls([Cue(*values) for values in json.load(f)["cues"]], job)
+
+        journal_path = get_file_path(JOURNAL_FILENAME, job)
+        if os.path.exists(journal_path):
+            with open(journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        document._apply(json.loads(line))
+                        document._journal_entries += 1
+        return document
+
+    @classmethod
+    def open(cls, job):
+        """
+        작업의 자막 문서를 반환 (한 번 연 문서는 메모리에 두고 재사용)
+        - 프로젝트 파일이 없는 이전 작업은 작업 공간의 SRT 파일로 만들어서 저장
+        """
+        with _open_documents_lock:
+            document = _open_documents.get(job.job_id)
+            if document is None:
+                if os.path.exists(job.path(PROJECT_FILENAME)):
+                    document = cls.load(job)
+                else:
+                    document = cls.from_srt_files(job.path("transcription_refined.srt"), job.path("translated.srt"), job)
+                    document.save()
+                _open_documents[job.job_id] = document
+            return document
+
+    def save(self):
+        """현재 표를 스냅샷으로 저장하고 편집 기록을 비움"""
+        path = get_file_path(PROJECT_FILENAME, self.job)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"cues": [cue.to_list() for cue in self.cues]}, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+        journal_path = get_file_path(JOURNAL_FILENAME, self.job)
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+        self._journal_entries = 0
+        if self.job is not None:
+            with _open_documents_lock:
+                _open_documents[self.job.job_id] = self
+
+    def upsert(self, start_ms, end_ms, speaker, original, translation):
+        """시작 시각이 같은 자막이 있으면 바꾸고 없으면 추가 (편집 기록에 한 줄 추가)"""
+        self._record({"op": "upsert", "cue": [start_ms, end_ms, speaker, original, translation]})
+
+    def delete(self, start_ms):
+        self._record({"op": "delete", "start_ms": start_ms})
+
+    def _record(self, entry):
+        with self._lock:
+            self._apply(entry)
+            if self.job is None:
+                return
+            with open(get_file_path(JOURNAL_FILENAME, self.job), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._journal_entries += 1
+            if self._journal_entries >= JOURNAL_COMPACT_THRESHOLD:
+                self.save()
+
+    def _apply(self, entry):
+        if entry["op"] == "upsert":
+            cue = Cue(*entry["cue"])
+            i = bisect.bisect_left(self._starts, cue.start_ms)
+            if i < len(self._starts) and self._starts[i] == cue.start_ms:
+                self.cues[i] = cue
+            else:
+                self._starts.insert(i, cue.start_ms)
+                self.cues.insert(i, cue)
+        elif entry["op"] == "delete":
+            i = bisect.bisect_left(self._starts, entry["start_ms"])
+            if i < len(self._starts) and self._starts[i] == entry["start_ms"]:
+                del self._starts[i]
+                del self.cues[i]
+
+    def to_srt(self, field="translation"):
+        """field("original" | "translation") 텍스트로 SRT 문자열 생성"""
+        return "\n".join(
+            f"{i}\n{ms_to_srt_time(cue.start_ms)} --> {ms_to_srt_time(cue.end_ms)}\n{cue.speaker}\n{getattr(cue, field)}\n"
+            for i, cue in enumerate(self.cues, 1)
+        )
+
+    def export_srt(self, path, field="translation"):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_srt(field))
+        return path
+
+    def export_job_srt_files(self):
+        """재생성 단계에서 읽는 작업 공간의 SRT 파일(원본/번역)을 현재 내용으로 다시 만듦"""
+        return (
+            self.export_srt(get_file_path("transcription_refined.srt", self.job), "original"),
+            self.export_srt(get_file_path("translated.srt", self.job), "translation"),
+        )
+
+def read_srt_cues(path):
+    """SRT 파일 → [(시작 ms, 종료 ms, 화자, 텍스트)] (여러 줄 텍스트는 공백으로 이어 붙임)"""
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    return parse_srt_cues(content)
@@ -0,0 +1,95 @@
+from video_processing import os, np, AudioSegment
+
+OVERLAP_MODES = ("truncate", "mix")
+
+class Timeline:
+    """
+    미리 할당한 하나의 PCM(int16) 버퍼에 클립을 샘플 위치 기준으로 배치하는 타임라인
+    - overlap="truncate": 겹치는 구간은 나중에 배치한 클립으로 덮어씀
+    - overlap="mix": 겹치는 구간은 더한 뒤 int16 범위로 자름
+    - 버퍼보다 긴 클립이 들어오면 필요한 만큼만 버퍼를 늘림
+    """
+
+    def __init__(self, duration_ms, sample_rate=44100, channels=1, overlap="truncate"):
+        if overlap not in OVERLAP_MODES:
+            raise ValueError(f"overlap must be one of {OVERLAP_MODES}: {overlap}")
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.overlap = overlap
+        self.buffer = np.zeros((self.ms_to_samples(duration_ms), channels), dtype=np.int16)
+        # 실제로 클립이 채워진 마지막 샘플 위치
+        self.end_sample = 0
+
+    def ms_to_samples(self, ms):
+        return int(round(ms * self.sample_rate / 1000))
+
+    @property
+    def duration_ms(self):
+        return self.end_sample * 1000 / self.sample_rate
+
+    def place(self, samples, start_ms):
+        """int16 샘플 배열 (N,) 또는 (N, channels)을 start_ms 위치에 배치하고 (시작, 끝) 샘플 위치 반환"""
+        samples = np.asarray(samples, dtype=np.int16)
+        if samples.ndim == 1:
+            samples = samples[:, None]
+        if samples.shape[1] != self.channels:
+            raise ValueError(f"expected {self.channels} channel(s), got {samples.shape[1]}")
+
+        start = self.ms_to_samples(start_ms)
+        end = start + len(samples)
+        if end > len(self.buffer):
+            self.resize(end)
+
+        if self.overlap == "mix":
+            mixed = self.buffer[start:end].astype(np.int32) + samples
+            self.buffer[start:end] = np.clip(mixed, -32768, 32767)
+        else:
+            self.buffer[start:end] = samples
+
+        self.end_sample = max(self.end_sample, end)
+        return start, end
+
+    def resize(self, num_samples):
+        """버퍼를 num_samples 길이로 늘림"""
+        if num_samples > len(self.buffer):
+            padding = np.zeros((num_samples - len(self.buffer), self.channels), dtype=np.int16)
+            self.buffer = np.concatenate([self.buffer, padding])
+
+    def clear(self, start_sample, end_sample):
+        """[start_sample, end_sample) 구간을 무음으로"""
+        self.buffer[start_sample:end_sample] = 0
+
+    @classmethod
+    def load(cls, path, sample_rate=44100, channels=1, overlap="truncate"):
+        """저장된 .npy 타임라인을 메모리 맵으로 열어서 바뀐 구간만 수정할 수 있게 함"""
+        timeline = cls(0, sample_rate=sample_rate, channels=channels, overlap=overlap)
+        timeline.buffer = np.load(path, mmap_mode="r+")
+        timeline.end_sample = len(timeline.buffer)
+        return timeline
+
+    def save(self, path):
+        if isinstance(self.buffer, np.memmap) and os.path.abspath(self.buffer.filename) == os.path.abspath(path):
+            # 메모리 맵으로 연 파일이면 바뀐 페이지만 기록
+            self.buffer.flush()
+        else:
+            np.save(path, self.buffer)
+
+    def place_segment(self, segment, start_ms):
+        self.place(audio_segment_to_array(segment, self.sample_rate, self.channels), start_ms)
+
+    def to_audio_segment(self):
+        return AudioSegment(
+            data=self.buffer[:self.end_sample].tobytes(),
+            sample_width=2,
+            frame_rate=self.sample_rate,
+            channels=self.channels,
+        )
+
+    def export(self, output_path, format="mp3"):
+        self.to_audio_segment().export(output_path, format=format)
+        return output_path
+
+def audio_segment_to_array(segment, sample_rate=44100, channels=1):
+    """pydub AudioSegment → int16 배열 (N, channels)"""
+    segment = segment.set_frame_rate(sample_rate).set_channels(channels).set_sample_width(2)
+    return np.frombuffer(segment.raw_data, dtype=np.int16).reshape(-1, channels)
@@ -0,0 +1,67 @@
+from video_processing import np
+from video_processing.process_pool import get_process_pool
+import os
+
+# WSOLA 분석 창 길이 / 최적 위치를 찾는 범위 (초)
+WINDOW_SECONDS = 0.03
+TOLERANCE_SECONDS = 0.01
+# 클립 길이 합계가 이보다 짧으면 작업 프로세스에 넘기지 않고 현재 프로세스에서 처리 (초)
+# (현재 프로세스에서 오디오 1분에 약 0.5초 걸리므로 그보다 짧은 배치는 전송/pickle 비용이 더 큼)
+MIN_POOL_SECONDS = 120
+
+def time_stretch(samples, sample_rate, speed_factor):
+    """
+    WSOLA(Waveform Similarity Overlap-Add)로 음높이를 유지한 채 speed_factor배 빠르게 재생되는 mono int16 배열 반환
+    - 출력 길이는 round(입력 길이 / speed_factor)
+    - 각 프레임은 이전 프레임의 자연스러운 연속과 가장 비슷한 위치(정규화 상호상관 최대)에서 가져와 위상 끊김을 줄임
+    """
+    x = np.asarray(samples, dtype=np.float32)
+    out_length = int(round(len(x) / speed_factor))
+    if speed_factor == 1 or len(x) == 0:
+        return np.asarray(samples, dtype=np.int16).copy()
+
+    window_size = max(2, int(WINDOW_SECONDS * sample_rate) // 2 * 2)
+    hop = window_size // 2
+    tolerance = max(1, int(TOLERANCE_SECONDS * sample_rate))
+    window = np.hanning(window_size).astype(np.float32)
+
+    # 경계에서도 같은 방식으로 처리할 수 있도록 앞뒤에 무음 추가
+    pad = tolerance + window_size
+    x = np.concatenate([np.zeros(pad, np.float32), x, np.zeros(pad + int(hop * speed_factor) + window_size, np.float32)])
+    squared_cumsum = np.concatenate(([0.0], np.cumsum(np.square(x, dtype=np.float64))))
+
+    frame_count = out_length // hop + 1
+    output = np.zeros(frame_count * hop + window_size, np.float32)
+    weights = np.zeros_like(output)
+
+    position = pad
+    for k in range(frame_count):
+        if k > 0:
+            # 이전 프레임을 그대로 이어 갔을 때의 파형과 가장 비슷한 위치를 원래 위치 ±tolerance 안에서 찾음
+            template = x[position + hop:position + hop + window_size]
+            nominal = pad + int(round(k * hop * speed_factor))
+            region = x[nominal - tolerance:nominal + tolerance + window_size]
+            correlation = np.correlate(region, template, mode="valid")
+            starts = np.arange(nominal - tolerance, nominal + tolerance + 1)
+            energy = squared_cumsum[starts + window_size] - squared_cumsum[starts]
+            position = int(starts[np.argmax(correlation / np.sqrt(energy + 1e-9))])
+
+        output[k * hop:k * hop + window_size] += x[position:position + window_size] * window
+        weights[k * hop:k * hop + window_size] += window
+
+    output = output[:out_length] / np.maximum(weights[:out_length], 1e-3)
+    return np.clip(np.round(output), -32768, 32767).astype(np.int16)
+
+def stretch_clips(clips, sample_rate, speed_factors, workers=None):
+    """
+    여러 클립을 한 번에 배속 조정해서 같은 순서로 반환
+    - workers가 1이면 항상 현재 프로세스에서 처리, 0(또는 None)이면 CPU 코어 수
+    - 클립 길이 합계가 MIN_POOL_SECONDS 이상일 때만 공유 작업 프로세스 풀에 나눠서 처리 (풀은 렌더링 간에 재사용)
+    """
+    workers = workers or os.cpu_count() or 1
+    total_samples = sum(len(clip) for clip in clips)
+    if workers <= 1 or len(clips) < 2 or total_samples < MIN_POOL_SECONDS * sample_rate:
+        return [time_stretch(clip, sample_rate, factor) for clip, factor in zip(clips, speed_factors)]
+
+    executor = get_process_pool(workers)
+    return list(executor.map(time_stretch, clips, [sample_rate] * len(clips), speed_factors))
@@ -0,0 +1,259 @@
+"""
+단계/외부 호출 단위 실행 기록(span)
+
+    with span("deepl.translate", chars=len(text)) as s:
+        response = requests.post(...)
+        s.add(bytes_in=len(response.content))
+
+- span마다 실행 시간, CPU 시간(span을 연 스레드 기준), 주고받은 바이트, 재시도, 과금 글자 수, 캐시 적중을 기록
+- 끝난 span은 작업 공간의 trace.jsonl(과 TRACE_LOG_FILE)에 한 줄씩 추가하고, 이름별 합계는 Prometheus 텍스트 형식으로 제공
+- 현재 작업/부모 span은 contextvars로 전달되므로 스레드 풀에 넘기는 함수는 `propagate`로 감쌈
+- Gradio 진행 상황 표시도 같은 기록(`progress_text`)을 사용
+"""
+from video_processing import os, json
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import contextvars
+import threading
+import time
+import uuid
+from config import TRACE_LOG_FILE
+
+TRACE_FILENAME = "trace.jsonl"
+# span에서 합산하는 값 (Prometheus 카운터 이름에도 사용)
+COUNTERS = ("bytes_in", "bytes_out", "retries", "chars", "cache_hits")
+# 진행 상황 표시를 위해 메모리에 남겨 두는 작업 수 / 작업당 span 수
+MAX_TRACKED_JOBS = 32
+MAX_SPANS_PER_JOB = 5000
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+_lock = threading.Lock()
+# job_id -> 해당 작업의 span (진행 중 포함, 시작 순서)
+_job_spans = OrderedDict()
+# (kind, name, status) -> {"count", "wall", "cpu", 카운터들...}
+_totals = {}
+_active = {}
+
+class Span:
+    __slots__ = ("span_id", "parent_id", "root_id", "job_id", "kind", "name", "attrs",
+                 "started_at", "wall", "cpu", "status", "error", "bytes_in", "bytes_out", "retries", "chars", "cache_hits",
+                 "trace_path", "_started", "_cpu_started")
+
+    def __init__(self, name, kind="call", job=None, parent=None, **attrs):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.root_id = parent.root_id if parent else self.span_id
+        self.job_id = job.job_id if job is not None else (parent.job_id if parent else None)
+        # 끝난 span을 추가할 작업 공간의 trace.jsonl
+        self.trace_path = job.path(TRACE_FILENAME) if job is not None else (parent.trace_path if parent else None)
+        self.kind = kind
+        self.name = name
+        self.attrs = {}
+        self.started_at = time.time()
+        self.wall = None
+        self.cpu = None
+        self.status = "running"
+        self.error = None
+        for counter in COUNTERS:
+            setattr(self, counter, 0)
+        self._started = time.perf_counter()
+        self._cpu_started = time.thread_time()
+        self.add(**attrs)
+
+    def add(self, **values):
+        """카운터(bytes_in, retries 등)는 더하고, 그 외 값은 attrs에 저장"""
+        for key, value in values.items():
+            if key in COUNTERS:
+                setattr(self, key, getattr(self, key) + value)
+            else:
+                self.attrs[key] = value
+
+    def elapsed(self):
+        return self.wall if self.wall is not None else time.perf_counter() - self._started
+
+    def finish(self, status="ok", error=None):
+        self.wall = time.perf_counter() - self._started
+        # CPU 시간을 직접 잰 경우(작업 프로세스에서 실행한 단계)는 유지
+        if self.cpu is None:
+            self.cpu = time.thread_time() - self._cpu_started
+        self.status = status
+        self.error = error
+
+    def to_dict(self):
+        return {
+            "span_id": self.span_id, "parent_id": self.parent_id, "root_id": self.root_id, "job_id": self.job_id,
+            "kind": self.kind, "name": self.name, "started_at": self.started_at,
+            "wall": round(self.elapsed(), 6), "cpu": round(self.cpu or 0, 6), "status": self.status, "error": self.error,
+            **{counter: getattr(self, counter) for counter in COUNTERS},
+            "attrs": self.attrs,
+        }
+
+class _DetachedSpan:
+    """열린 span이 없을 때 current_span()이 반환하는 대리 객체 (기록하지 않음)"""
+
+    def add(self, **values):
+        pass
+
+_detached = _DetachedSpan()
+
+def current_span():
+    return _current_span.get() or _detached
+
+@contextmanager
+def span(name, kind="call", job=None, **attrs):
+    """
+    span을 열고 끝날 때 기록 (예외가 나면 status="error"로 기록하고 예외는 그대로 전달)
+    - job을 주지 않으면 부모 span의 작업을 이어받음
+    """
+    parent = _current_span.get()
+    current = Span(name, kind, job, parent, **attrs)
+    _start(current)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish("error", f"{type(e).__name__}: {e}")
+        raise
+    else:
+        # 예외 없이 실패한 경우(HTTP 오류 응답 등)는 span.error에 사유를 넣어 두면 status="error"로 기록
+        current.finish("error" if current.error else "ok", current.error)
+    finally:
+        _current_span.reset(token)
+        _end(current)
+
+def propagate(func):
+    """현재 작업/span을 스레드 풀의 다른 스레드에서도 이어서 사용하도록 func를 감쌈"""
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # 같은 Context를 여러 스레드에서 동시에 실행할 수 없으므로 호출마다 복사
+        return context.copy().run(func, *args, **kwargs)
+    return run
+
+def _start(current):
+    with _lock:
+        _active[current.span_id] = current
+        if current.job_id is not None:
+            spans = _job_spans.get(current.job_id)
+            if spans is None:
+                spans = _job_spans[current.job_id] = deque(maxlen=MAX_SPANS_PER_JOB)
+                while len(_job_spans) > MAX_TRACKED_JOBS:
+                    _job_spans.popitem(last=False)
+            _job_spans.move_to_end(current.job_id)
+            spans.append(current)
+
+def _end(current):
+    record = current.to_dict()
+    with _lock:
+        _active.pop(current.span_id, None)
+        totals = _totals.setdefault((current.kind, current.name, current.status), dict.fromkeys(("count", "wall", "cpu", *COUNTERS), 0))
+        totals["count"] += 1
+        totals["wall"] += record["wall"]
+        totals["cpu"] += record["cpu"]
+        for counter in COUNTERS:
+            totals[counter] += record[counter]
+
+    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    for path in filter(None, (current.trace_path, TRACE_LOG_FILE)):
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as e:
+            print(f"⚠️ 실행 기록 저장 실패 ({path}): {e}")
+
+def job_spans(job_id):
+    with _lock:
+        return list(_job_spans.get(job_id, ()))
+
+def read_trace(job):
+    """작업 공간의 trace.jsonl을 읽어서 span dict 리스트로 반환 (다른 프로세스에서 실행한 작업도 확인 가능)"""
+    path = job.path(TRACE_FILENAME)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def progress_text(job_id):
+    """작업의 가장 최근 실행(파이프라인 span) 기준 단계별 진행 상황과 외부 호출 요약"""
+    spans = job_spans(job_id) if job_id else []
+    runs = [s for s in spans if s.kind == "pipeline"]
+    if not runs:
+        return ""
+    run = runs[-1]
+    lines = []
+    calls = {}
+    for s in spans:
+        if s.root_id != run.span_id:
+            continue
+        if s.kind == "stage":
+            if s.status == "running":
+                lines.append(f"⏳ {s.attrs.get('description', s.name)} {s.elapsed():.0f}s")
+            elif s.status == "error":
+                lines.append(f"❌ [{s.name}] {s.error}")
+            elif s.attrs.get("restored"):
+                lines.append(f"⏭️ [{s.name}] 이전 결과 재사용")
+            else:
+                lines.append(f"✅ [{s.name}] {s.elapsed():.1f}s")
+        elif s.kind == "call":
+            stats = calls.setdefault(s.name, [0, 0.0])
+            stats[0] += 1
+            stats[1] += s.elapsed()
+
+    state = {"running": "진행 중", "ok": "완료", "error": "실패"}[run.status]
+    lines.insert(0, f"{state} ({run.elapsed():.0f}s)")
+    if calls:
+        lines.append("외부 호출: " + ", ".join(f"{name} {count}회 {total:.1f}s" for name, (count, total) in sorted(calls.items())))
+    return "\n".join(lines)
+
+def render_prometheus():
+    """span 이름별 누적 값과 진행 중인 span 수를 Prometheus 텍스트 형식으로 반환"""
+    with _lock:
+        totals = {key: dict(values) for key, values in _totals.items()}
+        active = {}
+        for s in _active.values():
+            active[(s.kind, s.name)] = active.get((s.kind, s.name), 0) + 1
+
+    metrics = [("count", "span_count_total", "끝난 span 수"),
+               ("wall", "span_wall_seconds_total", "실행 시간 합계"),
+               ("cpu", "span_cpu_seconds_total", "CPU 시간 합계")]
+    metrics += [(counter, f"span_{counter}_total", f"{counter} 합계") for counter in COUNTERS]
+
+    lines = []
+    for key, metric, help_text in metrics:
+        lines.append(f"# HELP voice_builder_{metric} {help_text}")
+        lines.append(f"# TYPE voice_builder_{metric} counter")
+        for (kind, name, status), values in sorted(totals.items()):
+            lines.append(f'voice_builder_{metric}{{kind="{kind}",name="{_escape(name)}",status="{status}"}} {values[key]}')
+    lines.append("# HELP voice_builder_spans_active 진행 중인 span 수")
+    lines.append("# TYPE voice_builder_spans_active gauge")
+    for (kind, name), count in sorted(active.items()):
+        lines.append(f'voice_builder_spans_active{{kind="{kind}",name="{_escape(name)}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port, host="0.0.0.0"):
+    """http://host:port/metrics 로 render_prometheus() 결과를 제공하는 서버를 백그라운드 스레드에서 시작"""
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"📈 메트릭 서버: http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -1,52 +1,219 @@
-from video_processing import json, openai, SpeakerDiarization, get_file_path
-from config import OPEN_AI_TOKEN, HF_TOKEN
-
-diarization_pipeline = SpeakerDiarization.from_pretrained(
-    "pyannote/speaker-diarization-3.1",
-    use_auth_token=HF_TOKEN
-)
-
-def transcribe_audio_whisper(audio_file, whisper_prompt, num_speakers=None, model="whisper-1"):
-    client = openai.OpenAI(api_key=OPEN_AI_TOKEN)
-
-    # 🔹 OpenAI Whisper API 요청
-    with open(audio_file, "rb") as file:
-        response = client.audio.transcriptions.create(
-            model=model,
-            file=file,
-            response_format="verbose_json",
-            timestamp_granularities=["segment", "word"],
-            prompt=whisper_prompt
-        )
-
-    response_json = response.model_dump()
+from video_processing import os, json, np, openai, SpeakerDiarization, get_file_path
+from video_processing.model_server import is_model_server_running, request_model_server
+from video_processing.media import encode_audio_clip
+from video_processing.vad import condense_audio, should_condense
+from video_processing.cache import KeyValueStore, hash_key
+from video_processing.file_manager import get_cache_dir
+from video_processing.srt_utils import split_srt_blocks, join_srt_blocks
+from video_processing.tracing import span, current_span, propagate
+import re
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from config import OPEN_AI_TOKEN, HF_TOKEN, OPENAI_BASE_URL, WHISPER_CHUNK_SECONDS, WHISPER_CONCURRENCY, REFINE_WINDOW_BLOCKS, REFINE_CONCURRENCY
+
+# 청크 경계를 찾을 때 목표 지점 앞쪽으로 무음을 찾는 범위 (초)
+CHUNK_SEARCH_SECONDS = 30
+# 무음 판단용 에너지 계산 단위 (초)
+ENERGY_FRAME_SECONDS = 0.1
+# 자막 다듬기: 앞뒤로 문맥만 보여 줄 블록 수 / 구조가 틀린 응답 재시도 횟수 / 프롬프트가 바뀌면 올림(캐시 무효화)
+REFINE_CONTEXT_BLOCKS = 3
+REFINE_MAX_RETRIES = 2
+REFINE_PROMPT_VERSION = 1
+
+# 화자 분리 파이프라인은 처음 사용할 때 한 번만 로드
+_diarization_pipeline = None
+_diarization_pipeline_lock = threading.Lock()
+
+# 자막 다듬기 구간별 결과 캐시
+_refine_store = None
+_refine_store_lock = threading.Lock()
+
+def get_diarization_pipeline():
+    global _diarization_pipeline
+    with _diarization_pipeline_lock:
+        if _diarization_pipeline is None:
+            _diarization_pipeline = SpeakerDiarization.from_pretrained(
+                "pyannote/speaker-diarization-3.1",
+                use_auth_token=HF_TOKEN
+            )
+        return _diarization_pipeline
 
-    with open(get_file_path("transcription_whisper.json"), "w", encoding="utf-8") as f:
+def transcribe_audio_whisper(audio_file, whisper_prompt, num_speakers=None, model="whisper-1", job=None, speech_regions=None):
+    """
+    - speech_regions: VAD로 찾은 음성 구간. 주어지면 음성 구간만 이어 붙인 오디오로 전사/화자 분리하고
+      결과 타임스탬프를 원본 기준으로 되돌림 (인트로, 배경음악, 긴 무음 구간 비용 절약)
+    """
+    time_map = None
+    if speech_regions and should_condense(speech_regions, audio_file):
+        time_map = condense_audio(audio_file, speech_regions, get_file_path("speech_audio.wav", job))
+        audio_file = get_file_path("speech_audio.wav", job)
+        print(f"   🔇 음성 구간 {len(speech_regions)}개만 사용 ({sum(end - start for start, end in speech_regions):.1f}s)")
+
+    # 🔹 Whisper API 요청(네트워크)과 화자 분리(로컬 모델)는 서로 독립적이므로 동시에 실행
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        diarization_future = executor.submit(propagate(diarize_audio), audio_file, num_speakers=num_speakers)
+        response_json = transcribe_in_chunks(audio_file, whisper_prompt, model)
+        diarization_result = diarization_future.result()
+
+    if time_map is not None:
+        response_json = {
+            **response_json,
+            "segments": time_map.remap_items(response_json.get("segments") or []),
+            "words": time_map.remap_items(response_json.get("words") or []),
+        }
+        diarization_result = time_map.remap_items(diarization_result)
+
+    with open(get_file_path("transcription_whisper.json", job), "w", encoding="utf-8") as f:
         json.dump(response_json, f, indent=4, ensure_ascii=False)
 
-    # 🔹 화자 분리 수행 (Pyannote)
-    diarization_result = diarize_audio(audio_file, num_speakers=num_speakers)
-
-    with open(get_file_path("diarization_result.json"), "w", encoding="utf-8") as f:
+    with open(get_file_path("diarization_result.json", job), "w", encoding="utf-8") as f:
         json.dump(diarization_result, f, indent=4, ensure_ascii=False)
 
     # 🔹 화자 정보와 Whisper 텍스트 매칭
     speaker_segments = match_speakers_with_transcription(diarization_result, response_json)
 
-    output_path = get_file_path("transcription_whisper_speaker.json")
+    output_path = get_file_path("transcription_whisper_speaker.json", job)
     
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(speaker_segments, f, indent=4, ensure_ascii=False)
 
     return speaker_segments
 
+def get_openai_client():
+    # OPENAI_BASE_URL을 지정하면 로컬 대체 서버로 요청 (테스트/벤치마크용)
+    return openai.OpenAI(api_key=OPEN_AI_TOKEN, base_url=OPENAI_BASE_URL)
+
+def transcribe_in_chunks(audio_file, whisper_prompt, model="whisper-1", chunk_seconds=WHISPER_CHUNK_SECONDS, concurrency=WHISPER_CONCURRENCY):
+    """
+    16kHz Mono WAV를 무음 구간에서 청크로 나눠 압축(Opus) 업로드하고 동시에 전사한 뒤 타임스탬프를 이어 붙임
+    - 업로드 용량 제한(약 13분 분량의 WAV)과 상관없이 긴 오디오 처리 가능
+    - 청크가 하나면 요청도 한 번
+    """
+    chunks = plan_audio_chunks(audio_file, chunk_seconds)
+    print(f"   📤 Whisper 청크 {len(chunks)}개 전사 중...")
+
+    def transcribe(chunk):
+        start, duration = chunk
+        audio_bytes = encode_audio_clip(audio_file, start, duration)
+        return request_whisper_transcription(("audio.ogg", audio_bytes, "audio/ogg"), whisper_prompt, model)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as executor:
+        responses = list(executor.map(propagate(transcribe), chunks))
+
+    return stitch_transcriptions([(start, response) for (start, _), response in zip(chunks, responses)])
+
+def request_whisper_transcription(file, whisper_prompt, model="whisper-1"):
+    """
+    OpenAI Whisper API로 단어/세그먼트 타임스탬프가 포함된 전사 결과(dict) 요청
+    - file: 오디오 파일 경로 또는 (파일명, bytes, MIME 타입)
+    """
+    client = get_openai_client()
+
+    if isinstance(file, tuple):
+        upload = file
+    else:
+        with open(file, "rb") as f:
+            upload = (os.path.basename(file), f.read())
+
+    with span("openai.transcription", model=model, bytes_out=len(upload[1])) as call:
+        response = client.audio.transcriptions.create(
+            model=model,
+            file=upload,
+            response_format="verbose_json",
+            timestamp_granularities=["segment", "word"],
+            prompt=whisper_prompt
+        )
+        result = response.model_dump()
+        # Whisper는 오디오 길이(초)로 과금
+        call.add(audio_seconds=result.get("duration"), bytes_in=len(response.model_dump_json()))
+
+    return result
+
+def plan_audio_chunks(audio_file, chunk_seconds=WHISPER_CHUNK_SECONDS, search_seconds=CHUNK_SEARCH_SECONDS):
+    """
+    [(시작 초, 길이 초)] 리스트
+    - 청크 길이가 chunk_seconds를 넘지 않도록, 목표 지점 앞 search_seconds 안에서 가장 조용한 지점에서 자름
+    """
+    energy = frame_energy(audio_file)
+    total_frames = len(energy)
+    max_frames = max(1, int(chunk_seconds / ENERGY_FRAME_SECONDS))
+    search_frames = min(int(search_seconds / ENERGY_FRAME_SECONDS), max_frames // 2)
+
+    chunks = []
+    start = 0
+    while total_frames - start > max_frames:
+        target = start + max_frames
+        window = energy[target - search_frames:target]
+        cut = target - search_frames + int(np.argmin(window)) if len(window) else target
+        chunks.append((start * ENERGY_FRAME_SECONDS, (cut - start) * ENERGY_FRAME_SECONDS))
+        start = cut
+    with wave.open(audio_file, "rb") as source:
+        duration = source.getnframes() / source.getframerate()
+    chunks.append((start * ENERGY_FRAME_SECONDS, max(0.0, duration - start * ENERGY_FRAME_SECONDS)))
+    return chunks
+
+def frame_energy(audio_file, frame_seconds=ENERGY_FRAME_SECONDS, block_frames=1 << 20):
+    """16bit PCM WAV의 frame_seconds 단위 RMS 에너지 배열 (블록 단위로 읽어서 메모리 사용량 일정)"""
+    energies = []
+    with wave.open(audio_file, "rb") as source:
+        channels = source.getnchannels()
+        frame_size = max(1, int(source.getframerate() * frame_seconds))
+        block_frames = max(frame_size, block_frames - block_frames % frame_size)
+        while True:
+            data = source.readframes(block_frames)
+            if not data:
+                break
+            samples = np.frombuffer(data, dtype="<i2").reshape(-1, channels).mean(axis=1)
+            usable = len(samples) - len(samples) % frame_size
+            if usable:
+                frames = samples[:usable].reshape(-1, frame_size)
+                energies.append(np.sqrt(np.mean(np.square(frames), axis=1)))
+    return np.concatenate(energies) if energies else np.zeros(0)
+
+def stitch_transcriptions(parts):
+    """
+    [(청크 시작 초, 청크 전사 결과)]를 원본 오디오 기준 하나의 전사 결과로 합침
+    - segment/word 타임스탬프에 청크 시작 시각을 더하고 segment id를 다시 매김
+    """
+    if len(parts) == 1 and parts[0][0] == 0:
+        return parts[0][1]
+
+    texts, segments, words = [], [], []
+    duration = 0.0
+    for offset, response in parts:
+        if response.get("text"):
+            texts.append(response["text"].strip())
+        for segment in response.get("segments") or []:
+            segments.append({**segment, "id": len(segments), "start": segment["start"] + offset, "end": segment["end"] + offset})
+        for word in response.get("words") or []:
+            words.append({**word, "start": word["start"] + offset, "end": word["end"] + offset})
+        duration = max(duration, offset + (response.get("duration") or 0))
+
+    first = parts[0][1] if parts else {}
+    return {**first, "text": " ".join(texts), "duration": duration, "segments": segments, "words": words}
+
 def diarize_audio(audio_file, num_speakers=None):
-    """Pyannote를 사용하여 화자 분리 수행"""
+    """Pyannote를 사용하여 화자 분리 수행 (상주 모델 서버가 실행 중이면 서버에 요청)"""
+    with span("pyannote.diarize") as call:
+        if is_model_server_running():
+            try:
+                result = request_model_server("diarize", audio_file=os.path.abspath(audio_file), num_speakers=num_speakers)
+                call.add(model_server=True)
+                return result
+            except OSError as e:
+                print(f"⚠️ 모델 서버 연결 실패, 직접 실행합니다: {e}")
+                call.add(retries=1)
+
+        return diarize_audio_locally(audio_file, num_speakers=num_speakers)
+
+def diarize_audio_locally(audio_file, num_speakers=None):
+    """현재 프로세스에서 Pyannote 화자 분리 수행"""
 
     # 🔹 `num_speakers`가 지정된 경우, 해당 값으로 설정
     params = {"num_speakers": num_speakers} if num_speakers else {}
 
-    diarization_result = diarization_pipeline({"uri": "audio", "audio": audio_file}, **params)
+    diarization_result = get_diarization_pipeline()({"uri": "audio", "audio": audio_file}, **params)
     
     speaker_timestamps = []
     for speech_turn, track, speaker in diarization_result.itertracks(yield_label=True):
@@ -58,6 +225,55 @@ def diarize_audio(audio_file, num_speakers=None):
 
     return speaker_timestamps
 
+class DiarizationIndex:
+    """
+    화자 분리 구간을 시작 시각 기준으로 정렬해 두고 구간 검색을 O(log D)로 처리하는 인덱스
+    - 정렬된 시작 시각과 종료 시각의 누적 최댓값으로, 겹칠 수 있는 구간 범위를 이진 탐색으로 찾음
+    - 동률일 때는 원래 리스트에서 먼저 나온 화자를 선택 (기존 `max`/`min`과 동일)
+    """
+
+    def __init__(self, diarization_result):
+        self.speakers = [diarization["speaker"] for diarization in diarization_result]
+        starts = np.array([diarization["start"] for diarization in diarization_result], dtype=np.float64)
+        ends = np.array([diarization["end"] for diarization in diarization_result], dtype=np.float64)
+
+        self.order = np.argsort(starts, kind="stable")
+        self.starts = starts[self.order]
+        self.ends = ends[self.order]
+        # i번째까지의 구간 중 가장 늦게 끝나는 시각 (정렬되어 있으므로 이진 탐색 가능)
+        self.max_ends = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+    def best_overlap(self, start, end):
+        """[start, end]와 가장 많이 겹치는 화자. 겹치는 구간이 없으면 None"""
+        # lo 이전 구간은 모두 start 이전에 끝나고, hi 이후 구간은 모두 end 이후에 시작함
+        lo = np.searchsorted(self.max_ends, start, side="right")
+        hi = np.searchsorted(self.starts, end, side="left")
+        if lo >= hi:
+            return None
+
+        intersections = np.minimum(self.ends[lo:hi], end) - np.maximum(self.starts[lo:hi], start)
+        best = intersections.max()
+        if best <= 0:
+            return None
+        return self.speakers[self.order[lo:hi][intersections == best].min()]
+
+    def nearest_start(self, time):
+        """시작 시각이 `time`과 가장 가까운 화자. 구간이 없으면 None"""
+        if not self.speakers:
+            return None
+
+        i = np.searchsorted(self.starts, time)
+        neighbors = [self.starts[j] for j in (i - 1, i) if 0 <= j < len(self.starts)]
+        best = min(abs(value - time) for value in neighbors)
+
+        candidates = []
+        for value in neighbors:
+            if abs(value - time) == best:
+                lo = np.searchsorted(self.starts, value, side="left")
+                hi = np.searchsorted(self.starts, value, side="right")
+                candidates.append(self.order[lo:hi].min())
+        return self.speakers[min(candidates)]
+
 def match_speakers_with_transcription(
     diarization_result, whisper_response, fill_nearest=False
 ):
@@ -66,10 +282,21 @@ def match_speakers_with_transcription(
     - 문장(Sentence) 단위 및 단어(Word) 단위 화자 정보 추가
     - Whisper 응답에서 'segments'와 'words'가 따로 제공되므로 이를 병합
     - `fill_nearest=True` 시 가장 가까운 화자를 자동으로 할당
+    - 화자 구간과 단어를 정렬해 두고 이진 탐색하므로 O((S + W) log(D + W))
     """
     whisper_segments = whisper_response.get("segments", [])
     whisper_words = whisper_response.get("words", [])
 
+    index = DiarizationIndex(diarization_result)
+
+    # 🔹 시작/종료 시각이 있는 단어만 시작 시각 기준으로 정렬
+    valid_words = [i for i, word in enumerate(whisper_words) if word.get("start") and word.get("end")]
+    word_starts = np.array([whisper_words[i]["start"] for i in valid_words], dtype=np.float64)
+    word_order = np.argsort(word_starts, kind="stable")
+    sorted_word_starts = word_starts[word_order]
+    # 단어별 가장 많이 겹치는 화자 (여러 segment에 걸친 단어는 한 번만 계산)
+    word_best_speakers = {}
+
     segments = []
 
     for seg in whisper_segments:
@@ -77,65 +304,40 @@ def match_speakers_with_transcription(
         end_time = seg["end"]
         text = seg["text"]
 
-        # 🔹 화자 구간과 Whisper 구간의 교집합 계산 (intersection)
-        diarization_intersections = [
-            {
-                "speaker": diarization["speaker"],
-                "intersection": max(
-                    0, min(diarization["end"], end_time) - max(diarization["start"], start_time)
-                )
-            }
-            for diarization in diarization_result
-        ]
-
         # 🔹 가장 많이 겹치는 화자 찾기
-        if diarization_intersections:
-            best_match = max(diarization_intersections, key=lambda x: x["intersection"])
-            speaker = best_match["speaker"] if best_match["intersection"] > 0 else "Unknown"
-        else:
+        speaker = index.best_overlap(start_time, end_time)
+        if speaker is None:
             speaker = "Unknown"
 
         # 🔹 화자 정보가 없을 경우, `fill_nearest` 옵션에 따라 처리
         if speaker == "Unknown" and fill_nearest:
-            closest_speaker = min(
-                diarization_result,
-                key=lambda x: abs(x["start"] - start_time),
-                default=None,
-            )
-            if closest_speaker:
-                speaker = closest_speaker["speaker"]
+            closest_speaker = index.nearest_start(start_time)
+            if closest_speaker is not None:
+                speaker = closest_speaker
 
-        # 🔹 현재 `segment`에 해당하는 단어 찾기
+        # 🔹 현재 `segment`에 해당하는 단어 찾기 (start_time <= 단어 시작 <= end_time, 원래 순서 유지)
+        lo = np.searchsorted(sorted_word_starts, start_time, side="left")
+        hi = np.searchsorted(sorted_word_starts, end_time, side="right")
         words = []
-        for word in whisper_words:
-            word_start = word.get("start")
-            word_end = word.get("end")
-
-            # 단어가 현재 segment 범위 내에 있는지 확인
-            if word_start and word_end and start_time <= word_start <= end_time:
-                diarization_intersections = [
-                    {
-                        "speaker": diarization["speaker"],
-                        "intersection": max(
-                            0, min(diarization["end"], word_end) - max(diarization["start"], word_start)
-                        )
-                    }
-                    for diarization in diarization_result
-                ]
-
-                # 🔹 단어별 가장 많이 겹치는 화자 찾기
-                if diarization_intersections:
-                    best_match = max(diarization_intersections, key=lambda x: x["intersection"])
-                    word_speaker = best_match["speaker"] if best_match["intersection"] > 0 else speaker
-                else:
-                    word_speaker = speaker
-
-                words.append({
-                    "word": word["word"],
-                    "start": word_start,
-                    "end": word_end,
-                    "speaker": word_speaker
-                })
+        for position in sorted(word_order[lo:hi]):
+            word_index = valid_words[position]
+            word = whisper_words[word_index]
+            word_start = word["start"]
+            word_end = word["end"]
+
+            # 🔹 단어별 가장 많이 겹치는 화자 찾기
+            if word_index not in word_best_speakers:
+                word_best_speakers[word_index] = index.best_overlap(word_start, word_end)
+            word_speaker = word_best_speakers[word_index]
+            if word_speaker is None:
+                word_speaker = speaker
+
+            words.append({
+                "word": word["word"],
+                "start": word_start,
+                "end": word_end,
+                "speaker": word_speaker
+            })
 
         segments.append({
             "speaker": speaker,
@@ -147,36 +349,126 @@ def match_speakers_with_transcription(
 
     return {"segments": segments}
 
-def refine_srt_with_gpt(srt_file_path, output_srt_path):
+def refine_srt_with_gpt(srt_file_path, output_srt_path, model="gpt-4o", window_blocks=REFINE_WINDOW_BLOCKS, concurrency=REFINE_CONCURRENCY):
+    """
+    자막을 REFINE_WINDOW_BLOCKS개 블록 단위로 나눠 동시에 GPT로 다듬고 다시 합침
+    - 각 요청에는 앞뒤 REFINE_CONTEXT_BLOCKS개 블록을 수정하지 않는 문맥으로 함께 보냄
+    - 응답은 블록 수/번호/타임스탬프/화자가 원본과 같은지 검사하고, 다르면 재시도
+    - 재시도해도 실패한 구간은 원본 그대로 사용 (번호가 밀리거나 블록이 빠지지 않음)
+    - 구간별 결과는 (모델, 구간 내용, 문맥)의 해시로 캐시
+    """
     with open(srt_file_path, "r", encoding="utf-8") as file:
-        srt_content = file.read()
+        blocks = split_srt_blocks(file.read())
+
+    windows = [(start, min(start + window_blocks, len(blocks))) for start in range(0, len(blocks), window_blocks)]
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(windows)))) as executor:
+        refined_lines = list(executor.map(propagate(lambda window: refine_srt_window(blocks, *window, model=model)), windows))
 
-    prompt = f"""
+    for (start, end), lines in zip(windows, refined_lines):
+        for block, block_lines in zip(blocks[start:end], lines):
+            block["lines"] = block_lines
+
+    with open(output_srt_path, "w", encoding="utf-8") as file:
+        file.write(join_srt_blocks(blocks))
+
+    return output_srt_path
+
+def refine_srt_window(blocks, start, end, model="gpt-4o", context_blocks=REFINE_CONTEXT_BLOCKS, max_retries=REFINE_MAX_RETRIES):
+    """blocks[start:end]를 다듬어서 블록별 텍스트 줄 리스트 반환 (실패 시 원본 텍스트)"""
+    window = blocks[start:end]
+    target_srt = join_srt_blocks(window)
+    before_srt = join_srt_blocks(blocks[max(0, start - context_blocks):start])
+    after_srt = join_srt_blocks(blocks[end:end + context_blocks])
+
+    store = get_refine_store()
+    key = hash_key(model, REFINE_PROMPT_VERSION, target_srt, before_srt, after_srt)
+    cached = store.get(key)
+    if cached is not None:
+        current_span().add(cache_hits=1)
+        return json.loads(cached)
+
+    prompt = build_refine_prompt(target_srt, before_srt, after_srt)
+    for attempt in range(1, max_retries + 2):
+        try:
+            with span("openai.chat", model=model, chars=len(prompt), retries=attempt - 1):
+                refined = request_refined_srt(prompt, model)
+        except openai.OpenAIError as e:
+            print(f"⚠️ 자막 다듬기 요청 실패 ({start + 1}~{end}번, {attempt}회): {e}")
+            continue
+
+        lines = validate_refined_blocks(window, refined)
+        if lines is not None:
+            store.set(key, json.dumps(lines, ensure_ascii=False))
+            return lines
+        print(f"⚠️ 자막 구조가 바뀐 응답 ({start + 1}~{end}번, {attempt}회), 다시 요청합니다.")
+
+    print(f"⚠️ {start + 1}~{end}번 자막은 원본을 그대로 사용합니다.")
+    return [block["lines"] for block in window]
+
+def build_refine_prompt(target_srt, before_srt="", after_srt=""):
+    context = ""
+    if before_srt:
+        context += f"""
+    -- 앞 자막 (문맥 참고용, 출력하지 말 것) --
+    {before_srt}
+"""
+    if after_srt:
+        context += f"""
+    -- 뒤 자막 (문맥 참고용, 출력하지 말 것) --
+    {after_srt}
+"""
+
+    return f"""
     다음은 자막 파일의 내용입니다. 이 자막을 더 자연스럽고 문맥에 맞게 수정해 주세요.
     단어의 의미를 변경하지 않고, 더 읽기 쉽고 자연스럽게 다듬어 주세요.
 
     **SRT 형식 유지 (번호, 타임스탬프, 화자정보, 텍스트만 포함)**  
+    **블록 수, 번호, 타임스탬프, 화자정보는 원본과 똑같이 유지 (블록을 합치거나 나누지 말 것)**  
     **불필요한 텍스트(예: 코드 블록, ```plaintext 등)는 포함하지 말 것**  
     **자연스럽고 가독성 좋은 문장으로 변환**
-
+    {context}
     -- 원본 자막 --
-    {srt_content}
+    {target_srt}
 
     -- 변환된 자막 --
     """
 
-    client = openai.OpenAI(api_key=OPEN_AI_TOKEN)
+def request_refined_srt(prompt, model="gpt-4o"):
+    client = get_openai_client()
 
     response = client.chat.completions.create(
-        model="gpt-4o",
+        model=model,
         messages=[{"role": "system", "content": "당신은 자막을 다듬는 전문가입니다."},
                   {"role": "user", "content": prompt}],
         temperature=0.7
     )
 
-    refined_srt = response.choices[0].message.content.strip()
+    if response.usage is not None:
+        current_span().add(prompt_tokens=response.usage.prompt_tokens, completion_tokens=response.usage.completion_tokens)
+    return response.choices[0].message.content.strip()
 
-    with open(output_srt_path, "w", encoding="utf-8") as file:
-        file.write(refined_srt)
-
-    return output_srt_path
\ No newline at end of file
+def validate_refined_blocks(original_blocks, refined_srt):
+    """
+    응답 블록이 원본과 개수/번호/타임스탬프/화자가 같으면 블록별 텍스트 줄 리스트, 아니면 None
+    - 응답을 코드 블록(```)으로 감싼 경우는 벗겨서 검사
+    """
+    refined_srt = re.sub(r"^```[a-zA-Z]*\n|\n?```$", "", refined_srt.strip())
+    refined_blocks = split_srt_blocks(refined_srt)
+    if len(refined_blocks) != len(original_blocks):
+        return None
+
+    lines = []
+    for original, refined in zip(original_blocks, refined_blocks):
+        if (original["index"], original["timestamp"], original["speaker"]) != (refined["index"], refined["timestamp"], refined["speaker"]):
+            return None
+        if original["lines"] and not any(line.strip() for line in refined["lines"]):
+            return None
+        lines.append(refined["lines"])
+    return lines
+
+def get_refine_store():
+    global _refine_store
+    with _refine_store_lock:
+        if _refine_store is None:
+            _refine_store = KeyValueStore(os.path.join(get_cache_dir("refine"), "windows.sqlite3"))
+        return _refine_store
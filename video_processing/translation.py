@@ -1,31 +1,109 @@
-from video_processing import requests
+from video_processing import os, requests
+from video_processing.cache import KeyValueStore, hash_key
+from video_processing.file_manager import get_cache_dir
+from video_processing.srt_utils import split_srt_blocks, join_srt_blocks
+from video_processing.tracing import span, current_span
+import threading
 from config import DEEPL_API_KEY, DEEPL_API_URL
 
+# DeepL 요청 제한: 요청당 최대 50개 text, 본문 최대 128KiB (여유를 두고 설정)
+DEEPL_MAX_TEXTS_PER_REQUEST = 50
+DEEPL_MAX_REQUEST_BYTES = 120 * 1024
+
+_translation_memory = None
+_translation_memory_lock = threading.Lock()
+
 def translate_srt(input_srt, output_srt, source_lang, target_lang):
     with open(input_srt, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-    translated_lines = []
-    for line in lines:
-        if "-->" in line or line.strip().isdigit() or line.strip() == "":
-            translated_lines.append(line)
-        else:
-            translated_text = translate_text(line.strip(), source_lang, target_lang)
-            translated_lines.append(translated_text + "\n")
+        blocks = split_srt_blocks(f.read())
+
+    # 🔹 번역할 텍스트 줄만 모아서 한 번에 번역 (번호, 타임스탬프, 화자 줄 제외)
+    texts = [line.strip() for block in blocks for line in block["lines"] if line.strip()]
+    translations = dict(zip(texts, translate_texts(texts, source_lang, target_lang)))
+
+    for block in blocks:
+        block["lines"] = [translations[line.strip()] if line.strip() else line for line in block["lines"]]
+
     with open(output_srt, "w", encoding="utf-8") as f:
-        f.writelines(translated_lines)
+        f.write(join_srt_blocks(blocks))
     return output_srt
 
 def translate_text(text, source_lang, target_lang):
+    return translate_texts([text], source_lang, target_lang)[0]
+
+def translate_texts(texts, source_lang, target_lang):
+    """
+    여러 문장을 번역하여 같은 순서로 반환
+    - 번역 메모리에 있는 문장과 중복 문장은 요청하지 않음
+    - 나머지는 DeepL 제한에 맞춘 배치 단위로 요청
+    - 실패한 배치는 원문을 그대로 반환 (메모리에 저장하지 않음)
+    """
+    source_lang = source_lang.upper()
+    target_lang = target_lang.upper()
+    memory = get_translation_memory()
+
+    unique_texts = list(dict.fromkeys(texts))
+    keys = {text: hash_key(source_lang, target_lang, text) for text in unique_texts}
+    stored = memory.get_many(keys.values())
+    translations = {text: stored[key] for text, key in keys.items() if key in stored}
+
+    pending = [text for text in unique_texts if text not in translations]
+    batches = make_translation_batches(pending)
+    current_span().add(cache_hits=len(translations))
+    print(f"🌍 번역 문장 {len(texts)}개 → 중복 제외 {len(unique_texts)}개, 번역 메모리 적중 {len(translations)}개, 요청 {len(batches)}회")
+
+    for batch in batches:
+        translated = request_deepl_translation(batch, source_lang, target_lang)
+        if translated is None:
+            translations.update({text: text for text in batch})
+            continue
+        translations.update(zip(batch, translated))
+        memory.set_many({keys[text]: result for text, result in zip(batch, translated)})
+
+    return [translations[text] for text in texts]
+
+def make_translation_batches(texts, max_texts=DEEPL_MAX_TEXTS_PER_REQUEST, max_bytes=DEEPL_MAX_REQUEST_BYTES):
+    """요청당 문장 수와 본문 크기 제한을 넘지 않도록 문장들을 나눔"""
+    batches = []
+    batch = []
+    batch_bytes = 0
+    for text in texts:
+        # form 인코딩 시 "text=" 와 구분자, 퍼센트 인코딩으로 늘어나는 크기까지 보수적으로 계산
+        text_bytes = len(text.encode("utf-8")) * 3 + 6
+        if batch and (len(batch) >= max_texts or batch_bytes + text_bytes > max_bytes):
+            batches.append(batch)
+            batch = []
+            batch_bytes = 0
+        batch.append(text)
+        batch_bytes += text_bytes
+    if batch:
+        batches.append(batch)
+    return batches
+
+def request_deepl_translation(texts, source_lang, target_lang):
+    """DeepL 요청 한 번으로 여러 문장 번역. 실패 시 None"""
     headers = {"Authorization": f"DeepL-Auth-Key {DEEPL_API_KEY}"}
     data = {
-        "text": [text],
-        "source_lang": source_lang.upper(),
-        "target_lang": target_lang.upper()
+        "text": texts,
+        "source_lang": source_lang,
+        "target_lang": target_lang
     }
-    response = requests.post(DEEPL_API_URL, headers=headers, data=data)
-    if response.status_code == 200:
-        result = response.json()
-        return result["translations"][0]["text"]
-    else:
-        print("❌ 번역 실패:", response.text)
-        return text
\ No newline at end of file
+    # DeepL은 원문 글자 수로 과금
+    with span("deepl.translate", chars=sum(len(text) for text in texts), texts=len(texts)) as call:
+        response = requests.post(DEEPL_API_URL, headers=headers, data=data)
+        call.add(bytes_out=len(response.request.body or b""), bytes_in=len(response.content), http_status=response.status_code)
+        if response.status_code == 200:
+            result = response.json()
+            return [translation["text"] for translation in result["translations"]]
+        else:
+            call.error = f"HTTP {response.status_code}"
+            print("❌ 번역 실패:", response.text)
+            return None
+
+def get_translation_memory():
+    """(source_lang, target_lang, text) → 번역 결과를 저장하는 영구 번역 메모리"""
+    global _translation_memory
+    with _translation_memory_lock:
+        if _translation_memory is None:
+            _translation_memory = KeyValueStore(os.path.join(get_cache_dir("translation"), "memory.sqlite3"))
+        return _translation_memory
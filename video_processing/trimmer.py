@@ -1,18 +1,22 @@
-from video_processing import subprocess, get_file_path
+from video_processing import get_file_path
+from video_processing.media import run_ffmpeg
 
-def trim_video(input_file, start_time, end_time, filename="trimmed_video.mp4"):
-
-    def time_to_seconds(time_str):
-        h, m, s = map(int, time_str.split(':'))
-        return h * 3600 + m * 60 + s
+def time_to_seconds(time_str):
+    h, m, s = map(int, time_str.split(':'))
+    return h * 3600 + m * 60 + s
 
+def trim_video(input_file, start_time, end_time, filename="trimmed_video.mp4", job=None, offset=0):
+    """
+    input_file에서 start_time ~ end_time 구간을 잘라냄
+    - offset: input_file이 원본 영상의 offset초 지점부터 시작하는 구간 파일일 때 그 시작 위치
+    """
     start_seconds = time_to_seconds(start_time)
     end_seconds = time_to_seconds(end_time)
     duration = end_seconds - start_seconds
     if not isinstance(duration, (int, float)):
         raise ValueError("Duration must be a number")
 
-    output_file = get_file_path(filename)
-    command = f"ffmpeg -i {input_file} -ss {start_time} -t {duration} -c:v copy -c:a copy {output_file} -loglevel error -y"
-    subprocess.run(command, shell=True)
+    output_file = get_file_path(filename, job)
+    # 입력 쪽 -ss: 처음부터 디코딩하지 않고 구간 시작 위치로 바로 이동
+    run_ffmpeg(["-ss", f"{max(0, start_seconds - offset):.3f}", "-t", duration, "-i", input_file, "-c:v", "copy", "-c:a", "copy", output_file])
     return output_file
\ No newline at end of file
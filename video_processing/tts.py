@@ -1,8 +1,34 @@
-from video_processing import os, AudioSegment, ElevenLabs, subprocess, torchaudio, torch, requests, parse_srt, get_file_path
-from config import ELEVENLABS_API_KEY
-
-def extract_speech_with_elevenlabs(input_audio, output_audio):
-    output_path = get_file_path(output_audio)
+from video_processing import os, json, np, ElevenLabs, subprocess, torchaudio, torch, requests, parse_srt, get_file_path
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from video_processing.cache import BlobCache, hash_key
+from video_processing.timeline import Timeline
+from video_processing.file_manager import get_cache_dir
+from video_processing.pipeline import file_fingerprint
+from video_processing.timestretch import time_stretch, stretch_clips
+from video_processing.tracing import span, current_span, propagate
+from config import ELEVENLABS_API_KEY, ELEVENLABS_API_URL, TTS_CONCURRENCY, TTS_CACHE_MAX_MB, TTS_OUTPUT_FORMAT, TIME_STRETCH_ENGINE, TIME_STRETCH_WORKERS
+
+TTS_MODEL_ID = "eleven_multilingual_v2"
+# PCM 포맷을 쓸 수 없는 계정일 때 대신 요청할 포맷
+TTS_FALLBACK_OUTPUT_FORMAT = "mp3_44100_128"
+
+# 재생성 시 바뀐 자막만 다시 배치하기 위해 작업 공간에 저장하는 렌더 상태
+RENDER_TIMELINE_FILENAME = "tts_timeline.npy"
+RENDER_STATE_FILENAME = "tts_render.json"
+
+# 스레드별 HTTP 세션 (커넥션 재사용)
+_thread_local = threading.local()
+
+_tts_cache = None
+_tts_cache_lock = threading.Lock()
+
+# API가 PCM 포맷을 거부하면 이후 요청은 MP3로 전환
+_pcm_rejected = False
+
+def extract_speech_with_elevenlabs(input_audio, output_audio, job=None):
+    output_path = get_file_path(output_audio, job)
 
     client = ElevenLabs(api_key=ELEVENLABS_API_KEY)
 
@@ -43,118 +69,390 @@ def extract_speech_with_elevenlabs(input_audio, output_audio):
 
     return output_path
 
-def generate_tts_with_timestamps(srt_file, speaker_voice_id_list, filename="tts_audio.mp3"):
-    output_path = get_file_path(filename)
+def generate_tts_with_timestamps(srt_file, speaker_voice_id_list, filename="tts_audio.mp3", concurrency=TTS_CONCURRENCY, overlap="truncate", job=None):
+    """자막 타임스탬프에 맞춰 TTS 음성을 배치한 오디오 파일 생성 (render_tts_timeline 결과를 한 번 인코딩)"""
+    output_path = get_file_path(filename, job)
+    rendered = render_tts_timeline(srt_file, speaker_voice_id_list, concurrency, overlap, job)
+    timeline = Timeline.load(rendered["tts_timeline"], sample_rate=rendered["tts_sample_rate"], overlap=overlap)
+    timeline.end_sample = rendered["tts_frames"]
+    timeline.export(output_path, format="mp3")
+    return output_path
+
+def render_tts_timeline(srt_file, speaker_voice_id_list, concurrency=TTS_CONCURRENCY, overlap="truncate", job=None):
+    """
+    자막 타임스탬프에 맞춰 TTS 음성을 배치한 PCM 타임라인(.npy)을 만들고
+    {"tts_timeline": 경로, "tts_sample_rate": 샘플레이트, "tts_frames": 마지막 음성이 끝나는 샘플 위치} 반환 (인코딩하지 않음)
+    - 저장한 버퍼는 마지막 자막 종료 시각까지 할당돼 있으므로 실제 TTS 길이는 tts_frames
+    - 이전 렌더 결과(PCM 타임라인 + 자막 목록)가 작업 공간에 있으면 바뀐 자막만 다시 생성해서 해당 구간만 덮어씀
+    """
     subtitles = parse_srt(srt_file)
-    combined_audio = AudioSegment.silent(duration=0)
-    previous_ids = []
+    sample_rate = get_sample_rate(TTS_OUTPUT_FORMAT)
 
     speaker_voice_map = convert_list_to_speaker_map(speaker_voice_id_list)
 
-    for idx, subtitle in enumerate(subtitles):
-        text = subtitle["text"]
-        speaker = subtitle["speaker"]
-        start_ms = int(subtitle["start"] * 1000)
-        end_ms = int(subtitle["end"] * 1000)
-        duration_ms = end_ms - start_ms
+    # voice_id = SPEAKER_VOICE_MAP.get(speaker, default_voice_id)  # 기본값 적용
+    voice_ids = [speaker_voice_map.get(subtitle["speaker"], speaker_voice_id_list[0]) for subtitle in subtitles]  # 기본값 적용
+    entries = [make_render_entry(subtitle, voice_id) for subtitle, voice_id in zip(subtitles, voice_ids)]
+
+    # 🔹 이전 렌더와 비교해서 다시 배치할 자막 결정 (없으면 전체)
+    total_ms = max((entry["end_ms"] for entry in entries), default=0)
+    timeline, indices = load_incremental_render(entries, total_ms, sample_rate, overlap, job)
+    if timeline is None:
+        # 🔹 마지막 자막 종료 시각 기준으로 버퍼를 한 번만 할당
+        timeline = Timeline(total_ms, sample_rate=sample_rate, overlap=overlap)
+        indices = list(range(len(subtitles)))
+    else:
+        print(f"♻️ 이전 렌더 재사용: 자막 {len(subtitles)}개 중 {len(indices)}개만 다시 배치")
+
+    # 🔹 자막별 음성을 병렬로 생성한 뒤(메모리상 PCM), 아래에서 타임라인 순서대로 조립
+    clips = synthesize_subtitles([subtitles[idx] for idx in indices], [voice_ids[idx] for idx in indices], concurrency, sample_rate=sample_rate)
+    # 🔹 음성 생성에 실패한 자막이 있으면 무음으로 두지 않고 단계를 실패시킴 (렌더 상태도 저장하지 않음)
+    failed = [idx for idx, tts_audio in zip(indices, clips) if tts_audio is None]
+    if failed:
+        raise RuntimeError(f"TTS 음성 생성 실패: 자막 {len(failed)}개 ({', '.join(str(idx) for idx in failed[:10])}{' ...' if len(failed) > 10 else ''})")
 
-        # voice_id = SPEAKER_VOICE_MAP.get(speaker, default_voice_id)  # 기본값 적용
-        voice_id = speaker_voice_map.get(speaker, speaker_voice_id_list[0])  # 기본값 적용
+    # 🔹 자막 구간보다 긴 음성은 한 번에 모아서 배속 조정 (WSOLA면 작업 프로세스에서 병렬 처리)
+    durations_ms = [entries[idx]["end_ms"] - entries[idx]["start_ms"] for idx in indices]
+    overlong = [i for i, tts_audio in enumerate(clips) if 0 < durations_ms[i] < len(tts_audio) * 1000 / sample_rate]
+    speed_factors = {i: len(clips[i]) * 1000 / sample_rate / durations_ms[i] for i in overlong}
+    stretched = adjust_audio_speed_batch([clips[i] for i in overlong], sample_rate, [speed_factors[i] for i in overlong])
+    adjusted = dict(zip(overlong, stretched))
 
-        temp_tts_file = f"temp_{idx}.mp3"
-        
-        request_id = generate_speech_with_elevenlabs(text, voice_id, temp_tts_file, previous_ids)
-        if request_id:
-            previous_ids.append(request_id)  # 새 ID 추가
-            previous_ids = previous_ids[-3:]  # 최대 3개까지만 유지
+    for i, (idx, tts_audio) in enumerate(zip(indices, clips)):
+        subtitle = subtitles[idx]
+        start_ms = entries[idx]["start_ms"]
+        duration_ms = durations_ms[i]
 
-        tts_audio = AudioSegment.from_file(temp_tts_file)
-        tts_duration = len(tts_audio)
+        tts_duration = len(tts_audio) * 1000 / sample_rate
 
         print(f"📌 [{idx}] 음성 파일 생성")
         print(f"   ▶ 원본 SRT 타임스탬프: {subtitle['start']}s ~ {subtitle['end']}s ({duration_ms}ms)")
         print(f"   ▶ 생성된 음성 길이: {tts_duration / 1000:.2f}s")
 
-        if tts_duration > duration_ms:
-            speed_factor = tts_duration / duration_ms
-            adjusted_tts_file = f"adjusted_{idx}.mp3"
+        if i in adjusted:
+            tts_audio = adjusted[i]
+            print(f"   ▶ 길이 초과 → {speed_factors[i]:.2f}배속 적용")
 
-            # FFmpeg을 이용해 배속 조정
-            adjust_audio_speed(temp_tts_file, adjusted_tts_file, speed_factor)
+        # 짧은 음성은 뒤가 이미 무음이므로 따로 채울 필요 없음
+        audio_start = start_ms
+        audio_end = audio_start + len(tts_audio) * 1000 / sample_rate
+        entries[idx]["range"] = timeline.place(tts_audio, audio_start)
 
-            print(f"   ▶ 길이 초과 → {speed_factor:.2f}배속 적용")
+        print(f"   🔍 실제 음성 파일 타임스탬프: {audio_start / 1000:.2f}s ~ {audio_end / 1000:.2f}s")
 
-            # 변환된 오디오 다시 불러오기
-            tts_audio = AudioSegment.from_file(adjusted_tts_file)
-            os.remove(adjusted_tts_file)
-        elif tts_duration < duration_ms:
-            silence = AudioSegment.silent(duration=duration_ms - tts_duration)
-            tts_audio = tts_audio + silence
+    timeline.end_sample = max((entry["range"][1] for entry in entries), default=0)
+    save_render_state(timeline, entries, job)
 
-        audio_start = start_ms
-        audio_end = audio_start + len(tts_audio)
+    return {"tts_timeline": get_file_path(RENDER_TIMELINE_FILENAME, job), "tts_sample_rate": sample_rate, "tts_frames": timeline.end_sample}
 
-        if start_ms > len(combined_audio):
-            gap = AudioSegment.silent(duration=audio_start - len(combined_audio))
-            combined_audio += gap
+def make_render_entry(subtitle, voice_id):
+    """렌더 결과 비교에 쓰는 자막 정보 (시간, 화자, 텍스트, 목소리, 포맷이 같으면 같은 음성)"""
+    return {
+        "start_ms": int(subtitle["start"] * 1000),
+        "end_ms": int(subtitle["end"] * 1000),
+        "speaker": subtitle["speaker"],
+        "text": subtitle["text"],
+        "voice_id": voice_id,
+        "model_id": TTS_MODEL_ID,
+    }
 
-        combined_audio += tts_audio
+def _render_key(entry):
+    return (entry["start_ms"], entry["end_ms"], entry["speaker"], entry["text"], entry["voice_id"], entry["model_id"])
 
-        print(f"   🔍 실제 음성 파일 타임스탬프: {audio_start / 1000:.2f}s ~ {audio_end / 1000:.2f}s")
+def save_render_state(timeline, entries, job=None):
+    """
+    다음 재생성에서 비교할 수 있도록 PCM 타임라인과 자막별 배치 구간 저장
+    - 상태가 어느 타임라인 파일을 설명하는지 알 수 있도록 타임라인 파일의 sha256도 함께 저장
+    """
+    timeline_path = get_file_path(RENDER_TIMELINE_FILENAME, job)
+    timeline.save(timeline_path)
+    state = {
+        "timeline_sha256": file_fingerprint(timeline_path),
+        "sample_rate": timeline.sample_rate,
+        "channels": timeline.channels,
+        "overlap": timeline.overlap,
+        "entries": entries,
+    }
+    with open(get_file_path(RENDER_STATE_FILENAME, job), "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
 
-        os.remove(temp_tts_file)
+def load_incremental_render(entries, total_ms, sample_rate, overlap, job=None):
+    """
+    이전 렌더 상태를 불러와서 (타임라인, 다시 배치할 자막 인덱스)를 반환. 재사용할 수 없으면 (None, None)
+    - 바뀐/삭제된 자막 구간을 지우고, 그 구간과 겹치는 자막은 모두 다시 배치 (전체 렌더와 같은 결과)
+    - 바뀌지 않은 자막의 배치 구간은 그대로 이어받음
+    - 작업 공간의 타임라인이 상태를 저장할 때와 다르면(단계 저장소에서 다른 렌더 결과를 복원했거나 렌더 도중 중단) 전체 렌더
+    """
+    state_path = get_file_path(RENDER_STATE_FILENAME, job)
+    timeline_path = get_file_path(RENDER_TIMELINE_FILENAME, job)
+    if not (os.path.exists(state_path) and os.path.exists(timeline_path)):
+        return None, None
+
+    with open(state_path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    if state["sample_rate"] != sample_rate or state["overlap"] != overlap:
+        return None, None
+    if state.get("timeline_sha256") != file_fingerprint(timeline_path):
+        print("⚠️ 렌더 상태가 작업 공간의 타임라인과 맞지 않음 → 전체 다시 렌더링")
+        return None, None
+
+    # 🔹 바뀌지 않은 자막 찾기 (같은 키가 여러 개면 순서대로 짝지음)
+    previous = {}
+    for entry in state["entries"]:
+        if entry.get("range"):
+            previous.setdefault(_render_key(entry), []).append(entry["range"])
+    pending = set()
+    for idx, entry in enumerate(entries):
+        ranges = previous.get(_render_key(entry))
+        if ranges:
+            entry["range"] = ranges.pop(0)
+        else:
+            pending.add(idx)
+
+    timeline = Timeline.load(timeline_path, sample_rate, state["channels"], overlap)
+    # 새 자막은 음성이 자막 구간 안에 들어가도록 조정되므로 자막 구간을 기준으로 계산
+    dirty = [tuple(r) for ranges in previous.values() for r in ranges]
+    dirty += [(timeline.ms_to_samples(entries[idx]["start_ms"]), timeline.ms_to_samples(entries[idx]["end_ms"])) for idx in pending]
+
+    # 🔹 지울 구간과 겹치는 자막도 다시 배치 (겹침이 없어질 때까지 반복)
+    changed = True
+    while changed:
+        changed = False
+        for idx, entry in enumerate(entries):
+            if idx in pending:
+                continue
+            start, end = entry["range"]
+            if any(start < dirty_end and dirty_start < end for dirty_start, dirty_end in dirty):
+                pending.add(idx)
+                dirty.append((start, end))
+                changed = True
+
+    if len(timeline.buffer) < timeline.ms_to_samples(total_ms):
+        timeline.resize(timeline.ms_to_samples(total_ms))
+    for dirty_start, dirty_end in dirty:
+        timeline.clear(dirty_start, dirty_end)
+
+    return timeline, sorted(pending)
+
+def synthesize_subtitles(subtitles, voice_ids, concurrency=TTS_CONCURRENCY, cache=None, sample_rate=44100):
+    """
+    자막별 음성을 생성하고, 자막 순서대로 int16 PCM 배열 리스트를 반환 (실패한 자막은 None)
+    - (텍스트, voice_id, 모델, 포맷)이 같은 자막은 한 번만 생성하고 배열을 공유
+    - 디스크 캐시에 있는 음성은 API를 호출하지 않음
+    - 같은 체인 안에서는 순서대로 요청하며 previous_request_ids를 이어서 전달
+    - 서로 다른 체인은 최대 `concurrency`개까지 동시에 요청
+    """
+    cache = cache if cache is not None else get_tts_cache()
+    output_format = get_tts_output_format()
+    keys = [tts_cache_key(subtitle["text"], voice_id, output_format=output_format) for subtitle, voice_id in zip(subtitles, voice_ids)]
+
+    # 🔹 중복 문장 제거 (처음 등장한 자막의 결과를 공유)
+    first_indices = {}
+    for idx, key in enumerate(keys):
+        first_indices.setdefault(key, idx)
+    clips = {}
+
+    # 🔹 캐시 조회
+    pending = []
+    for key, idx in first_indices.items():
+        audio_bytes = cache.get(key)
+        if audio_bytes is None:
+            pending.append(idx)
+        else:
+            clips[idx] = decode_tts_audio(audio_bytes, output_format, sample_rate)
+
+    current_span().add(cache_hits=len(first_indices) - len(pending))
+    print(f"💾 TTS 자막 {len(subtitles)}개 → 중복 제외 {len(first_indices)}개, 캐시 적중 {len(first_indices) - len(pending)}개, 생성 {len(pending)}개")
+
+    def run_chain(chain):
+        previous_ids = []
+        for idx in chain:
+            audio_bytes, request_id, used_format = request_speech_with_elevenlabs(subtitles[idx]["text"], voice_ids[idx], previous_ids, output_format=get_tts_output_format())
+            if audio_bytes is None:
+                continue
+            clips[idx] = decode_tts_audio(audio_bytes, used_format, sample_rate)
+            cache.put(tts_cache_key(subtitles[idx]["text"], voice_ids[idx], output_format=used_format), audio_bytes)
+            if request_id:
+                previous_ids.append(request_id)  # 새 ID 추가
+                previous_ids = previous_ids[-3:]  # 최대 3개까지만 유지
+
+    chains = [
+        [pending[i] for i in chain]
+        for chain in build_synthesis_chains([subtitles[idx] for idx in pending], concurrency)
+    ]
 
-    combined_audio.export(output_path, format="mp3")
+    if concurrency <= 1 or len(chains) <= 1:
+        for chain in chains:
+            run_chain(chain)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            # 예외가 있으면 여기서 다시 발생
+            list(executor.map(propagate(run_chain), chains))
 
-    return output_path
+    return [clips.get(first_indices[key]) for key in keys]
+
+def build_synthesis_chains(subtitles, concurrency=TTS_CONCURRENCY):
+    """
+    순서대로 요청해야 하는 자막 인덱스 묶음(체인) 리스트를 반환
+    - concurrency <= 1: 전체가 하나의 체인 (기존 순차 처리와 동일)
+    - 그 외: 화자별로 묶은 뒤, 체인 수가 concurrency 이상이 되도록 잘라서 나눔
+    예: 화자 A=[0, 2, 4, 6], B=[1, 3], concurrency=3 -> [[0, 2], [1, 3], [4, 6]]
+    """
+    if not subtitles:
+        return []
+    if concurrency <= 1:
+        return [list(range(len(subtitles)))]
+
+    speaker_indices = {}
+    for idx, subtitle in enumerate(subtitles):
+        speaker_indices.setdefault(subtitle["speaker"], []).append(idx)
+
+    chain_size = max(1, math.ceil(len(subtitles) / concurrency))
+    chains = [
+        indices[i:i + chain_size]
+        for indices in speaker_indices.values()
+        for i in range(0, len(indices), chain_size)
+    ]
+    # 앞쪽 자막부터 먼저 요청되도록 정렬
+    chains.sort(key=lambda chain: chain[0])
+    return chains
+
+def get_tts_cache():
+    """프로세스 전체에서 공유하는 TTS 디스크 캐시 (hit/miss 통계는 `get_tts_cache().stats()`)"""
+    global _tts_cache
+    with _tts_cache_lock:
+        if _tts_cache is None:
+            _tts_cache = BlobCache(get_cache_dir("tts"), TTS_CACHE_MAX_MB * 1024 * 1024)
+        return _tts_cache
+
+def tts_cache_key(text, voice_id, model_id=TTS_MODEL_ID, output_format=TTS_OUTPUT_FORMAT):
+    return hash_key(text, voice_id, model_id, output_format)
+
+def get_tts_output_format():
+    return TTS_FALLBACK_OUTPUT_FORMAT if _pcm_rejected and TTS_OUTPUT_FORMAT.startswith("pcm_") else TTS_OUTPUT_FORMAT
+
+def get_sample_rate(output_format):
+    """ElevenLabs 포맷 이름에서 샘플레이트 추출 (예: pcm_44100 -> 44100, mp3_44100_128 -> 44100)"""
+    return int(output_format.split("_")[1])
+
+def decode_tts_audio(audio_bytes, output_format, sample_rate=44100):
+    """
+    TTS 응답을 메모리에서 바로 mono int16 배열로 변환
+    - pcm_*: 헤더 없는 16bit little-endian PCM이므로 그대로 읽음
+    - 그 외(mp3 등): FFmpeg에 파이프로 넘겨서 디코딩
+    """
+    if output_format.startswith("pcm_"):
+        samples = np.frombuffer(audio_bytes[:len(audio_bytes) // 2 * 2], dtype="<i2").astype(np.int16)
+        source_rate = get_sample_rate(output_format)
+        if source_rate != sample_rate:
+            samples = resample_linear(samples, source_rate, sample_rate)
+        return samples
+
+    command = [
+        "ffmpeg", "-i", "pipe:0",
+        "-f", "s16le", "-acodec", "pcm_s16le", "-ac", "1", "-ar", str(sample_rate),
+        "pipe:1", "-loglevel", "error"
+    ]
+    result = subprocess.run(command, input=audio_bytes, stdout=subprocess.PIPE, check=True)
+    return np.frombuffer(result.stdout, dtype="<i2").astype(np.int16)
+
+def resample_linear(samples, source_rate, target_rate):
+    target_length = int(round(len(samples) * target_rate / source_rate))
+    positions = np.arange(target_length) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+
+def _get_session():
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        _thread_local.session = session
+    return session
 
 def generate_speech_with_elevenlabs(text, voice_id, output_audio, previous_request_ids=None):
+    audio_bytes, request_id, _ = request_speech_with_elevenlabs(text, voice_id, previous_request_ids, output_format=TTS_FALLBACK_OUTPUT_FORMAT)
+
+    if audio_bytes is not None:
+        # 오디오 파일 저장
+        with open(output_audio, "wb") as f:
+            f.write(audio_bytes)
+
+    return request_id
+
+def request_speech_with_elevenlabs(text, voice_id, previous_request_ids=None, model_id=TTS_MODEL_ID, output_format=TTS_OUTPUT_FORMAT):
+    """
+    ElevenLabs TTS 요청 후 (오디오 바이트, request_id, 실제 포맷) 반환. 실패 시 (None, None, 포맷)
+    - PCM 포맷이 거부되면 MP3로 한 번 더 요청하고, 이후 요청도 MP3를 사용
+    """
+    global _pcm_rejected
 
     # 요청 본문 구성
     request_data = {
         "voice_id": voice_id,
-        "output_format": "mp3_44100_128",
+        "output_format": output_format,
         "text": text,
-        "model_id": "eleven_multilingual_v2"
+        "model_id": model_id
     }
 
     if previous_request_ids:
-        request_data["previous_request_ids"] = previous_request_ids
+        request_data["previous_request_ids"] = list(previous_request_ids)
 
     # API 요청
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+    url = f"{ELEVENLABS_API_URL}/v1/text-to-speech/{voice_id}"
     headers = {
         "xi-api-key": ELEVENLABS_API_KEY,
         "Content-Type": "application/json"
     }
 
-    response = requests.post(url, headers=headers, json=request_data)
+    # ElevenLabs는 텍스트 글자 수로 과금
+    with span("elevenlabs.tts", chars=len(text), voice_id=voice_id, output_format=output_format) as call:
+        response = _get_session().post(url, headers=headers, json=request_data, params={"output_format": output_format})
+        call.add(bytes_out=len(response.request.body or b""), bytes_in=len(response.content), http_status=response.status_code)
+        format_rejected = output_format.startswith("pcm_") and 400 <= response.status_code < 500 and "format" in response.text.lower()
+        if response.status_code != 200:
+            call.error = f"HTTP {response.status_code}"
+            call.add(retries=int(format_rejected))
 
     if response.status_code == 200:
-        audio_bytes = response.content
-
-        # 오디오 파일 저장
-        with open(output_audio, "wb") as f:
-            f.write(audio_bytes)
-
         # 응답 헤더에서 request_id 추출
         request_id = response.headers.get("request-id")
 
-        return request_id
+        return response.content, request_id, output_format
+    elif format_rejected:
+        print(f"⚠️ {output_format} 포맷을 사용할 수 없어 {TTS_FALLBACK_OUTPUT_FORMAT}로 요청합니다.")
+        _pcm_rejected = True
+        return request_speech_with_elevenlabs(text, voice_id, previous_request_ids, model_id, TTS_FALLBACK_OUTPUT_FORMAT)
     else:
         print(f"⚠️ 오류 발생: {response.status_code} - {response.text}")
-        return None
+        return None, None, output_format
+
+def adjust_audio_speed(samples, sample_rate, speed_factor, engine=TIME_STRETCH_ENGINE):
+    """
+    음높이를 유지한 채 속도 조정 (mono int16 배열)
+    - engine="wsola": 현재 프로세스에서 NumPy로 처리 (기본값)
+    - engine="rubberband": FFmpeg rubberband 필터 사용
+    """
+    if engine == "rubberband":
+        return adjust_audio_speed_with_ffmpeg(samples, sample_rate, speed_factor)
+    return time_stretch(samples, sample_rate, speed_factor)
+
+def adjust_audio_speed_batch(clips, sample_rate, speed_factors, engine=TIME_STRETCH_ENGINE, workers=TIME_STRETCH_WORKERS):
+    """여러 클립을 한 번에 속도 조정해서 같은 순서로 반환 (WSOLA는 작업 프로세스에 나눠서 처리)"""
+    if engine == "rubberband":
+        return [adjust_audio_speed_with_ffmpeg(clip, sample_rate, factor) for clip, factor in zip(clips, speed_factors)]
+    return stretch_clips(clips, sample_rate, speed_factors, workers=workers)
 
-def adjust_audio_speed(input_audio, output_audio, speed_factor):
+def adjust_audio_speed_with_ffmpeg(samples, sample_rate, speed_factor):
     """
     FFmpeg을 사용하여 속도를 자연스럽게 조정 (rubberband 필터 적용)
+    - mono int16 배열을 파이프로 주고받아 임시 파일을 만들지 않음
     """
     command = [
-        "ffmpeg", "-i", input_audio,
+        "ffmpeg", "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
         "-filter:a", f"rubberband=pitch=1.0:tempo={speed_factor}",
-        "-vn", output_audio, "-loglevel", "error", "-y"
+        "-f", "s16le", "-acodec", "pcm_s16le", "pipe:1", "-loglevel", "error"
     ]
-    subprocess.run(command, check=True)
+    result = subprocess.run(command, input=np.ascontiguousarray(samples, dtype="<i2").tobytes(), stdout=subprocess.PIPE, check=True)
+    return np.frombuffer(result.stdout, dtype="<i2").astype(np.int16)
 
 
 def convert_list_to_speaker_map(voice_id_list):
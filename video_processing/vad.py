@@ -0,0 +1,166 @@
+from video_processing import os, json, np
+from video_processing.cache import KeyValueStore, hash_key
+from video_processing.file_manager import get_cache_dir
+from video_processing.pipeline import file_fingerprint
+import threading
+import wave
+
+VAD_VERSION = 1
+# 분석 프레임 길이 (초)
+FRAME_SECONDS = 0.03
+# 잡음 바닥(하위 10% 에너지)보다 이만큼 커야 음성 후보 (dB)
+ENERGY_MARGIN_DB = 12
+# 이보다 작은 프레임은 무조건 무음 (dBFS)
+MIN_ENERGY_DB = -50
+# 음성 대역(300~3400Hz) 에너지 비율이 이보다 커야 음성 후보
+MIN_SPEECH_BAND_RATIO = 0.5
+# 스펙트럼 평탄도가 이보다 크면 잡음으로 봄 (0: 순음, 1: 백색 잡음)
+MAX_SPECTRAL_FLATNESS = 0.5
+# 구간 앞뒤 여유 / 합칠 간격 / 버릴 최소 길이 (초)
+REGION_PADDING_SECONDS = 0.2
+MERGE_GAP_SECONDS = 0.5
+MIN_REGION_SECONDS = 0.25
+# 압축 오디오에서 구간 사이에 넣는 무음 (초, Whisper/pyannote가 경계를 인식하도록)
+CONDENSED_GAP_SECONDS = 0.3
+# 음성 비율이 이보다 높으면 압축해도 이득이 없으므로 원본 사용
+MAX_SPEECH_RATIO_TO_CONDENSE = 0.9
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_vad_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = KeyValueStore(os.path.join(get_cache_dir("vad"), "regions.sqlite3"))
+        return _store
+
+def detect_speech_regions(audio_file, use_cache=True):
+    """
+    16bit PCM WAV에서 음성 구간 [[시작 초, 종료 초], ...] 검출
+    - 프레임별 에너지(잡음 바닥 대비), 음성 대역 에너지 비율, 스펙트럼 평탄도로 판단
+    - 결과는 오디오 내용의 fingerprint 기준으로 캐시
+    """
+    key = hash_key("vad", VAD_VERSION, file_fingerprint(audio_file)) if use_cache else None
+    if key:
+        cached = get_vad_store().get(key)
+        if cached is not None:
+            return json.loads(cached)
+
+    speech, frame_seconds = classify_frames(audio_file)
+    regions = frames_to_regions(speech, frame_seconds)
+
+    if key:
+        get_vad_store().set(key, json.dumps(regions))
+    return regions
+
+def classify_frames(audio_file, block_seconds=60):
+    """프레임별 음성 여부(bool 배열)와 프레임 길이(초) 반환 (블록 단위로 읽어서 메모리 사용량 일정)"""
+    energies, band_ratios, flatness = [], [], []
+    with wave.open(audio_file, "rb") as source:
+        sample_rate = source.getframerate()
+        channels = source.getnchannels()
+        frame_size = max(1, int(sample_rate * FRAME_SECONDS))
+        block_frames = frame_size * max(1, int(block_seconds / FRAME_SECONDS))
+
+        freqs = np.fft.rfftfreq(frame_size, 1 / sample_rate)
+        speech_band = (freqs >= 300) & (freqs <= 3400)
+
+        while True:
+            data = source.readframes(block_frames)
+            if not data:
+                break
+            samples = np.frombuffer(data, dtype="<i2").reshape(-1, channels).mean(axis=1) / 32768
+            usable = len(samples) - len(samples) % frame_size
+            if not usable:
+                continue
+            frames = samples[:usable].reshape(-1, frame_size)
+
+            rms = np.sqrt(np.mean(np.square(frames), axis=1))
+            energies.append(20 * np.log10(rms + 1e-10))
+
+            power = np.square(np.abs(np.fft.rfft(frames * np.hanning(frame_size), axis=1))) + 1e-12
+            band_ratios.append(power[:, speech_band].sum(axis=1) / power.sum(axis=1))
+            flatness.append(np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1))
+
+    if not energies:
+        return np.zeros(0, dtype=bool), FRAME_SECONDS
+
+    energy = np.concatenate(energies)
+    noise_floor = np.percentile(energy, 10)
+    speech = (
+        (energy > max(noise_floor + ENERGY_MARGIN_DB, MIN_ENERGY_DB))
+        & (np.concatenate(band_ratios) > MIN_SPEECH_BAND_RATIO)
+        & (np.concatenate(flatness) < MAX_SPECTRAL_FLATNESS)
+    )
+    return speech, frame_size / sample_rate
+
+def frames_to_regions(speech, frame_seconds):
+    """음성 프레임을 구간으로 묶고 여유 추가, 가까운 구간 병합, 짧은 구간 제거"""
+    if not len(speech) or not speech.any():
+        return []
+
+    padded = np.concatenate(([False], speech, [False]))
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    total = len(speech) * frame_seconds
+
+    regions = []
+    for start, end in zip(changes[::2], changes[1::2]):
+        start = max(0.0, start * frame_seconds - REGION_PADDING_SECONDS)
+        end = min(total, end * frame_seconds + REGION_PADDING_SECONDS)
+        if regions and start - regions[-1][1] < MERGE_GAP_SECONDS:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+
+    return [[round(float(start), 3), round(float(end), 3)] for start, end in regions if end - start >= MIN_REGION_SECONDS]
+
+class TimeMap:
+    """
+    음성 구간만 이어 붙인 오디오의 시각 <-> 원본 오디오 시각 변환
+    - 구간 사이에 넣은 무음 위치는 바로 앞 구간의 끝 시각으로 변환
+    """
+
+    def __init__(self, regions, gap_seconds=CONDENSED_GAP_SECONDS):
+        self.original_starts = np.array([start for start, _ in regions], dtype=np.float64)
+        self.durations = np.array([end - start for start, end in regions], dtype=np.float64)
+        self.condensed_starts = np.concatenate(([0.0], np.cumsum(self.durations + gap_seconds)[:-1])) if regions else np.zeros(0)
+
+    def to_original(self, t):
+        if not len(self.condensed_starts):
+            return t
+        i = max(0, np.searchsorted(self.condensed_starts, t, side="right") - 1)
+        return float(self.original_starts[i] + min(max(t - self.condensed_starts[i], 0.0), self.durations[i]))
+
+    def remap_items(self, items):
+        """start/end 키가 있는 dict 리스트의 시각을 원본 기준으로 바꾼 새 리스트"""
+        return [
+            {**item, "start": self.to_original(item["start"]), "end": self.to_original(item["end"])}
+            if item.get("start") is not None and item.get("end") is not None else item
+            for item in items
+        ]
+
+def should_condense(regions, audio_file):
+    """음성 구간이 있고, 무음을 충분히 줄일 수 있을 때만 압축"""
+    if not regions:
+        return False
+    with wave.open(audio_file, "rb") as source:
+        duration = source.getnframes() / source.getframerate()
+    speech = sum(end - start for start, end in regions)
+    return duration > 0 and speech / duration <= MAX_SPEECH_RATIO_TO_CONDENSE
+
+def condense_audio(audio_file, regions, output_path, gap_seconds=CONDENSED_GAP_SECONDS):
+    """음성 구간만 (사이에 짧은 무음을 넣어) 이어 붙인 WAV를 만들고 TimeMap 반환"""
+    with wave.open(audio_file, "rb") as source, wave.open(output_path, "wb") as output:
+        output.setparams(source.getparams())
+        sample_rate = source.getframerate()
+        silence = b"\x00" * (int(gap_seconds * sample_rate) * source.getsampwidth() * source.getnchannels())
+
+        for i, (start, end) in enumerate(regions):
+            first = int(start * sample_rate)
+            source.setpos(first)
+            output.writeframes(source.readframes(int(end * sample_rate) - first))
+            if i < len(regions) - 1:
+                output.writeframes(silence)
+
+    return TimeMap(regions, gap_seconds)
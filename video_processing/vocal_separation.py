@@ -1,17 +1,206 @@
-from video_processing import os, subprocess, get_file_path
+from video_processing import os, np, subprocess, torch, get_file_path
+from video_processing.model_server import is_model_server_running, request_model_server
+from video_processing.media import run_ffmpeg, as_pcm_wav, read_wav_frames
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import shutil
+import threading
+import uuid
+import wave
+from config import SEPARATION_WORKERS, SEPARATION_CHUNK_SECONDS
 
-def separate_background_audio(input_file, filename="background_audio.mp3"):
+DEMUCS_MODEL_NAME = "htdemucs"
+# htdemucs 입력 형식 (작업 프로세스를 띄우기 전에 모델을 로드하지 않도록 고정값 사용)
+DEMUCS_SAMPLE_RATE = 44100
+DEMUCS_CHANNELS = 2
+# 이웃한 청크끼리 겹치는 길이 (이 구간에서 crossfade)
+SEPARATION_OVERLAP_SECONDS = 2
+# 통계 계산/변환 시 한 번에 읽는 프레임 수
+READ_BLOCK_FRAMES = 1 << 20
+
+# Demucs 모델은 처음 사용할 때 한 번만 로드
+_demucs_model = None
+_demucs_model_lock = threading.Lock()
+
+def separate_background_audio(input_file, filename="background_audio.wav", job=None, workers=SEPARATION_WORKERS):
     # 원하는 최종 파일 경로
-    final_output_path = get_file_path(filename)
+    final_output_path = get_file_path(filename, job)
+
+    # 🔹 상주 모델 서버가 실행 중이면 서버에 있는 모델 사용
+    if is_model_server_running():
+        try:
+            request_model_server("separate", input_file=os.path.abspath(input_file), output_file=os.path.abspath(final_output_path))
+            return final_output_path
+        except OSError as e:
+            print(f"⚠️ 모델 서버 연결 실패, 직접 실행합니다: {e}")
+
+    # 🔹 Demucs 패키지가 있으면 프로세스 안에서 청크 단위로 분리 (없으면 CLI 사용)
+    try:
+        return separate_with_demucs_model(input_file, final_output_path, workers=workers)
+    except ImportError as e:
+        print(f"⚠️ Demucs 모델을 불러올 수 없어 CLI로 실행합니다: {e}")
+
     # 디렉토리와 파일명 분리
     output_dir = os.path.dirname(final_output_path)
     output_basename = os.path.basename(final_output_path)
     
-    command = f"demucs --two-stems=vocals --out={output_dir} --filename={output_basename} --mp3 {input_file}"
-    subprocess.run(command, shell=True, check=True)
+    command = ["demucs", "--two-stems=vocals", f"--out={output_dir}", f"--filename={output_basename}", input_file]
+    if output_basename.endswith(".mp3"):
+        command.insert(-1, "--mp3")
+    subprocess.run(command, check=True)
 
     model_folder = os.path.join(output_dir, "htdemucs")
     possible_output = os.path.join(model_folder, output_basename)
     if os.path.exists(possible_output):
         os.replace(possible_output, final_output_path)
-    return final_output_path
\ No newline at end of file
+    # 작업 공간에 남은 htdemucs/ 폴더 정리
+    shutil.rmtree(model_folder, ignore_errors=True)
+    return final_output_path
+
+def get_demucs_model():
+    global _demucs_model
+    with _demucs_model_lock:
+        if _demucs_model is None:
+            from demucs.pretrained import get_model
+
+            _demucs_model = get_model(DEMUCS_MODEL_NAME)
+            _demucs_model.to(get_torch_device())
+            _demucs_model.eval()
+        return _demucs_model
+
+def get_torch_device():
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+def separate_with_demucs_model(input_file, output_path, workers=1, chunk_seconds=SEPARATION_CHUNK_SECONDS):
+    """
+    Demucs 모델로 배경음(보컬 제외 stem 합)만 분리해서 저장
+    - 입력을 겹치는 청크로 나눠 처리하므로 메모리 사용량이 입력 길이와 무관함
+    - workers > 1이면 CPU 작업 프로세스마다 모델을 한 번씩 로드해서 청크를 동시에 처리
+      (병렬 처리는 여기서만 하므로 파이프라인에서는 스레드 단계로 호출)
+    - 정규화는 `demucs --two-stems=vocals` CLI와 같이 전체 오디오의 평균/표준편차 사용
+    - 청크 결과는 겹치는 구간에서 crossfade하며 순서대로 출력 파일에 바로 기록
+    """
+    import demucs.apply  # noqa: F401 (Demucs가 없으면 여기서 ImportError)
+
+    model_rate, model_channels = DEMUCS_SAMPLE_RATE, DEMUCS_CHANNELS
+    source_path = as_pcm_wav(input_file, model_rate, model_channels)
+    wav_output = output_path if output_path.endswith(".wav") else f"{output_path}.{uuid.uuid4().hex[:8]}.wav"
+
+    try:
+        with wave.open(source_path, "rb") as source:
+            total_frames = source.getnframes()
+        mean, std = wav_statistics(source_path)
+        chunks = plan_chunks(total_frames, int(chunk_seconds * model_rate), SEPARATION_OVERLAP_SECONDS * model_rate)
+        overlap = SEPARATION_OVERLAP_SECONDS * model_rate
+
+        if get_torch_device() == "cuda" or workers <= 1:
+            executor = None
+            results = (separate_chunk(source_path, start, length, mean, std) for start, length in chunks)
+        else:
+            # torch가 초기화된 부모 프로세스를 fork하지 않도록 spawn 사용
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                           initializer=_init_separation_worker, initargs=(workers,))
+            results = _ordered_results(executor, source_path, chunks, mean, std, max_pending=workers * 2)
+
+        try:
+            with wave.open(wav_output, "wb") as output:
+                output.setnchannels(model_channels)
+                output.setsampwidth(2)
+                output.setframerate(model_rate)
+                write_crossfaded(output, results, overlap)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        if wav_output != output_path:
+            run_ffmpeg(["-i", wav_output, "-b:a", "320k", output_path])
+    finally:
+        if source_path != input_file and os.path.exists(source_path):
+            os.remove(source_path)
+        if wav_output != output_path and os.path.exists(wav_output):
+            os.remove(wav_output)
+    return output_path
+
+def wav_statistics(path):
+    """모노 다운믹스의 평균/표준편차를 블록 단위로 계산 (전체를 메모리에 올리지 않음)"""
+    total = total_sq = count = 0.0
+    with wave.open(path, "rb") as source:
+        for start in range(0, source.getnframes(), READ_BLOCK_FRAMES):
+            mono = read_wav_frames(source, start, READ_BLOCK_FRAMES).mean(axis=1, dtype=np.float64)
+            total += mono.sum()
+            total_sq += np.square(mono).sum()
+            count += len(mono)
+    mean = total / max(count, 1)
+    std = np.sqrt(max(total_sq / max(count, 1) - mean * mean, 0.0))
+    return float(mean), float(std) or 1.0
+
+def plan_chunks(total_frames, chunk_frames, overlap_frames):
+    """
+    [(시작 프레임, 길이)] 리스트
+    - 두 번째 청크부터는 앞 청크의 마지막 overlap_frames와 겹침
+    - 마지막 청크도 overlap_frames보다 길게 나눔
+    """
+    chunk_frames = max(chunk_frames, overlap_frames * 2)
+    chunks = []
+    start = 0
+    while True:
+        end = min(start + chunk_frames, total_frames)
+        chunks.append((start, end - start))
+        if end >= total_frames:
+            return chunks
+        start = end - overlap_frames
+
+def write_crossfaded(output, results, overlap_frames):
+    """순서대로 들어오는 청크 결과를 겹치는 구간에서 선형 crossfade하며 int16으로 기록"""
+    tail = None
+    for chunk in results:
+        if tail is not None:
+            size = min(len(tail), len(chunk))
+            fade_in = np.linspace(0, 1, size, dtype=np.float32)[:, None]
+            chunk = chunk.copy()
+            chunk[:size] = tail[:size] * (1 - fade_in) + chunk[:size] * fade_in
+        keep = min(overlap_frames, len(chunk))
+        output.writeframes(_to_pcm16(chunk[:len(chunk) - keep]))
+        tail = chunk[len(chunk) - keep:]
+    if tail is not None:
+        output.writeframes(_to_pcm16(tail))
+
+def _to_pcm16(samples):
+    return (np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes()
+
+def separate_chunk(source_path, start, length, mean, std):
+    """청크 하나를 분리해서 배경음 float32 (프레임, 채널) 배열 반환"""
+    from demucs.apply import apply_model
+
+    model = get_demucs_model()
+    with wave.open(source_path, "rb") as source:
+        chunk = read_wav_frames(source, start, length)
+
+    wav = (torch.from_numpy(chunk.T.copy()) - mean) / std
+    with torch.no_grad():
+        sources = apply_model(model, wav[None], device=get_torch_device(), split=True, overlap=0.25, progress=False)[0]
+    sources = sources * std + mean
+
+    vocals_index = model.sources.index("vocals")
+    background = sum(source for i, source in enumerate(sources) if i != vocals_index)
+    return background.cpu().numpy().T.astype(np.float32)
+
+def _init_separation_worker(workers):
+    # 작업 프로세스끼리 CPU 코어를 나눠 쓰고, 모델은 프로세스마다 한 번만 로드
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // workers))
+    get_demucs_model()
+
+def _ordered_results(executor, source_path, chunks, mean, std, max_pending):
+    """청크를 작업 프로세스에 나눠 주고 순서대로 결과를 돌려줌 (처리 중인 청크는 max_pending개까지만)"""
+    pending = deque()
+    chunks = iter(chunks)
+    while True:
+        while len(pending) < max_pending:
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            pending.append(executor.submit(separate_chunk, source_path, *chunk, mean, std))
+        if not pending:
+            return
+        yield pending.popleft().result()
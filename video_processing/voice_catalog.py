@@ -0,0 +1,92 @@
+from video_processing import os, json, requests
+from video_processing.file_manager import get_cache_dir
+import threading
+import time
+from config import ELEVENLABS_API_KEY, ELEVENLABS_API_URL, VOICE_CATALOG_TTL_HOURS, VOICE_CATALOG_FILE
+
+CATALOG_FILENAME = "catalog.json"
+# 보이스 목록 요청 제한 시간 (초)
+REQUEST_TIMEOUT_SECONDS = 15
+# 갱신에 실패하면 이 시간 동안은 다시 시도하지 않음 (초, API 장애 시 페이지 로드마다 요청하지 않도록)
+RETRY_AFTER_FAILURE_SECONDS = 5 * 60
+
+# 백그라운드 갱신 스레드 (동시에 하나만 실행)
+_refresh_thread = None
+_refresh_lock = threading.Lock()
+_last_failure = 0
+
+def get_catalog_path():
+    """보이스 목록 파일 경로 (VOICE_CATALOG_FILE이 지정되면 그 파일을 그대로 사용)"""
+    return VOICE_CATALOG_FILE or os.path.join(get_cache_dir("voices"), CATALOG_FILENAME)
+
+def read_voice_catalog():
+    """
+    디스크에 저장된 보이스 목록을 읽어서 {"fetched_at": 저장 시각, "voices": {voice_id: 이름}} 반환
+    - 파일이 없거나 깨졌으면 빈 목록 (네트워크 요청은 하지 않음)
+    """
+    try:
+        with open(get_catalog_path(), "r", encoding="utf-8") as f:
+            catalog = json.load(f)
+    except (OSError, ValueError):
+        return {"fetched_at": 0, "voices": {}}
+    return {"fetched_at": catalog.get("fetched_at", 0), "voices": dict(catalog.get("voices", {}))}
+
+def load_voice_catalog():
+    """저장된 보이스 목록 {voice_id: 이름} (UI 시작 시 바로 사용)"""
+    return read_voice_catalog()["voices"]
+
+def is_catalog_stale(catalog=None, ttl_hours=VOICE_CATALOG_TTL_HOURS):
+    """주입한 목록 파일은 갱신하지 않고, 캐시는 ttl_hours가 지나면 갱신 대상"""
+    if VOICE_CATALOG_FILE:
+        return False
+    catalog = catalog or read_voice_catalog()
+    return time.time() - catalog["fetched_at"] >= ttl_hours * 3600
+
+def fetch_voice_catalog():
+    """ElevenLabs에서 보이스 목록 {voice_id: 이름}을 받아 옴"""
+    response = requests.get(
+        f"{ELEVENLABS_API_URL}/v1/voices",
+        headers={"xi-api-key": ELEVENLABS_API_KEY},
+        timeout=REQUEST_TIMEOUT_SECONDS,
+    )
+    response.raise_for_status()
+    return {voice["voice_id"]: voice["name"] for voice in response.json().get("voices", [])}
+
+def refresh_voice_catalog():
+    """보이스 목록을 받아서 캐시 파일에 저장 (임시 파일에 쓴 뒤 교체)"""
+    voices = fetch_voice_catalog()
+    path = get_catalog_path()
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"fetched_at": time.time(), "voices": voices}, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+    print(f"✅ 보이스 목록 갱신 완료: {len(voices)}개")
+    return voices
+
+def refresh_voice_catalog_in_background(force=False):
+    """
+    목록이 오래됐으면 백그라운드 스레드에서 갱신을 시작하고 그 스레드를 반환 (갱신이 필요 없으면 None)
+    - 이미 갱신 중이면 새로 시작하지 않고 진행 중인 스레드를 반환
+    - 실패해도 기존 목록을 그대로 쓰도록 오류는 출력만 함
+    """
+    global _refresh_thread
+    with _refresh_lock:
+        if _refresh_thread is not None and _refresh_thread.is_alive():
+            return _refresh_thread
+        if not force and (not is_catalog_stale() or time.time() - _last_failure < RETRY_AFTER_FAILURE_SECONDS):
+            return None
+
+        def run():
+            global _last_failure
+            try:
+                refresh_voice_catalog()
+            except Exception as e:
+                _last_failure = time.time()
+                print(f"⚠️ 보이스 목록 갱신 실패 (저장된 목록 사용): {e}")
+
+        _refresh_thread = threading.Thread(target=run, name="voice-catalog-refresh", daemon=True)
+        _refresh_thread.start()
+        return _refresh_thread
+
+def is_refreshing():
+    return _refresh_thread is not None and _refresh_thread.is_alive()